@@ -1,46 +1,65 @@
 from abc import ABC, abstractmethod
+import asyncio
 import base64
 import datetime
+import json
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import requests
+from urllib3.util.retry import Retry
+from .circuit_breaker import AUTHENTICATION_TICKETS, get_circuit_breaker
 from .config import Config
 from .consts import MWS_TOKEN, MWSV2_TOKEN
+from .crypto_backend import get_backend
 from .exceptions import InauthenticError, MAuthNotPresent, MissingV2Error, UnableToAuthenticateError
+from .http_session import LoopClients, create_async_client, create_session, request_timeout
+from .key_holder import AsyncKeyHolder, KeyHolder
 from .lambda_helper import generate_mauth
 from .rsa_verifier import RSAVerifier
+from .signable import RequestSignable
+from .protocol_cache import ProtocolCache
+from .signature_cache import SignatureCache
 from .utils import make_bytes
 
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# errors that make a request inauthentic, or that prevent authenticating it
+AUTHENTICATION_ERRORS = (MAuthNotPresent, MissingV2Error, InauthenticError, UnableToAuthenticateError)
+
+
+class BaseAuthenticator(ABC):
+    """
+    Checks the MAuth protocol of requests: the signature to authenticate, the fallback from v2 to v1, and the
+    times and tokens of the signatures. The signatures themselves are verified by the subclasses, locally or by
+    the upstream MAuth Server.
+    """
 
-class AbstractAuthenticator(ABC):
     ALLOWED_DRIFT_SECONDS = 300
     AUTHENTICATION_TYPE = None
 
-    @abstractmethod
-    def __init__(self, signable, signed, logger):
-        self.signable = signable
-        self.signed = signed
+    def __init__(self, logger):
         self.logger = logger
-        self.rsa_verifier = None  # Lazy loading
 
-    def is_authentic(self):
-        self._log_authentication_request()
-        try:
-            self._authenticate()
-        except (MAuthNotPresent, MissingV2Error) as exc:
-            self.logger.error("mAuth signature not present on %s. Exception: %s", self.signable.name, str(exc))
+    def _authentication_failure(self, signable, exc):
+        if isinstance(exc, (MAuthNotPresent, MissingV2Error)):
+            self.logger.error("mAuth signature not present on %s. Exception: %s", signable.name, str(exc))
             return False, 401, str(exc)
-        except InauthenticError as exc:
+        if isinstance(exc, InauthenticError):
             self.logger.error(
-                "mAuth signature authentication failed for %s. " "Exception: %s", self.signable.name, str(exc)
+                "mAuth signature authentication failed for %s. " "Exception: %s", signable.name, str(exc)
             )
             return False, 401, str(exc)
-        except UnableToAuthenticateError as exc:
-            self.logger.error(str(exc))
-            return False, 500, str(exc)
-        return True, 200, ""
 
-    def _log_authentication_request(self):
-        signed_app_uuid = self.signed.app_uuid if self.signed.app_uuid else "[none provided]"
-        signed_token = self.signed.token if self.signed.token else "[none provided]"
+        self.logger.error(str(exc))
+        return False, 500, str(exc)
+
+    def _log_authentication_request(self, signed):
+        signed_app_uuid = signed.app_uuid if signed.app_uuid else "[none provided]"
+        signed_token = signed.token if signed.token else "[none provided]"
         self.logger.info(
             "Mauth-client attempting to authenticate request from app with mauth"
             " app uuid %s to app with mauth app uuid %s"
@@ -53,88 +72,98 @@ class AbstractAuthenticator(ABC):
     # raises InauthenticError unless the given object is authentic. Will only
     # authenticate with v2 if the environment variable V2_ONLY_AUTHENTICATE
     # is set. Otherwise will fallback to v1 when v2 authentication fails
-    def _authenticate(self):
-        if self.signed.protocol_version() == 2:
+    def _authenticate_request(self, signable, signed, public_keys=None):
+        if signed.protocol_version() == 2:
             try:
-                self._authenticate_v2()
+                self._authenticate_v2(signable, signed, public_keys)
             except InauthenticError:
-                if Config.V2_ONLY_AUTHENTICATE:
+                if not self._fall_back_to_v1(signed):
                     raise
 
-                self.signed.fall_back_to_mws_signature_info()
-                if not self.signed.signature:
-                    raise
-
-                self._log_authentication_request()
-                self._authenticate_v1()
+                self._authenticate_v1(signable, signed, public_keys)
                 self.logger.warning("Completed successful authentication attempt after fallback to v1")
 
-        elif self.signed.protocol_version() == 1:
-            if Config.V2_ONLY_AUTHENTICATE:
-                # If v2 is required but not present and v1 is present we raise MissingV2Error
-                msg = (
-                    "This service requires mAuth v2 mcc-authentication header "
-                    "but only v1 x-mws-authentication is present"
-                )
-                raise MissingV2Error(msg)
-
-            self._authenticate_v1()
+        elif signed.protocol_version() == 1:
+            self._check_v1_allowed()
+            self._authenticate_v1(signable, signed, public_keys)
 
         else:
-            sub_str = "" if Config.V2_ONLY_AUTHENTICATE else "X-MWS-Authentication header is blank, "
-            msg = "Authentication Failed. No mAuth signature present; " "{}MCC-Authentication header is blank.".format(
-                sub_str
-            )
-            raise MAuthNotPresent(msg)
+            self._raise_mauth_not_present()
 
         return True
 
+    # switches to the v1 signature after a failed v2 authentication, unless only v2 is allowed
+    # or there is no v1 signature. Returns whether it did.
+    def _fall_back_to_v1(self, signed):
+        if Config.V2_ONLY_AUTHENTICATE:
+            return False
+
+        signed.fall_back_to_mws_signature_info()
+        if not signed.signature:
+            return False
+
+        self._log_authentication_request(signed)
+        return True
+
+    def _check_v1_allowed(self):
+        if Config.V2_ONLY_AUTHENTICATE:
+            # If v2 is required but not present and v1 is present we raise MissingV2Error
+            msg = "This service requires mAuth v2 mcc-authentication header but only v1 x-mws-authentication is present"
+            raise MissingV2Error(msg)
+
+    def _raise_mauth_not_present(self):
+        sub_str = "" if Config.V2_ONLY_AUTHENTICATE else "X-MWS-Authentication header is blank, "
+        msg = "Authentication Failed. No mAuth signature present; " "{}MCC-Authentication header is blank.".format(
+            sub_str
+        )
+        raise MAuthNotPresent(msg)
+
     # V1 helpers
-    def _authenticate_v1(self):
-        self._time_valid_v1()
-        self._token_valid_v1()
-        self._signature_valid_v1()
+    def _authenticate_v1(self, signable, signed, public_keys=None):
+        self._time_valid_v1(signed)
+        self._token_valid_v1(signed)
+        self._signature_valid_v1(signable, signed, public_keys)
 
-    def _time_valid_v1(self):
-        if not self.signed.x_mws_time:
+    def _time_valid_v1(self, signed):
+        if not signed.x_mws_time:
             raise InauthenticError("Time verification failed. No X-MWS-Time present.")
 
-        if not str(self.signed.x_mws_time).isdigit():
+        if not str(signed.x_mws_time).isdigit():
             raise InauthenticError("Time verification failed. X-MWS-Time header format incorrect.")
 
-        self._time_within_valid_range(self.signed.x_mws_time)
+        self._time_within_valid_range(signed.x_mws_time)
 
-    def _token_valid_v1(self):
-        if not self.signed.token == MWS_TOKEN:
-            msg = "Token verification failed. Expected {}; token was {}.".format(MWS_TOKEN, self.signed.token)
+    def _token_valid_v1(self, signed):
+        if not signed.token == MWS_TOKEN:
+            msg = "Token verification failed. Expected {}; token was {}.".format(MWS_TOKEN, signed.token)
             raise InauthenticError(msg)
 
     @abstractmethod
-    def _signature_valid_v1(self):
+    def _signature_valid_v1(self, signable, signed, public_keys=None):
         pass
 
     # V2 helpers
-    def _authenticate_v2(self):
-        self._time_valid_v2()
-        self._token_valid_v2()
-        self._signature_valid_v2()
+    def _authenticate_v2(self, signable, signed, public_keys=None):
+        self._time_valid_v2(signed)
+        self._token_valid_v2(signed)
+        self._signature_valid_v2(signable, signed, public_keys)
 
-    def _time_valid_v2(self):
-        if not self.signed.mcc_time:
+    def _time_valid_v2(self, signed):
+        if not signed.mcc_time:
             raise InauthenticError("Time verification failed. No MCC-Time present.")
 
-        if not str(self.signed.mcc_time).isdigit():
+        if not str(signed.mcc_time).isdigit():
             raise InauthenticError("Time verification failed. MCC-Time header format incorrect.")
 
-        self._time_within_valid_range(self.signed.mcc_time)
+        self._time_within_valid_range(signed.mcc_time)
 
-    def _token_valid_v2(self):
-        if not self.signed.token == MWSV2_TOKEN:
+    def _token_valid_v2(self, signed):
+        if not signed.token == MWSV2_TOKEN:
             msg = "Token verification failed. Expected {}.".format(MWSV2_TOKEN)
             raise InauthenticError(msg)
 
     @abstractmethod
-    def _signature_valid_v2(self):
+    def _signature_valid_v2(self, signable, signed, public_keys=None):
         pass
 
     def _time_within_valid_range(self, signature_timestamp):
@@ -155,7 +184,208 @@ class AbstractAuthenticator(ABC):
         return self.AUTHENTICATION_TYPE
 
 
-class LocalAuthenticator(AbstractAuthenticator):
+class Authenticator(BaseAuthenticator):
+    """
+    Authenticates requests locally, retrieving the public keys from the upstream MAuth Server.
+
+    An Authenticator holds no request state: build one per app and share it between requests and threads.
+    The authenticators of a single request below are thin wrappers of its checks.
+    """
+
+    AUTHENTICATION_TYPE = "LOCAL"
+
+    # Successfully verified signatures, only kept when MAUTH_SIGNATURE_CACHE_SIZE is set
+    SIGNATURE_CACHE = (
+        SignatureCache(Config.SIGNATURE_CACHE_SIZE, BaseAuthenticator.ALLOWED_DRIFT_SECONDS)
+        if Config.SIGNATURE_CACHE_SIZE
+        else None
+    )
+    # Apps whose v2 signatures keep failing, only kept when MAUTH_PROTOCOL_CACHE_SIZE is set
+    PROTOCOL_CACHE = (
+        ProtocolCache(Config.PROTOCOL_CACHE_SIZE, Config.PROTOCOL_CACHE_TTL) if Config.PROTOCOL_CACHE_SIZE else None
+    )
+
+    def authenticate(self, signable, signed, public_keys=None):
+        """
+        :param RequestSignable signable: the request
+        :param Signed signed: the MAuth headers of the request
+        :param dict public_keys: public keys of the signing apps, or the errors retrieving them, by app_uuid, when
+            retrieved ahead of authentication. The keys of the other apps are retrieved from KeyHolder.
+        :return: (is_authentic, status, message)
+        :rtype: tuple
+        """
+        self._log_authentication_request(signed)
+        try:
+            self._authenticate_request(signable, signed, public_keys)
+        except AUTHENTICATION_ERRORS as exc:
+            return self._authentication_failure(signable, exc)
+        return True, 200, ""
+
+    # verifies the v1 signature first when the v2 signatures of the requesting app keep failing, see
+    # ProtocolCache. Not when only v2 is allowed: every v2 signature is verified then.
+    def _authenticate_request(self, signable, signed, public_keys=None):
+        if self.PROTOCOL_CACHE is None or Config.V2_ONLY_AUTHENTICATE or signed.protocol_version() != 2:
+            return super()._authenticate_request(signable, signed, public_keys)
+
+        app_uuid = signed.app_uuid
+        if (
+            signed.x_mws_authentication
+            and self.PROTOCOL_CACHE.v2_keeps_failing(app_uuid)
+            and self._authenticated_with_v1(signable, signed, public_keys)
+        ):
+            return True
+
+        super()._authenticate_request(signable, signed, public_keys)
+        if signed.token == MWSV2_TOKEN:
+            self.PROTOCOL_CACHE.record_v2_success(app_uuid)
+        elif signed.app_uuid == app_uuid:
+            # the v1 signature must be from the same app, so that no other app can have its v2 signatures skipped
+            self.PROTOCOL_CACHE.record_v2_failure(app_uuid)
+        return True
+
+    # authenticates the request with its v1 signature, restoring the v2 one when it fails. Returns whether
+    # it succeeded.
+    def _authenticated_with_v1(self, signable, signed, public_keys=None):
+        app_uuid = signed.app_uuid
+        signed.fall_back_to_mws_signature_info()
+        try:
+            if signed.app_uuid != app_uuid:
+                raise InauthenticError("The v1 signature is from another app")
+
+            self._authenticate_v1(signable, signed, public_keys)
+        except InauthenticError:
+            signed.reset_signature_info()
+            return False
+
+        self.PROTOCOL_CACHE.record_v1_first()
+        return True
+
+    def _signature_valid_v1(self, signable, signed, public_keys=None):
+        expected = signable.string_to_sign_v1({"time": signed.x_mws_time, "app_uuid": signed.app_uuid})
+        self._verify_signature(signable, signed, 1, expected, signed.x_mws_time, public_keys)
+
+    def _signature_valid_v2(self, signable, signed, public_keys=None):
+        expected = signable.string_to_sign_v2({"time": signed.mcc_time, "app_uuid": signed.app_uuid})
+        self._verify_signature(signable, signed, 2, expected, signed.mcc_time, public_keys)
+
+    def _verify_signature(self, signable, signed, protocol_version, expected, request_time, public_keys):
+        cache_key = None
+        if self.SIGNATURE_CACHE is not None:
+            cache_key = SignatureCache.key(protocol_version, signed.app_uuid, signed.signature, request_time, expected)
+            if cache_key in self.SIGNATURE_CACHE:
+                return
+
+        rsa_verifier = self._rsa_verifier(signed.app_uuid, public_keys)
+        verify = rsa_verifier.verify_v2 if protocol_version == 2 else rsa_verifier.verify_v1
+        if not verify(expected, signed.signature):
+            msg = "Signature verification failed for {}.".format(signable.name)
+            raise InauthenticError(msg)
+
+        if cache_key:
+            self.SIGNATURE_CACHE.add(cache_key)
+
+    def _rsa_verifier(self, app_uuid, public_keys):
+        # the key of the app whose signature is verified, which changes on the fallback to v1.
+        # a retrieval failure is raised here, so that other verification errors come first
+        public_key = public_keys.get(app_uuid) if public_keys else None
+        if isinstance(public_key, Exception):
+            raise public_key
+
+        return RSAVerifier.shared(get_backend(), public_key or KeyHolder.get_public_key(app_uuid))
+
+
+class AsyncAuthenticator(Authenticator):
+    """
+    Authenticator for asyncio applications, retrieves the public keys from the upstream MAuth Server without
+    blocking the event loop. Build one per app, see Authenticator.
+    """
+
+    async def authenticate(self, signable, signed, executor=None):
+        """
+        :param RequestSignable signable: the request
+        :param Signed signed: the MAuth headers of the request
+        :param concurrent.futures.Executor executor: verify the signature in this thread or process pool
+            instead of on the event loop
+        :return: (is_authentic, status, message)
+        :rtype: tuple
+        """
+        return await self._verify(signable, signed, {}, executor)
+
+    async def _verify(self, signable, signed, public_keys, executor):
+        self._log_authentication_request(signed)
+        try:
+            await self._authenticate_async(signable, signed, public_keys, executor)
+        except AUTHENTICATION_ERRORS as exc:
+            return self._authentication_failure(signable, exc)
+        return True, 200, ""
+
+    # authenticates the request with the public keys retrieved so far, so that the times, the tokens and the
+    # signature cache are checked before any retrieval. When a signature needs another public key, e.g. of the
+    # v1 app after the v2 signature failed, the key is retrieved and the authentication starts over.
+    async def _authenticate_async(self, signable, signed, public_keys, executor):
+        while True:
+            try:
+                if not executor:
+                    return self._authenticate_request(signable, signed, public_keys)
+
+                return await asyncio.get_running_loop().run_in_executor(
+                    executor, _authenticate_request, self, signable, signed, public_keys
+                )
+            except _PublicKeyNeeded as needed:
+                signed.reset_signature_info()
+                public_keys[needed.app_uuid] = await self._public_key(needed.app_uuid)
+
+    async def _public_key(self, app_uuid):
+        # the public key, or the error retrieving it, raised when the signature is verified
+        try:
+            return await AsyncKeyHolder.get_public_key(app_uuid)
+        except (InauthenticError, UnableToAuthenticateError) as exc:
+            return exc
+
+    def _rsa_verifier(self, app_uuid, public_keys):
+        if app_uuid not in public_keys:
+            raise _PublicKeyNeeded(app_uuid)
+
+        return super()._rsa_verifier(app_uuid, public_keys)
+
+
+class _PublicKeyNeeded(Exception):
+    # raised by AsyncAuthenticator to retrieve the public key of the app whose signature is verified
+    def __init__(self, app_uuid):
+        super().__init__(app_uuid)
+        self.app_uuid = app_uuid
+
+
+def _authenticate_request(authenticator, signable, signed, public_keys):
+    # module level so that process pools can pickle it
+    return authenticator._authenticate_request(signable, signed, public_keys)
+
+
+class AbstractAuthenticator(BaseAuthenticator):
+    """
+    Authenticator of a single request
+    """
+
+    @abstractmethod
+    def __init__(self, signable, signed, logger):
+        super().__init__(logger)
+        self.signable = signable
+        self.signed = signed
+
+    def is_authentic(self):
+        self._log_authentication_request(self.signed)
+        try:
+            self._authenticate()
+        except AUTHENTICATION_ERRORS as exc:
+            return self._authentication_failure(self.signable, exc)
+        return True, 200, ""
+
+    # raises InauthenticError unless the request is authentic, see BaseAuthenticator._authenticate_request
+    def _authenticate(self):
+        return self._authenticate_request(self.signable, self.signed)
+
+
+class LocalAuthenticator(AbstractAuthenticator, Authenticator):
     """
     Local Authentication object, authenticates the request locally, retrieving the necessary credentials from the
     upstream MAuth Server
@@ -165,24 +395,34 @@ class LocalAuthenticator(AbstractAuthenticator):
 
     def __init__(self, signable, signed, logger):
         super().__init__(signable, signed, logger)
+        # public keys (or the errors retrieving them) by app_uuid, retrieved before or while authenticating
+        self._public_keys = {}
 
-    def _signature_valid_v1(self):
-        if not self.rsa_verifier:
-            self.rsa_verifier = RSAVerifier(self.signed.app_uuid)
+    def _authenticate(self):
+        return self._authenticate_request(self.signable, self.signed, self._public_keys)
 
-        expected = self.signable.string_to_sign_v1({"time": self.signed.x_mws_time, "app_uuid": self.signed.app_uuid})
-        if not self.rsa_verifier.verify_v1(expected, self.signed.signature):
-            msg = "Signature verification failed for {}.".format(self.signable.name)
-            raise InauthenticError(msg)
 
-    def _signature_valid_v2(self):
-        if not self.rsa_verifier:
-            self.rsa_verifier = RSAVerifier(self.signed.app_uuid)
+class AsyncLocalAuthenticator(LocalAuthenticator, AsyncAuthenticator):
+    """
+    Local Authentication object for asyncio applications, retrieves the public keys from the upstream MAuth Server
+    without blocking the event loop, see AsyncAuthenticator
+    """
+
+    async def is_authentic(self, executor=None):
+        """
+        :param concurrent.futures.Executor executor: verify the signature in this thread or process pool
+            instead of on the event loop
+        """
+        return await self._verify(self.signable, self.signed, self._public_keys, executor)
 
-        expected = self.signable.string_to_sign_v2({"time": self.signed.mcc_time, "app_uuid": self.signed.app_uuid})
-        if not self.rsa_verifier.verify_v2(expected, self.signed.signature):
-            msg = "Signature verification failed for {}.".format(self.signable.name)
-            raise InauthenticError(msg)
+
+def _log_remote_fallback(authenticator, reason):
+    authenticator.logger.warning(
+        "Passing the authentication of the request from %s through to the MAuth service, "
+        "its public key is unavailable: %s",
+        authenticator.signed.app_uuid,
+        reason,
+    )
 
 
 class RemoteAuthenticator(AbstractAuthenticator):
@@ -191,48 +431,96 @@ class RemoteAuthenticator(AbstractAuthenticator):
     """
 
     AUTHENTICATION_TYPE = "REMOTE"
+    # signer and URL of the MAuth service, and pooled connections to it, shared by every instance
     _MAUTH = None
+    _SESSION = None
+    _SESSION_PID = None
+    _LOCK = threading.Lock()
+    # checking an authentication ticket has no side effect, posting it again is safe
+    RETRY_METHODS = Retry.DEFAULT_ALLOWED_METHODS | {"POST"}
 
     def __init__(self, signable, signed, logger):
-        if not self._MAUTH:
-            self._MAUTH = {
-                "auth": generate_mauth(),
-                "url": "{}/mauth/{}/authentication_tickets.json".format(Config.MAUTH_URL, Config.MAUTH_API_VERSION),
-            }
-
+        self._init_mauth()
         super().__init__(signable, signed, logger)
 
-    def _signature_valid_v1(self):
-        self._make_mauth_request(self._build_authentication_ticket(self.signed.x_mws_time))
-
-    def _signature_valid_v2(self):
-        self._make_mauth_request(
-            self._build_authentication_ticket(
-                self.signed.mcc_time,
-                {"query_string": self.signable.attributes_for_signing["query_string"], "token": self.signed.token},
-            )
+    @classmethod
+    def _init_mauth(cls):
+        if cls._MAUTH:
+            return
+
+        with cls._LOCK:
+            if not cls._MAUTH:
+                cls._MAUTH = {
+                    "auth": generate_mauth(),
+                    "url": "{}/mauth/{}/authentication_tickets.json".format(Config.MAUTH_URL, Config.MAUTH_API_VERSION),
+                }
+
+    def _signature_valid_v1(self, signable, signed, public_keys=None):
+        self._make_mauth_request(self._authentication_ticket_v1(signable, signed))
+
+    def _signature_valid_v2(self, signable, signed, public_keys=None):
+        self._make_mauth_request(self._authentication_ticket_v2(signable, signed))
+
+    def _authentication_ticket_v1(self, signable, signed):
+        return self._build_authentication_ticket(signable, signed, signed.x_mws_time)
+
+    def _authentication_ticket_v2(self, signable, signed):
+        return self._build_authentication_ticket(
+            signable,
+            signed,
+            signed.mcc_time,
+            {"query_string": signable.attributes_for_signing["query_string"], "token": signed.token},
         )
 
-    def _build_authentication_ticket(self, request_time, additional_attributes=None):
+    def _build_authentication_ticket(self, signable, signed, request_time, additional_attributes=None):
         if not additional_attributes:
             additional_attributes = {}
 
-        binary_body = make_bytes(self.signable.attributes_for_signing.get("body", ""))
+        binary_body = make_bytes(signable.attributes_for_signing.get("body", ""))
         return {
-            "verb": self.signable.attributes_for_signing["verb"],
-            "app_uuid": self.signed.app_uuid,
-            "client_signature": self.signed.signature,
-            "request_url": self.signable.attributes_for_signing["request_url"],
+            "verb": signable.attributes_for_signing["verb"],
+            "app_uuid": signed.app_uuid,
+            "client_signature": signed.signature,
+            "request_url": signable.attributes_for_signing["request_url"],
             "request_time": request_time,
             "b64encoded_body": base64.b64encode(binary_body).decode("utf-8"),
             **additional_attributes,
         }
 
     def _make_mauth_request(self, authentication_ticket):
-        response = requests.post(
-            self._MAUTH["url"], json=dict(authentication_ticket=authentication_ticket), auth=self._MAUTH["auth"]
-        )
+        with get_circuit_breaker(AUTHENTICATION_TICKETS).guard():
+            try:
+                response = self._request_session().post(
+                    self._MAUTH["url"],
+                    json=dict(authentication_ticket=authentication_ticket),
+                    auth=self._MAUTH["auth"],
+                    timeout=request_timeout(),
+                )
+            except requests.RequestException as exc:
+                raise self._unable_to_call_error(exc) from exc
+
+            return self._parse_mauth_response(response)
 
+    @staticmethod
+    def _unable_to_call_error(exc):
+        return UnableToAuthenticateError("Failed to call the mAuth service: {}".format(exc))
+
+    @classmethod
+    def _request_session(cls):
+        # the kept-alive connections of a session must not be shared with a forked worker. The lock is only
+        # taken to create the session, the session is assigned before its pid.
+        if cls._SESSION_PID == os.getpid():
+            return cls._SESSION
+
+        with cls._LOCK:
+            if cls._SESSION_PID != os.getpid():
+                cls._SESSION = create_session(cls.RETRY_METHODS)
+                cls._SESSION_PID = os.getpid()
+
+        return cls._SESSION
+
+    @staticmethod
+    def _parse_mauth_response(response):
         if 200 <= response.status_code <= 299:
             return True
 
@@ -243,3 +531,159 @@ class RemoteAuthenticator(AbstractAuthenticator):
         # when the old version of the mAuth service is out of service.
         error_class = InauthenticError if response.status_code in (412, 404) else UnableToAuthenticateError
         raise error_class("The mAuth service responded with {}: {}".format(response.status_code, response.text))
+
+
+class AsyncRemoteAuthenticator(RemoteAuthenticator):
+    """
+    Remote Authentication object for asyncio applications, passes through the authentication to the upstream
+    MAuth Server without blocking the event loop.
+
+    The authentication tickets are posted with httpx when it is installed, otherwise RemoteAuthenticator's
+    authentication runs in the default executor.
+    """
+
+    _CLIENTS = LoopClients(create_async_client, lambda client: client.aclose())
+
+    async def is_authentic(self, executor=None):
+        """
+        :param concurrent.futures.Executor executor: unused, the signature is verified by the MAuth service
+        """
+        if not httpx:
+            return await asyncio.get_running_loop().run_in_executor(None, super().is_authentic)
+
+        self._log_authentication_request(self.signed)
+        try:
+            await self._authenticate_async()
+        except AUTHENTICATION_ERRORS as exc:
+            return self._authentication_failure(self.signable, exc)
+        return True, 200, ""
+
+    # same as _authenticate, awaiting the MAuth service
+    async def _authenticate_async(self):
+        if self.signed.protocol_version() == 2:
+            try:
+                await self._authenticate_v2_async()
+            except InauthenticError:
+                if not self._fall_back_to_v1(self.signed):
+                    raise
+
+                await self._authenticate_v1_async()
+                self.logger.warning("Completed successful authentication attempt after fallback to v1")
+
+        elif self.signed.protocol_version() == 1:
+            self._check_v1_allowed()
+            await self._authenticate_v1_async()
+
+        else:
+            self._raise_mauth_not_present()
+
+        return True
+
+    async def _authenticate_v1_async(self):
+        self._time_valid_v1(self.signed)
+        self._token_valid_v1(self.signed)
+        await self._make_mauth_request_async(self._authentication_ticket_v1(self.signable, self.signed))
+
+    async def _authenticate_v2_async(self):
+        self._time_valid_v2(self.signed)
+        self._token_valid_v2(self.signed)
+        await self._make_mauth_request_async(self._authentication_ticket_v2(self.signable, self.signed))
+
+    async def _make_mauth_request_async(self, authentication_ticket):
+        body = json.dumps(dict(authentication_ticket=authentication_ticket))
+        headers = self._MAUTH["auth"].signer.signed_headers(
+            RequestSignable(method="POST", url=self._MAUTH["url"], body=body)
+        )
+        with get_circuit_breaker(AUTHENTICATION_TICKETS).guard():
+            try:
+                response = await self._request_client().post(
+                    self._MAUTH["url"], content=body, headers={**headers, "Content-Type": "application/json"}
+                )
+            except httpx.HTTPError as exc:
+                raise self._unable_to_call_error(exc) from exc
+
+            return self._parse_mauth_response(response)
+
+    @classmethod
+    def _request_client(cls):
+        return cls._CLIENTS.get()
+
+
+class HybridAuthenticator(LocalAuthenticator):
+    """
+    Hybrid Authentication object, authenticates the request locally when the public key of the requesting app
+    is cached or retrieved within MAUTH_HYBRID_KEY_TIMEOUT seconds, and passes the authentication through to the
+    upstream MAuth Server when the retrieval fails or takes longer. A slow retrieval carries on in the background,
+    so that the next requests from the app are authenticated locally.
+    """
+
+    AUTHENTICATION_TYPE = "HYBRID"
+
+    def is_authentic(self):
+        if self.signed.app_uuid:
+            try:
+                public_key = KeyHolder.get_public_key(self.signed.app_uuid, Config.HYBRID_KEY_TIMEOUT)
+            except InauthenticError as exc:
+                # the MAuth service does not know the app, it would not authenticate the request either
+                public_key = exc
+            except UnableToAuthenticateError as exc:
+                _log_remote_fallback(self, exc)
+                return RemoteAuthenticator(self.signable, self.signed, self.logger).is_authentic()
+            except FutureTimeoutError:
+                _log_remote_fallback(self, "not retrieved within {} seconds".format(Config.HYBRID_KEY_TIMEOUT))
+                return RemoteAuthenticator(self.signable, self.signed, self.logger).is_authentic()
+
+            self._public_keys[self.signed.app_uuid] = public_key
+
+        return super().is_authentic()
+
+
+class AsyncHybridAuthenticator(AsyncLocalAuthenticator):
+    """
+    Hybrid Authentication object for asyncio applications, see HybridAuthenticator
+    """
+
+    AUTHENTICATION_TYPE = "HYBRID"
+
+    async def is_authentic(self, executor=None):
+        """
+        :param concurrent.futures.Executor executor: verify the signature in this thread or process pool
+            instead of on the event loop
+        """
+        try:
+            return await super().is_authentic(executor)
+        except _RemoteFallback as exc:
+            _log_remote_fallback(self, exc)
+
+        return await AsyncRemoteAuthenticator(self.signable, self.signed, self.logger).is_authentic()
+
+    async def _public_key(self, app_uuid):
+        if app_uuid != self.signed.app_uuid:
+            return await super()._public_key(app_uuid)
+
+        # the public key of the requesting app. The retrieval is not cancelled when it takes too long, it carries
+        # on caching the key. A key of the keyring or the cache is not waited for with the timeout, which may be 0.
+        retrieval = asyncio.ensure_future(super()._public_key(app_uuid))
+        timeout = None if KeyHolder.has_local_public_key(app_uuid) else Config.HYBRID_KEY_TIMEOUT
+        done, _ = await asyncio.wait({retrieval}, timeout=timeout)
+        if not done:
+            raise _RemoteFallback("not retrieved within {} seconds".format(Config.HYBRID_KEY_TIMEOUT))
+
+        if isinstance(retrieval.result(), UnableToAuthenticateError):
+            raise _RemoteFallback(retrieval.result())
+
+        return retrieval.result()
+
+
+class _RemoteFallback(Exception):
+    # raised by AsyncHybridAuthenticator to pass the authentication through to the MAuth service
+    pass
+
+
+# authenticators by MAUTH_MODE
+AUTHENTICATORS = {"local": LocalAuthenticator, "remote": RemoteAuthenticator, "hybrid": HybridAuthenticator}
+ASYNC_AUTHENTICATORS = {
+    "local": AsyncLocalAuthenticator,
+    "remote": AsyncRemoteAuthenticator,
+    "hybrid": AsyncHybridAuthenticator,
+}
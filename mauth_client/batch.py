@@ -0,0 +1,50 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from .authenticator import Authenticator
+from .exceptions import InauthenticError, UnableToAuthenticateError
+from .key_holder import KeyHolder
+
+logger = logging.getLogger("mauth_batch")
+
+# public keys (or the errors retrieving them) by app_uuid, set in each worker process
+_PUBLIC_KEYS = {}
+_AUTHENTICATOR = Authenticator(logger)
+
+
+def authenticate_many(requests, max_workers=None, chunksize=16):
+    """
+    Authenticates signed requests locally across a pool of processes, e.g. to replay stored requests
+    or to consume a queue.
+
+    The public keys are retrieved once in the calling process and handed to every worker, so the
+    workers do not call the MAuth service.
+
+    :param requests: iterable of (signable, signed) pairs
+    :param int max_workers: number of worker processes, defaults to the number of processors
+    :param int chunksize: number of requests sent to a worker at a time
+    :return: list of (is_authentic, status, message), in the order of requests
+    """
+    requests = list(requests)
+    public_keys = _get_public_keys({app_uuid for _, signed in requests for app_uuid in signed.app_uuids()})
+    with ProcessPoolExecutor(max_workers, initializer=_set_public_keys, initargs=(public_keys,)) as executor:
+        return list(executor.map(_is_authentic, requests, chunksize=chunksize))
+
+
+def _get_public_keys(app_uuids):
+    public_keys = {}
+    for app_uuid in app_uuids:
+        try:
+            public_keys[app_uuid] = KeyHolder.get_public_key(app_uuid)
+        except (InauthenticError, UnableToAuthenticateError) as exc:
+            public_keys[app_uuid] = exc
+
+    return public_keys
+
+
+def _set_public_keys(public_keys):
+    _PUBLIC_KEYS.update(public_keys)
+
+
+def _is_authentic(request):
+    signable, signed = request
+    return _AUTHENTICATOR.authenticate(signable, signed, _PUBLIC_KEYS)
@@ -0,0 +1,169 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from .config import Config
+from .exceptions import InauthenticError, UnableToAuthenticateError
+
+logger = logging.getLogger("mauth_circuit_breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops calling the MAuth service after failure_threshold consecutive failures, so that a degraded service
+    does not hold up every request that needs it.
+
+    While the circuit is open, calls fail fast with UnableToAuthenticateError. Once the open period is over,
+    a single call probes the service: the circuit closes when it succeeds, and opens again for twice as long
+    when it fails, up to max_reset_timeout. Open periods are jittered so that the workers of a fleet do not
+    probe the service at the same moment.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=1.0, max_reset_timeout=60.0):
+        """
+        :param int failure_threshold: consecutive failures that open the circuit, 0 to never open it
+        :param float reset_timeout: seconds the circuit stays open the first time
+        :param float max_reset_timeout: maximum number of seconds the circuit stays open
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self._failures = 0
+            self._openings = 0
+            self._retry_at = 0
+            self._probing = False
+
+    @contextmanager
+    def guard(self):
+        """
+        Wraps a call to the MAuth service. The call counts as a failure when it raises anything but
+        InauthenticError, which the service only raises when it is responding.
+
+        :raises UnableToAuthenticateError: when the circuit is open
+        """
+        probe = self._before_call()
+        succeeded = None
+        try:
+            yield
+            succeeded = True
+        except InauthenticError:
+            succeeded = True
+            raise
+        except Exception:
+            succeeded = False
+            raise
+        finally:
+            self._after_call(succeeded, probe)
+
+    def allows_calls(self):
+        """
+        :return: whether a call would be let through, without making it
+        :rtype: bool
+        """
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() >= self._retry_at
+
+            return self.state == CLOSED or not self._probing
+
+    def _before_call(self):
+        # returns whether the call probes the service
+        if not self.failure_threshold:
+            return False
+
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+
+            now = time.monotonic()
+            if self.state == OPEN and now >= self._retry_at:
+                self.state = HALF_OPEN
+
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+
+            retry_in = max(self._retry_at - now, 0)
+
+        raise UnableToAuthenticateError(
+            "Not calling the MAuth service after {} consecutive failures, retrying in {:.1f} seconds".format(
+                self._failures, retry_in
+            )
+        )
+
+    def _after_call(self, succeeded, probe):
+        if not self.failure_threshold:
+            return
+
+        with self._lock:
+            if probe:
+                self._probing = False
+            if succeeded is None:
+                # interrupted, e.g. cancelled, which says nothing about the service
+                return
+
+            if not probe and self.state != CLOSED:
+                # the call was let through before the circuit opened, the probe decides when it closes
+                return
+
+            if succeeded:
+                if self.state != CLOSED:
+                    logger.info("Resumed calling the MAuth service")
+                self.state = CLOSED
+                self._failures = 0
+                self._openings = 0
+                return
+
+            self._failures += 1
+            if probe or self._failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        # must be called with the lock held
+        self._openings += 1
+        timeout = min(self.reset_timeout * 2 ** (self._openings - 1), self.max_reset_timeout)
+        timeout = random.uniform(timeout / 2, timeout)
+        self.state = OPEN
+        self._retry_at = time.monotonic() + timeout
+        logger.warning(
+            "Stopped calling the MAuth service for %.1f seconds after %d consecutive failures", timeout, self._failures
+        )
+
+
+# endpoints of the MAuth service, which fail independently: failing public key fetches must not stop the
+# authentication tickets that HybridAuthenticator falls back to
+SECURITY_TOKENS = "security_tokens"
+AUTHENTICATION_TICKETS = "authentication_tickets"
+
+_CIRCUIT_BREAKERS = {}
+_LOCK = threading.Lock()
+
+
+def get_circuit_breaker(endpoint=SECURITY_TOKENS):
+    """
+    Returns the circuit breaker shared by the calls to an endpoint of the MAuth service in the process,
+    configured with MAUTH_CIRCUIT_FAILURE_THRESHOLD, MAUTH_CIRCUIT_RESET_TIMEOUT and
+    MAUTH_CIRCUIT_MAX_RESET_TIMEOUT
+
+    :param str endpoint: SECURITY_TOKENS for the public key fetches, AUTHENTICATION_TICKETS for the remote
+        authentications
+    :rtype: CircuitBreaker
+    """
+    with _LOCK:
+        if endpoint not in _CIRCUIT_BREAKERS:
+            _CIRCUIT_BREAKERS[endpoint] = CircuitBreaker(
+                Config.CIRCUIT_FAILURE_THRESHOLD, Config.CIRCUIT_RESET_TIMEOUT, Config.CIRCUIT_MAX_RESET_TIMEOUT
+            )
+
+        return _CIRCUIT_BREAKERS[endpoint]
@@ -4,8 +4,39 @@ import os
 class Config:
     APP_UUID = os.environ.get("APP_UUID")
     MAUTH_URL = os.environ.get("MAUTH_URL")
+    MAUTH_URLS = os.environ.get("MAUTH_URLS")
     MAUTH_API_VERSION = os.environ.get("MAUTH_API_VERSION", "v1")
     MAUTH_MODE = os.environ.get("MAUTH_MODE", "local")
+    HYBRID_KEY_TIMEOUT = float(os.environ.get("MAUTH_HYBRID_KEY_TIMEOUT", 0.25))
     PRIVATE_KEY = os.environ.get("PRIVATE_KEY")
     V2_ONLY_AUTHENTICATE = str(os.environ.get("V2_ONLY_AUTHENTICATE")).lower() == "true"
     SIGN_VERSIONS = os.environ.get("MAUTH_SIGN_VERSIONS", "v1")
+    CRYPTO_BACKEND = os.environ.get("MAUTH_CRYPTO_BACKEND")
+    SIGNATURE_CACHE_SIZE = int(os.environ.get("MAUTH_SIGNATURE_CACHE_SIZE", 0))
+    PROTOCOL_CACHE_SIZE = int(os.environ.get("MAUTH_PROTOCOL_CACHE_SIZE", 0))
+    PROTOCOL_CACHE_TTL = int(os.environ.get("MAUTH_PROTOCOL_CACHE_TTL", 300))
+    ASGI_EXECUTOR = os.environ.get("MAUTH_ASGI_EXECUTOR")
+    ASGI_EXECUTOR_WORKERS = int(os.environ.get("MAUTH_ASGI_EXECUTOR_WORKERS", 0)) or None
+    HTTP_POOL_SIZE = int(os.environ.get("MAUTH_HTTP_POOL_SIZE", 10))
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get("MAUTH_HTTP_CONNECT_TIMEOUT", 3.05))
+    HTTP_READ_TIMEOUT = float(os.environ.get("MAUTH_HTTP_READ_TIMEOUT", 10))
+    HTTP_MAX_RETRIES = int(os.environ.get("MAUTH_HTTP_MAX_RETRIES", 3))
+    HTTP_RETRY_BACKOFF = float(os.environ.get("MAUTH_HTTP_RETRY_BACKOFF", 0.1))
+    KEY_REFRESH_AHEAD_SECONDS = int(os.environ.get("MAUTH_KEY_REFRESH_AHEAD_SECONDS", 30))
+    KEY_STALE_SECONDS = int(os.environ.get("MAUTH_KEY_STALE_SECONDS", 300))
+    KEY_NEGATIVE_CACHE_TTL = int(os.environ.get("MAUTH_KEY_NEGATIVE_CACHE_TTL", 30))
+    KEY_NEGATIVE_CACHE_SIZE = int(os.environ.get("MAUTH_KEY_NEGATIVE_CACHE_SIZE", 1024))
+    KEY_CACHE_SIZE = int(os.environ.get("MAUTH_KEY_CACHE_SIZE", 128))
+    KEY_CACHE_TTL = int(os.environ.get("MAUTH_KEY_CACHE_TTL", 300))
+    KEY_CACHE_PATH = os.environ.get("MAUTH_KEY_CACHE_PATH")
+    KEY_STORE = os.environ.get("MAUTH_KEY_STORE")
+    KEY_STORE_URL = os.environ.get("MAUTH_KEY_STORE_URL")
+    PREFETCH_APP_UUIDS = os.environ.get("MAUTH_PREFETCH_APP_UUIDS")
+    KEY_SNAPSHOT_PATH = os.environ.get("MAUTH_KEY_SNAPSHOT_PATH")
+    KEYRING_PATH = os.environ.get("MAUTH_KEYRING_PATH")
+    KEYRING_RELOAD_INTERVAL = float(os.environ.get("MAUTH_KEYRING_RELOAD_INTERVAL", 1))
+    CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("MAUTH_CIRCUIT_FAILURE_THRESHOLD", 5))
+    CIRCUIT_RESET_TIMEOUT = float(os.environ.get("MAUTH_CIRCUIT_RESET_TIMEOUT", 1))
+    CIRCUIT_MAX_RESET_TIMEOUT = float(os.environ.get("MAUTH_CIRCUIT_MAX_RESET_TIMEOUT", 60))
+    HEDGE_REQUESTS = str(os.environ.get("MAUTH_HEDGE_REQUESTS")).lower() == "true"
+    HEDGE_DELAY = float(os.environ.get("MAUTH_HEDGE_DELAY", 0.1))
@@ -0,0 +1,271 @@
+# The RSA primitives required by MAuth, behind an interface so that the pure-Python rsa library can be
+# swapped for the OpenSSL-backed cryptography package when it is installed.
+#
+# V1 signatures are the raw output of OpenSSL's private_encrypt(hash): PKCS#1 v1.5 type 1 padding around
+# the hex digest, without a DigestInfo. V2 signatures are regular PKCS#1 v1.5 signatures using SHA-512.
+
+from abc import ABC, abstractmethod
+from hashlib import sha512
+import rsa
+from .config import Config
+from .exceptions import UnableToAuthenticateError
+from .utils import make_bytes
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+    from cryptography.hazmat.primitives.asymmetric.utils import NoDigestInfo
+except ImportError:
+    serialization = None
+
+PUBLIC_KEY_HEADER = "BEGIN PUBLIC KEY"
+RSA_PUBLIC_KEY_HEADER = "BEGIN RSA PUBLIC KEY"
+
+
+class CryptoBackend(ABC):
+    """
+    RSA primitives used by RSASigner and RSAVerifier
+    """
+
+    NAME = None
+
+    @abstractmethod
+    def load_private_key(self, private_key_data):
+        """
+        :param str private_key_data: PEM-encoded PKCS#1 private key
+        """
+
+    @abstractmethod
+    def load_public_key(self, public_key_data):
+        """
+        :param str public_key_data: PEM-encoded PKCS#1 or SubjectPublicKeyInfo public key
+        """
+
+    @abstractmethod
+    def private_encrypt(self, private_key, message):
+        """
+        Emulates OpenSSL's private_encrypt with PKCS#1 padding
+
+        :param private_key: key returned by load_private_key
+        :param bytes message: message to pad and encrypt
+        :rtype: bytes
+        """
+
+    @abstractmethod
+    def public_decrypt(self, public_key, signature):
+        """
+        Emulates OpenSSL's public_decrypt with PKCS#1 padding, raises ValueError if the padding is invalid
+
+        :param public_key: key returned by load_public_key
+        :param bytes signature: raw signature
+        :return: unpadded message
+        :rtype: bytes
+        """
+
+    @abstractmethod
+    def sign_sha512(self, private_key, message):
+        """
+        :param private_key: key returned by load_private_key
+        :param bytes message: message to sign
+        :rtype: bytes
+        """
+
+    @abstractmethod
+    def verify_sha512(self, public_key, message, signature):
+        """
+        :param public_key: key returned by load_public_key
+        :param bytes message: signed message
+        :param bytes signature: raw signature
+        :rtype: bool
+        """
+
+    @staticmethod
+    def check_public_key_type(public_key_data):
+        if PUBLIC_KEY_HEADER not in public_key_data and RSA_PUBLIC_KEY_HEADER not in public_key_data:
+            # Unable to identify the key type
+            raise UnableToAuthenticateError("Unable to identify Public Key type from Signature.")
+
+
+class RSABackend(CryptoBackend):
+    """
+    Pure-Python backend built on the rsa library
+    """
+
+    NAME = "rsa"
+
+    def __init__(self, blinding=True):
+        """
+        :param bool blinding: blind the private key operation against timing side-channels
+        """
+        self.blinding = blinding
+
+    def load_private_key(self, private_key_data):
+        return rsa.PrivateKey.load_pkcs1(private_key_data, "PEM")
+
+    def load_public_key(self, public_key_data):
+        self.check_public_key_type(public_key_data)
+        if PUBLIC_KEY_HEADER in public_key_data:
+            # Load a PKCS#1 PEM-encoded public key
+            return rsa.PublicKey.load_pkcs1_openssl_pem(keyfile=public_key_data)
+
+        # Loads a PKCS#1.5 PEM-encoded public key
+        return rsa.PublicKey.load_pkcs1(keyfile=public_key_data, format="PEM")
+
+    def private_encrypt(self, private_key, message):
+        keylength = rsa.common.byte_size(private_key.n)
+        padded = self.pad_for_signing(message, keylength)
+        payload = rsa.transform.bytes2int(padded)
+        encrypted = self.private_operation(private_key, payload)
+        return rsa.transform.int2bytes(encrypted, keylength)
+
+    def public_decrypt(self, public_key, signature):
+        encrypted = rsa.transform.bytes2int(signature)
+        payload = rsa.core.decrypt_int(encrypted, public_key.e, public_key.n)
+        padded = rsa.transform.int2bytes(payload, rsa.common.byte_size(public_key.n))
+        return self.unpad_message(padded)
+
+    def sign_sha512(self, private_key, message):
+        # equivalent to rsa.sign(message, private_key, "SHA-512"), which does not use the CRT
+        return self.private_encrypt(private_key, rsa.pkcs1.HASH_ASN1["SHA-512"] + sha512(message).digest())
+
+    def verify_sha512(self, public_key, message, signature):
+        try:
+            rsa.verify(message, signature, public_key)
+            return True
+
+        except rsa.VerificationError:
+            return False
+
+    def private_operation(self, private_key, payload):
+        """
+        Computes payload ** d mod n using the Chinese Remainder Theorem, which works on the two half-size
+        primes of the key and is 3-4x faster than a full-size modular exponentiation.
+
+        :param rsa.PrivateKey private_key: private key
+        :param int payload: padded message as an integer
+        :rtype: int
+        """
+        if self.blinding:
+            payload, blindfac_inverse = private_key.blind(payload)
+
+        s1 = pow(payload, private_key.exp1, private_key.p)
+        s2 = pow(payload, private_key.exp2, private_key.q)
+        h = ((s1 - s2) * private_key.coef) % private_key.p
+        encrypted = s2 + private_key.q * h
+
+        if self.blinding:
+            encrypted = private_key.unblind(encrypted, blindfac_inverse)
+
+        return encrypted
+
+    @staticmethod
+    def pad_for_signing(message, target_length):
+        """Pulled from rsa pkcs1.py,
+
+        Pads the message for signing, returning the padded message.
+
+        The padding is always a repetition of FF bytes::
+
+            00 01 PADDING 00 MESSAGE
+
+        Sample code::
+
+            >>> block = RSABackend.pad_for_signing(b"hello", 16)
+            >>> len(block)
+            16
+            >>> block[0:2]
+            b'\\x00\\x01'
+            >>> block[-6:]
+            b'\\x00hello'
+            >>> block[2:-6]
+            b'\\xff\\xff\\xff\\xff\\xff\\xff\\xff\\xff'
+
+        :param message: message to pad in readiness for signing
+        :type message: bytes
+        :param target_length: target length for padded string
+        :type target_length: int
+
+        :rtype: bytes
+        :return: suitably padded string
+        """
+
+        max_msglength = target_length - 11
+        msglength = len(message)
+
+        if msglength > max_msglength:  # pragma: no cover
+            raise OverflowError(
+                "%i bytes needed for message, but there is only" " space for %i" % (msglength, max_msglength)
+            )
+
+        padding_length = target_length - msglength - 3
+
+        return b"".join([b"\x00\x01", padding_length * b"\xff", b"\x00", message])
+
+    @staticmethod
+    def unpad_message(padded):
+        """
+        Removes the padding from the string
+
+        :param padded: padded string
+        :rtype: bytes
+        """
+        return padded[padded.index(b"\x00", 2) + 1 :]
+
+
+class CryptographyBackend(CryptoBackend):
+    """
+    OpenSSL backend built on the cryptography package
+    """
+
+    NAME = "cryptography"
+
+    def load_private_key(self, private_key_data):
+        return serialization.load_pem_private_key(make_bytes(private_key_data), password=None)
+
+    def load_public_key(self, public_key_data):
+        self.check_public_key_type(public_key_data)
+        return serialization.load_pem_public_key(make_bytes(public_key_data))
+
+    def private_encrypt(self, private_key, message):
+        return private_key.sign(message, padding.PKCS1v15(), NoDigestInfo())
+
+    def public_decrypt(self, public_key, signature):
+        try:
+            return public_key.recover_data_from_signature(signature, padding.PKCS1v15(), None)
+        except InvalidSignature as exc:
+            raise ValueError("Signature padding verification failed") from exc
+
+    def sign_sha512(self, private_key, message):
+        return private_key.sign(message, padding.PKCS1v15(), hashes.SHA512())
+
+    def verify_sha512(self, public_key, message, signature):
+        try:
+            public_key.verify(signature, message, padding.PKCS1v15(), hashes.SHA512())
+            return True
+
+        except InvalidSignature:
+            return False
+
+
+# backends are stateless, so a single instance of each is shared
+BACKENDS = {backend.NAME: backend() for backend in (RSABackend, CryptographyBackend)}
+
+
+def get_backend(name=None):
+    """
+    Returns the crypto backend, preferring cryptography when it is installed
+
+    :param str name: "cryptography" or "rsa", defaults to Config.CRYPTO_BACKEND
+    """
+    name = name or Config.CRYPTO_BACKEND
+    if not name:
+        name = CryptographyBackend.NAME if serialization else RSABackend.NAME
+
+    if name not in BACKENDS:
+        raise ValueError("MAUTH_CRYPTO_BACKEND must be one of {}".format(", ".join(sorted(BACKENDS))))
+
+    if name == CryptographyBackend.NAME and not serialization:
+        raise ValueError("The cryptography backend requires the cryptography package (>= 47.0)")
+
+    return BACKENDS[name]
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import deque
+
+# weight of the latest response in the moving average latency of an endpoint
+LATENCY_WEIGHT = 0.3
+# number of recent latencies the hedging delay is computed from, and the minimum to compute it
+LATENCY_WINDOW = 100
+MIN_LATENCY_SAMPLES = 20
+
+
+class Endpoints:
+    """
+    Base URLs of the MAuth service, ranked by the moving average latency of their responses.
+
+    An endpoint that failed is ranked last for failure_cooldown seconds. Endpoints without a response yet
+    are ranked first, so that every endpoint gets measured.
+    """
+
+    def __init__(self, urls, failure_cooldown=30.0):
+        """
+        :param list urls: base URLs of the MAuth service
+        :param float failure_cooldown: seconds an endpoint is ranked last after a failure
+        """
+        self.urls = list(urls)
+        self.failure_cooldown = failure_cooldown
+        self._lock = threading.Lock()
+        self._latencies = dict.fromkeys(self.urls, 0.0)
+        self._failed_until = dict.fromkeys(self.urls, 0.0)
+        self._recent_latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def ranked(self):
+        """
+        :return: the URLs, best first
+        :rtype: list
+        """
+        now = time.monotonic()
+        with self._lock:
+            return sorted(self.urls, key=lambda url: (self._failed_until[url] > now, self._latencies[url]))
+
+    def record_success(self, url, latency):
+        with self._lock:
+            self._latencies[url] += LATENCY_WEIGHT * (latency - self._latencies[url])
+            self._failed_until[url] = 0.0
+            self._recent_latencies.append(latency)
+
+    def record_failure(self, url):
+        with self._lock:
+            self._failed_until[url] = time.monotonic() + self.failure_cooldown
+
+    def record_abandoned(self, url, elapsed):
+        """
+        Records a request abandoned after elapsed seconds because another endpoint answered first, which
+        is a lower bound of the endpoint's latency
+        """
+        with self._lock:
+            self._latencies[url] = max(self._latencies[url], elapsed)
+
+    def hedge_delay(self, default):
+        """
+        :param float default: delay until enough responses have been measured
+        :return: seconds after which a request is sent to the next endpoint as well, the 95th percentile
+            latency of the recent responses
+        :rtype: float
+        """
+        with self._lock:
+            if len(self._recent_latencies) < MIN_LATENCY_SAMPLES:
+                return default
+
+            latencies = sorted(self._recent_latencies)
+
+        return latencies[int(0.95 * (len(latencies) - 1))]
@@ -5,6 +5,12 @@ class InauthenticError(Exception):
     """
 
 
+class UnknownAppError(InauthenticError):
+    """
+    The MAuth service does not know the app that signed the object
+    """
+
+
 class UnableToAuthenticateError(Exception):
     """
     The response from the MAuth service encountered when attempting to retrieve mauth
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .config import Config
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# responses of a busy or restarting MAuth service, worth retrying
+RETRY_STATUSES = (502, 503, 504)
+
+
+def create_session(retry_methods=Retry.DEFAULT_ALLOWED_METHODS):
+    """
+    Creates a session for calls to the MAuth service, which keeps connections alive in a pool.
+    Sessions are safe to share across threads.
+
+    :param retry_methods: methods of the requests retried after a read error or one of the RETRY_STATUSES,
+        the idempotent methods by default. Connection errors are retried for every method.
+    :rtype: requests.Session
+    """
+    retry = Retry(
+        total=Config.HTTP_MAX_RETRIES,
+        backoff_factor=Config.HTTP_RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=retry_methods,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=Config.HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def request_timeout():
+    """
+    :return: (connect, read) timeouts in seconds
+    """
+    return Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT
+
+
+def create_async_client():
+    """
+    Creates an httpx client for calls to the MAuth service from asyncio applications, which keeps
+    connections alive in a pool. Connection errors are retried. Requires httpx.
+
+    :rtype: httpx.AsyncClient
+    """
+    connect_timeout, read_timeout = request_timeout()
+    return httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(
+            retries=Config.HTTP_MAX_RETRIES,
+            limits=httpx.Limits(max_keepalive_connections=Config.HTTP_POOL_SIZE),
+        ),
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+    )
+
+
+class LoopClients:
+    """
+    Asyncio clients by event loop, each created on its first use in the loop, since the connections of a client
+    belong to the loop they were opened in.
+
+    A client is closed in its loop when the loop shuts down its asynchronous generators, as asyncio.run does
+    before closing the loop. The client of a loop closed without that shutdown is dropped on the next get().
+    """
+
+    def __init__(self, create_client, close_client=None):
+        """
+        :param create_client: creates the client of a loop, called in the loop
+        :param close_client: coroutine function closing a client, called in its loop when the loop shuts down
+        """
+        self._create_client = create_client
+        self._close_client = close_client
+        self._lock = threading.Lock()
+        # (client, closer) by loop. The loops are not weakly referenced: the connections of a client hold its loop.
+        self._clients = {}
+
+    def get(self):
+        """
+        :return: the client of the running loop
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for closed_loop in [other_loop for other_loop in self._clients if other_loop.is_closed()]:
+                del self._clients[closed_loop]
+
+            if loop not in self._clients:
+                client = self._create_client()
+                self._clients[loop] = client, self._close_on_shutdown(loop, client)
+
+            return self._clients[loop][0]
+
+    def _close_on_shutdown(self, loop, client):
+        # an asynchronous generator started in the running loop, which the loop closes when it shuts down
+        async def closer():
+            try:
+                yield
+            finally:
+                with self._lock:
+                    if self._clients.get(loop, (None,))[0] is client:
+                        del self._clients[loop]
+                if self._close_client:
+                    await self._close_client(client)
+
+        generator = closer()
+        try:
+            generator.asend(None).send(None)
+        except StopIteration:
+            pass
+        return generator
@@ -1,57 +1,781 @@
+import asyncio
 import cachetools
+import json
+import logging
+import os
 import re
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import requests
-from requests.adapters import HTTPAdapter
+from mauth_client.circuit_breaker import SECURITY_TOKENS, get_circuit_breaker
 from mauth_client.config import Config
+from mauth_client.endpoints import Endpoints
+from mauth_client.http_session import LoopClients, create_async_client, create_session, request_timeout
 from mauth_client.lambda_helper import generate_mauth
-from mauth_client.exceptions import InauthenticError
+from mauth_client.key_store import get_key_store
+from mauth_client.keyring import StaticKeyring
+from mauth_client.exceptions import InauthenticError, UnableToAuthenticateError, UnknownAppError
+from mauth_client.signable import RequestSignable
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger("mauth_key_holder")
 
-CACHE_MAXSIZE = 128
-CACHE_TTL = 300
 MAX_AGE_REGEX = re.compile(r"max-age=(\d+)")
+# responses of the MAuth service to a security token request for an app it does not know. Other errors, such as
+# a rejected client signature or rate limiting, say nothing about the app.
+UNKNOWN_APP_STATUSES = (404, 410)
+
+# a cached public key, fresh until expires_at (in the cache's timer), with the validators of its response
+PublicKeyEntry = namedtuple(
+    "PublicKeyEntry", ["public_key", "expires_at", "etag", "last_modified"], defaults=(None, None)
+)
+
+
+class PublicKeyCache(cachetools.TLRUCache):
+    """
+    Public keys by app_uuid. Each entry is kept for MAUTH_KEY_STALE_SECONDS past its own expiry, and the
+    entries evicted to make room for new ones are counted.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize=maxsize, ttu=self._time_to_use)
+        self.evictions = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+    @staticmethod
+    def _time_to_use(app_uuid, entry, now):
+        return entry.expires_at + Config.KEY_STALE_SECONDS
 
 
 class KeyHolder:
+    """
+    Retrieves and caches the public keys of apps from the MAuth service, each for the max-age of its
+    response (MAUTH_KEY_CACHE_TTL when the response has none).
+
+    A key requested within MAUTH_KEY_REFRESH_AHEAD_SECONDS of its expiry, or up to MAUTH_KEY_STALE_SECONDS
+    after it, is returned right away and refreshed in the background. If the refresh fails because the
+    MAuth service is unavailable, the stale key keeps being served until the end of that window.
+
+    Calls to the MAuth service go through the shared circuit breaker, so that they fail fast with
+    UnableToAuthenticateError while the service keeps failing. Cached keys are served meanwhile.
+
+    Expired keys are revalidated with the ETag and Last-Modified of their response, and a 304 response
+    renews the cached key without downloading it again.
+
+    Keys are fetched from the fastest of the MAUTH_URLS, failing over to the others. With
+    MAUTH_HEDGE_REQUESTS, a fetch is also sent to the next endpoint when the first one has not answered
+    within the 95th percentile latency of the recent fetches.
+
+    Apps that the MAuth service does not know are remembered for MAUTH_KEY_NEGATIVE_CACHE_TTL seconds, so that
+    repeated requests from them are rejected without calling the service.
+
+    Fetched keys can also be stored in a KeyStore shared by the workers of a host or the nodes of a fleet
+    (MAUTH_KEY_STORE, or set_key_store), which is read before calling the MAuth service.
+
+    When MAUTH_KEYRING_PATH is set, the keys are read from that static keyring instead, and the MAuth service
+    is never called.
+    """
+
     _CACHE = None
+    # errors of the apps unknown to the MAuth service by app_uuid
+    _NEGATIVE_CACHE = None
+    _KEY_STORE = None
+    _KEY_STORE_CONFIGURED = False
+    _KEYRING = None
+    _STATS = Counter()
     _MAUTH = None
-    _MAX_RETRIES = 3
+    _ENDPOINTS = None
+    # pooled connections and hedging threads, with the process they belong to
+    _SESSION = None
+    _SESSION_PID = None
+    _HEDGE_EXECUTOR = None
+    _HEDGE_EXECUTOR_PID = None
+    # guards the class attributes, cachetools caches are not thread-safe
+    _LOCK = threading.RLock()
+    # futures of the fetches in progress by app_uuid
+    _IN_FLIGHT = {}
 
     @classmethod
-    def get_public_key(cls, app_uuid):
-        if not cls._CACHE or app_uuid not in cls._CACHE:
-            cls._set_public_key(app_uuid)
+    def get_public_key(cls, app_uuid, timeout=None):
+        """
+        :param float timeout: seconds to wait for a key that is not cached. When they run out,
+            concurrent.futures.TimeoutError is raised and the key is still fetched and cached in the background.
+        """
+        keyring = cls._keyring()
+        if keyring:
+            return keyring.get_public_key(app_uuid)
 
-        return cls._CACHE.get(app_uuid)
+        public_key = cls._get_cached_public_key(app_uuid)
+        if public_key:
+            return public_key
+
+        return cls._set_public_key(app_uuid, timeout)
 
     @classmethod
-    def _set_public_key(cls, app_uuid):
-        public_key, cache_control = cls._get_public_key_and_cache_control_from_mauth(app_uuid)
-        if not cls._CACHE:
-            cls._CACHE = cls._create_cache(cache_control)
+    def _keyring(cls):
+        if not Config.KEYRING_PATH:
+            return None
+
+        with cls._LOCK:
+            if not cls._KEYRING or cls._KEYRING.path != Config.KEYRING_PATH:
+                cls._KEYRING = StaticKeyring(Config.KEYRING_PATH, Config.KEYRING_RELOAD_INTERVAL)
 
-        cls._CACHE[app_uuid] = public_key
+            return cls._KEYRING
 
     @classmethod
-    def _create_cache(cls, cache_control):
+    def prefetch(cls, app_uuids=None, max_workers=None):
+        """
+        Fetches the public keys of the given apps concurrently, e.g. at startup so that the first request
+        of each app does not wait for its key. Failures are logged rather than raised.
+
+        :param list app_uuids: apps to fetch, defaults to MAUTH_PREFETCH_APP_UUIDS and the apps of the
+            snapshot in MAUTH_KEY_SNAPSHOT_PATH
+        :param int max_workers: maximum number of concurrent fetches, defaults to MAUTH_HTTP_POOL_SIZE
+        :return: the app_uuids whose key could not be fetched
+        :rtype: list
+        """
+        app_uuids = cls._prefetch_app_uuids(app_uuids)
+        if not app_uuids:
+            return []
+
+        with ThreadPoolExecutor(max_workers=max_workers or Config.HTTP_POOL_SIZE) as executor:
+            fetched = list(executor.map(cls._prefetch_public_key, app_uuids))
+
+        return [app_uuid for app_uuid, ok in zip(app_uuids, fetched) if not ok]
+
+    @classmethod
+    def save_snapshot(cls, path=None):
+        """
+        Saves the app_uuids of the cached keys, for the next process to prefetch them
+
+        :param str path: path of the snapshot, defaults to MAUTH_KEY_SNAPSHOT_PATH
+        """
+        path = path or Config.KEY_SNAPSHOT_PATH
+        if not path:
+            return
+
+        with cls._LOCK:
+            app_uuids = list(cls._CACHE) if cls._CACHE is not None else []
+
+        # the workers of a host may save the same snapshot at the same time
+        tmp_path = "{}.{}".format(path, os.getpid())
+        try:
+            with open(tmp_path, "w") as snapshot:
+                json.dump(app_uuids, snapshot)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning("Failed to save the key snapshot %s: %s", path, exc)
+
+    @classmethod
+    def _prefetch_app_uuids(cls, app_uuids=None):
+        if app_uuids is None:
+            app_uuids = [app_uuid.strip() for app_uuid in (Config.PREFETCH_APP_UUIDS or "").split(",")]
+            app_uuids += cls._load_snapshot()
+
+        # drop the blanks and duplicates, keeping the order
+        return list(dict.fromkeys(app_uuid for app_uuid in app_uuids if app_uuid))
+
+    @staticmethod
+    def _load_snapshot():
+        if not Config.KEY_SNAPSHOT_PATH or not os.path.exists(Config.KEY_SNAPSHOT_PATH):
+            return []
+
+        try:
+            with open(Config.KEY_SNAPSHOT_PATH) as snapshot:
+                return [str(app_uuid) for app_uuid in json.load(snapshot)]
+        except (OSError, ValueError, TypeError) as exc:
+            logger.warning("Failed to load the key snapshot %s: %s", Config.KEY_SNAPSHOT_PATH, exc)
+            return []
+
+    @classmethod
+    def _prefetch_public_key(cls, app_uuid):
+        try:
+            cls.get_public_key(app_uuid)
+            return True
+        except (InauthenticError, UnableToAuthenticateError) as exc:
+            logger.warning("Failed to prefetch the public key for %s: %s", app_uuid, exc)
+            return False
+
+    @classmethod
+    def stats(cls):
+        """
+        :return: counters of the public key caches
+        :rtype: dict
+        """
+        with cls._LOCK:
+            return {
+                **cls._STATS,
+                "cache_size": len(cls._CACHE) if cls._CACHE is not None else 0,
+                "cache_maxsize": Config.KEY_CACHE_SIZE,
+                "cache_evictions": cls._CACHE.evictions if cls._CACHE is not None else 0,
+                "negative_cache_size": len(cls._NEGATIVE_CACHE) if cls._NEGATIVE_CACHE is not None else 0,
+            }
+
+    @classmethod
+    def _set_public_key(cls, app_uuid, timeout=None):
+        # only one thread fetches a missing key, the other threads wait for its result
+        with cls._LOCK:
+            entry = cls._get_cache_entry(app_uuid)
+            if entry:
+                return entry.public_key
+
+            cls._raise_if_unknown_app(app_uuid)
+            fetch, leader = cls._start_fetch(app_uuid)
+
+        if leader and timeout is None:
+            return cls._fetch_public_key(app_uuid, fetch)
+
+        if leader:
+            # fetched in the background, so that the wait can be given up on
+            threading.Thread(target=cls._fetch_public_key_into, args=(app_uuid, fetch), daemon=True).start()
+
+        return fetch.result(timeout)
+
+    @classmethod
+    def _refresh_public_key(cls, app_uuid):
+        with cls._LOCK:
+            fetch, leader = cls._start_fetch(app_uuid)
+
+        if leader:
+            threading.Thread(target=cls._background_fetch_public_key, args=(app_uuid, fetch), daemon=True).start()
+
+    @classmethod
+    def _start_fetch(cls, app_uuid):
+        # must be called with the lock held, returns the fetch and whether the caller has to run it
+        fetch = cls._IN_FLIGHT.get(app_uuid)
+        if fetch:
+            return fetch, False
+
+        fetch = cls._IN_FLIGHT[app_uuid] = Future()
+        return fetch, True
+
+    @classmethod
+    def _fetch_public_key(cls, app_uuid, fetch):
+        try:
+            public_key = cls._get_stored_public_key(app_uuid) or cls._cache_public_key(
+                app_uuid, *cls._get_public_key_and_cache_control_from_mauth(app_uuid)
+            )
+            fetch.set_result(public_key)
+            return public_key
+        except UnknownAppError as exc:
+            cls._cache_unknown_app(app_uuid, exc)
+            fetch.set_exception(exc)
+            raise
+        except BaseException as exc:
+            fetch.set_exception(exc)
+            raise
+        finally:
+            with cls._LOCK:
+                del cls._IN_FLIGHT[app_uuid]
+
+    @classmethod
+    def _fetch_public_key_into(cls, app_uuid, fetch):
+        try:
+            cls._fetch_public_key(app_uuid, fetch)
+        except Exception:
+            # the error is set on the fetch for the threads waiting on it
+            pass
+
+    @classmethod
+    def _background_fetch_public_key(cls, app_uuid, fetch):
+        try:
+            cls._fetch_public_key(app_uuid, fetch)
+        except UnknownAppError as exc:
+            # the MAuth service no longer knows the app, stop serving its key
+            with cls._LOCK:
+                cls._CACHE.pop(app_uuid, None)
+            cls._write_key_store(app_uuid, "delete")
+            logger.warning("Evicted the public key for %s: %s", app_uuid, exc)
+        except Exception as exc:
+            logger.warning("Failed to refresh the public key for %s, serving the cached key: %s", app_uuid, exc)
+
+    @classmethod
+    def has_local_public_key(cls, app_uuid):
+        """
+        :return: whether the public key of the app is retrieved without calling the MAuth service, from the
+            keyring or the cache
+        :rtype: bool
+        """
+        if cls._keyring():
+            return True
+
+        with cls._LOCK:
+            return cls._get_cache_entry(app_uuid) is not None
+
+    @classmethod
+    def _get_cached_public_key(cls, app_uuid):
+        with cls._LOCK:
+            entry = cls._get_cache_entry(app_uuid)
+            if not entry:
+                return None
+
+            # the refresh would fail fast while the circuit is open
+            refresh = cls._CACHE.timer() >= entry.expires_at - Config.KEY_REFRESH_AHEAD_SECONDS
+            if refresh and get_circuit_breaker(SECURITY_TOKENS).allows_calls():
+                cls._refresh_public_key(app_uuid)
+
+            return entry.public_key
+
+    @classmethod
+    def _get_cache_entry(cls, app_uuid):
+        return cls._CACHE.get(app_uuid) if cls._CACHE is not None else None
+
+    @classmethod
+    def _raise_if_unknown_app(cls, app_uuid):
+        with cls._LOCK:
+            message = cls._NEGATIVE_CACHE.get(app_uuid) if cls._NEGATIVE_CACHE is not None else None
+            if message:
+                cls._STATS["negative_cache_hits"] += 1
+
+        if message:
+            raise UnknownAppError(message)
+
+    @classmethod
+    def _cache_unknown_app(cls, app_uuid, exc):
+        if not Config.KEY_NEGATIVE_CACHE_TTL:
+            return
+
+        with cls._LOCK:
+            if cls._NEGATIVE_CACHE is None:
+                cls._NEGATIVE_CACHE = cachetools.TTLCache(
+                    maxsize=Config.KEY_NEGATIVE_CACHE_SIZE, ttl=Config.KEY_NEGATIVE_CACHE_TTL
+                )
+
+            cls._NEGATIVE_CACHE[app_uuid] = str(exc)
+
+    @classmethod
+    def _cache_public_key(cls, app_uuid, public_key, cache_control, etag=None, last_modified=None):
+        ttl = cls._max_age(cache_control)
+        cls._cache_locally(app_uuid, public_key, ttl, etag, last_modified)
+        cls._write_key_store(app_uuid, "set", public_key, ttl)
+        return public_key
+
+    @classmethod
+    def _cache_locally(cls, app_uuid, public_key, ttl, etag=None, last_modified=None):
+        with cls._LOCK:
+            if cls._CACHE is None:
+                cls._CACHE = PublicKeyCache(Config.KEY_CACHE_SIZE)
+
+            cls._CACHE[app_uuid] = PublicKeyEntry(public_key, cls._CACHE.timer() + ttl, etag, last_modified)
+            if cls._NEGATIVE_CACHE is not None:
+                cls._NEGATIVE_CACHE.pop(app_uuid, None)
+
+        return public_key
+
+    @classmethod
+    def set_key_store(cls, key_store):
+        """
+        Stores the fetched keys in the given key store, in addition to the cache of the process
+
+        :param KeyStore key_store: the key store, or None to cache keys in the process only
+        """
+        with cls._LOCK:
+            cls._KEY_STORE = key_store
+            cls._KEY_STORE_CONFIGURED = True
+
+    @classmethod
+    def _key_store(cls):
+        with cls._LOCK:
+            if not cls._KEY_STORE_CONFIGURED:
+                try:
+                    key_store = get_key_store()
+                except ValueError as exc:
+                    # logged once: the keys are then cached in the process only
+                    logger.error("The key store is misconfigured, keys are cached in the process only: %s", exc)
+                    key_store = None
+                cls.set_key_store(key_store)
+
+            return cls._KEY_STORE
+
+    @classmethod
+    def _get_stored_public_key(cls, app_uuid):
+        key_store = cls._key_store()
+        if not key_store:
+            return None
+
+        try:
+            stored = key_store.get(app_uuid)
+        except Exception as exc:
+            cls._log_key_store_error(key_store, "read", app_uuid, exc)
+            return None
+
+        return cls._cache_stored_public_key(app_uuid, stored)
+
+    @classmethod
+    def _cache_stored_public_key(cls, app_uuid, stored):
+        # a key about to expire is refreshed from the MAuth service instead
+        if not stored or stored[1] <= Config.KEY_REFRESH_AHEAD_SECONDS:
+            return None
+
+        with cls._LOCK:
+            cls._STATS["key_store_hits"] += 1
+
+        return cls._cache_locally(app_uuid, *stored)
+
+    @classmethod
+    def _write_key_store(cls, app_uuid, method, *args):
+        key_store = cls._key_store()
+        if not key_store:
+            return
+
+        try:
+            getattr(key_store, method)(app_uuid, *args)
+        except Exception as exc:
+            cls._log_key_store_error(key_store, "write", app_uuid, exc)
+
+    @staticmethod
+    def _log_key_store_error(key_store, action, app_uuid, exc):
+        # the key store only saves calls to the MAuth service, the service is used when it fails
+        logger.warning(
+            "Failed to %s the public key for %s in the %s key store: %s", action, app_uuid, key_store.NAME, exc
+        )
+
+    @staticmethod
+    def _max_age(cache_control):
         max_age_match = MAX_AGE_REGEX.match(cache_control or "")
-        ttl = int(max_age_match.group(1)) if max_age_match else CACHE_TTL
-        return cachetools.TTLCache(maxsize=CACHE_MAXSIZE, ttl=ttl)
+        return int(max_age_match.group(1)) if max_age_match else Config.KEY_CACHE_TTL
 
     @classmethod
     def _get_public_key_and_cache_control_from_mauth(cls, app_uuid):
-        if not cls._MAUTH:
-            cls._MAUTH = {"auth": generate_mauth(), "url": Config.MAUTH_URL, "api_version": Config.MAUTH_API_VERSION}
+        endpoints = cls._endpoints()
+        with get_circuit_breaker(SECURITY_TOKENS).guard():
+            if Config.HEDGE_REQUESTS and len(endpoints.urls) > 1:
+                return cls._hedged_fetch(app_uuid, endpoints)
+
+            error = None
+            for base_url in endpoints.ranked():
+                try:
+                    return cls._fetch_from(app_uuid, endpoints, base_url)
+                except UnableToAuthenticateError as exc:
+                    error = exc
+
+            raise error
+
+    @classmethod
+    def _hedged_fetch(cls, app_uuid, endpoints):
+        # the next endpoint is called when the pending calls are slower than the delay or fail, the first
+        # answer wins and the slower calls are left to finish in the background
+        delay = endpoints.hedge_delay(Config.HEDGE_DELAY)
+        remaining = endpoints.ranked()
+        pending = set()
+        error = None
+        while True:
+            if remaining:
+                pending.add(cls._hedge_executor().submit(cls._fetch_from, app_uuid, endpoints, remaining.pop(0)))
+            if not pending:
+                raise error
+
+            done, pending = wait(pending, timeout=delay if remaining else None, return_when=FIRST_COMPLETED)
+            for fetch in done:
+                try:
+                    return fetch.result()
+                except UnableToAuthenticateError as exc:
+                    error = exc
+
+    @classmethod
+    def _fetch_from(cls, app_uuid, endpoints, base_url):
+        entry = cls._cached_entry(app_uuid)
+        started = time.monotonic()
+        try:
+            response = cls._request_session().get(
+                cls._security_token_url(app_uuid, base_url),
+                auth=cls._MAUTH["auth"],
+                headers=cls._conditional_headers(entry),
+                timeout=request_timeout(),
+            )
+        except requests.RequestException as exc:
+            endpoints.record_failure(base_url)
+            raise cls._unable_to_fetch_error(app_uuid, base_url, exc) from exc
+
+        cls._record_response(endpoints, base_url, response.status_code, started)
+        return cls._parse_security_token_response(app_uuid, base_url, response, entry)
+
+    @classmethod
+    def _cached_entry(cls, app_uuid):
+        with cls._LOCK:
+            return cls._get_cache_entry(app_uuid)
+
+    @staticmethod
+    def _conditional_headers(entry):
+        headers = {}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    @staticmethod
+    def _record_response(endpoints, base_url, status_code, started):
+        if status_code >= 500:
+            endpoints.record_failure(base_url)
+        else:
+            endpoints.record_success(base_url, time.monotonic() - started)
+
+    @classmethod
+    def _mauth(cls):
+        with cls._LOCK:
+            if not cls._MAUTH:
+                cls._MAUTH = {
+                    "auth": generate_mauth(),
+                    "url": Config.MAUTH_URL,
+                    "urls": [url.strip() for url in (Config.MAUTH_URLS or "").split(",") if url.strip()],
+                    "api_version": Config.MAUTH_API_VERSION,
+                }
+
+            return cls._MAUTH
+
+    @classmethod
+    def _endpoints(cls):
+        mauth = cls._mauth()
+        urls = mauth.get("urls") or [mauth["url"]]
+        with cls._LOCK:
+            if not cls._ENDPOINTS or cls._ENDPOINTS.urls != urls:
+                cls._ENDPOINTS = Endpoints(urls)
+
+            return cls._ENDPOINTS
+
+    @classmethod
+    def _security_token_url(cls, app_uuid, base_url):
+        return "{}/mauth/{}/security_tokens/{}.json".format(base_url, cls._mauth()["api_version"], app_uuid)
+
+    @classmethod
+    def _parse_security_token_response(cls, app_uuid, base_url, response, entry=None):
+        # returns the public key, the Cache-Control header and the validators of the response
+        cache_control, etag, last_modified = (
+            response.headers.get(header) for header in ("Cache-Control", "ETag", "Last-Modified")
+        )
+        if response.status_code == 304 and entry:
+            # the cached key is still current, only its expiry is renewed
+            with cls._LOCK:
+                cls._STATS["revalidations"] += 1
+            return entry.public_key, cache_control, etag or entry.etag, last_modified or entry.last_modified
 
-        url = "{}/mauth/{}/security_tokens/{}.json".format(cls._MAUTH["url"], cls._MAUTH["api_version"], app_uuid)
-        response = cls._request_session().get(url, auth=cls._MAUTH["auth"])
         if response.status_code == 200:
-            return response.json().get("security_token").get("public_key_str"), response.headers.get("Cache-Control")
+            return response.json().get("security_token").get("public_key_str"), cache_control, etag, last_modified
 
-        raise InauthenticError("Failed to fetch the public key for {} from {}".format(app_uuid, cls._MAUTH["url"]))
+        # cached keys are only dropped for unknown apps, and kept on the other errors
+        error_class = UnknownAppError if response.status_code in UNKNOWN_APP_STATUSES else UnableToAuthenticateError
+        raise error_class("Failed to fetch the public key for {} from {}".format(app_uuid, base_url))
+
+    @staticmethod
+    def _unable_to_fetch_error(app_uuid, base_url, exc):
+        return UnableToAuthenticateError(
+            "Failed to fetch the public key for {} from {}: {}".format(app_uuid, base_url, exc)
+        )
+
+    @classmethod
+    def _hedge_executor(cls):
+        # the threads of an executor are not forked with the process, e.g. when gunicorn --preload forks the
+        # workers after the keys were prefetched
+        with cls._LOCK:
+            if not cls._HEDGE_EXECUTOR or cls._HEDGE_EXECUTOR_PID != os.getpid():
+                cls._HEDGE_EXECUTOR = ThreadPoolExecutor(Config.HTTP_POOL_SIZE, thread_name_prefix="mauth-hedge")
+                cls._HEDGE_EXECUTOR_PID = os.getpid()
+
+        return cls._HEDGE_EXECUTOR
 
     @classmethod
     def _request_session(cls):
-        session = requests.Session()
-        adapter = HTTPAdapter(max_retries=cls._MAX_RETRIES)
-        session.mount("https://", adapter)
-        return session
+        # the kept-alive connections of a session must not be shared with a forked worker
+        with cls._LOCK:
+            if not cls._SESSION or cls._SESSION_PID != os.getpid():
+                cls._SESSION = create_session()
+                cls._SESSION_PID = os.getpid()
+
+        return cls._SESSION
+
+
+class AsyncKeyHolder:
+    """
+    Retrieves public keys for asyncio applications without blocking the event loop. The keys are cached in
+    KeyHolder, and concurrent requests for a missing key share a single fetch.
+
+    Keys are fetched with httpx when it is installed, otherwise KeyHolder's fetch runs in the default executor.
+    """
+
+    # fetches by (event loop, app_uuid): a fetch belongs to the loop it runs in, which is the only one that can
+    # await it, so the requests of each loop share their own fetch
+    _IN_FLIGHT = {}
+    # pooled clients by event loop
+    _CLIENTS = LoopClients(create_async_client, lambda client: client.aclose())
+
+    @classmethod
+    async def get_public_key(cls, app_uuid):
+        keyring = KeyHolder._keyring()
+        if keyring:
+            return keyring.get_public_key(app_uuid)
+
+        public_key = KeyHolder._get_cached_public_key(app_uuid)
+        if public_key:
+            return public_key
+
+        KeyHolder._raise_if_unknown_app(app_uuid)
+        key = asyncio.get_running_loop(), app_uuid
+        fetch = cls._IN_FLIGHT.get(key)
+        if not fetch:
+            fetch = cls._IN_FLIGHT[key] = asyncio.ensure_future(cls._set_public_key(app_uuid))
+            fetch.add_done_callback(lambda _: cls._IN_FLIGHT.pop(key, None))
+
+        # a cancelled request must not cancel the fetch other requests are waiting on
+        return await asyncio.shield(fetch)
+
+    @classmethod
+    async def prefetch(cls, app_uuids=None, max_concurrency=None):
+        """
+        Fetches the public keys of the given apps concurrently, see KeyHolder.prefetch
+
+        :param list app_uuids: apps to fetch, defaults to MAUTH_PREFETCH_APP_UUIDS and the apps of the
+            snapshot in MAUTH_KEY_SNAPSHOT_PATH
+        :param int max_concurrency: maximum number of concurrent fetches, defaults to MAUTH_HTTP_POOL_SIZE
+        :return: the app_uuids whose key could not be fetched
+        :rtype: list
+        """
+        app_uuids = KeyHolder._prefetch_app_uuids(app_uuids)
+        semaphore = asyncio.Semaphore(max_concurrency or Config.HTTP_POOL_SIZE)
+
+        async def prefetch_public_key(app_uuid):
+            async with semaphore:
+                try:
+                    await cls.get_public_key(app_uuid)
+                    return True
+                except (InauthenticError, UnableToAuthenticateError) as exc:
+                    logger.warning("Failed to prefetch the public key for %s: %s", app_uuid, exc)
+                    return False
+
+        fetched = await asyncio.gather(*(prefetch_public_key(app_uuid) for app_uuid in app_uuids))
+        return [app_uuid for app_uuid, ok in zip(app_uuids, fetched) if not ok]
+
+    @classmethod
+    async def _set_public_key(cls, app_uuid):
+        if not httpx:
+            return await asyncio.get_running_loop().run_in_executor(None, KeyHolder._set_public_key, app_uuid)
+
+        public_key = await cls._get_stored_public_key(app_uuid)
+        if public_key:
+            return public_key
+
+        try:
+            public_key, cache_control, *validators = await cls._get_public_key_and_cache_control_from_mauth(app_uuid)
+        except UnknownAppError as exc:
+            KeyHolder._cache_unknown_app(app_uuid, exc)
+            raise
+
+        ttl = KeyHolder._max_age(cache_control)
+        KeyHolder._cache_locally(app_uuid, public_key, ttl, *validators)
+        await cls._set_stored_public_key(app_uuid, public_key, ttl)
+        return public_key
+
+    @classmethod
+    async def _get_stored_public_key(cls, app_uuid):
+        key_store = KeyHolder._key_store()
+        if not key_store:
+            return None
+
+        try:
+            stored = await key_store.aget(app_uuid)
+        except Exception as exc:
+            KeyHolder._log_key_store_error(key_store, "read", app_uuid, exc)
+            return None
+
+        return KeyHolder._cache_stored_public_key(app_uuid, stored)
+
+    @classmethod
+    async def _set_stored_public_key(cls, app_uuid, public_key, ttl):
+        key_store = KeyHolder._key_store()
+        if not key_store:
+            return
+
+        try:
+            await key_store.aset(app_uuid, public_key, ttl)
+        except Exception as exc:
+            KeyHolder._log_key_store_error(key_store, "write", app_uuid, exc)
+
+    @classmethod
+    async def _get_public_key_and_cache_control_from_mauth(cls, app_uuid):
+        endpoints = KeyHolder._endpoints()
+        client = cls._request_client()
+        with get_circuit_breaker(SECURITY_TOKENS).guard():
+            if Config.HEDGE_REQUESTS and len(endpoints.urls) > 1:
+                return await cls._hedged_fetch(client, app_uuid, endpoints)
+
+            error = None
+            for base_url in endpoints.ranked():
+                try:
+                    return await cls._fetch_from(client, app_uuid, endpoints, base_url)
+                except UnableToAuthenticateError as exc:
+                    error = exc
+
+            raise error
+
+    @classmethod
+    async def _hedged_fetch(cls, client, app_uuid, endpoints):
+        # see KeyHolder._hedged_fetch, the slower calls are cancelled here
+        delay = endpoints.hedge_delay(Config.HEDGE_DELAY)
+        remaining = endpoints.ranked()
+        pending = {}
+        error = None
+        try:
+            while True:
+                if remaining:
+                    base_url = remaining.pop(0)
+                    fetch = asyncio.ensure_future(cls._try_fetch_from(client, app_uuid, endpoints, base_url))
+                    pending[fetch] = base_url, time.monotonic()
+                if not pending:
+                    raise error
+
+                done, _ = await asyncio.wait(
+                    pending, timeout=delay if remaining else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                for fetch in done:
+                    del pending[fetch]
+                for fetch in done:
+                    result, exc = fetch.result()
+                    if isinstance(exc, UnableToAuthenticateError):
+                        error = exc
+                    elif exc:
+                        raise exc
+                    else:
+                        return result
+        finally:
+            for fetch, (base_url, started) in pending.items():
+                fetch.cancel()
+                endpoints.record_abandoned(base_url, time.monotonic() - started)
+
+    @classmethod
+    async def _try_fetch_from(cls, client, app_uuid, endpoints, base_url):
+        try:
+            return await cls._fetch_from(client, app_uuid, endpoints, base_url), None
+        except (InauthenticError, UnableToAuthenticateError) as exc:
+            return None, exc
+
+    @classmethod
+    async def _fetch_from(cls, client, app_uuid, endpoints, base_url):
+        url = KeyHolder._security_token_url(app_uuid, base_url)
+        entry = KeyHolder._cached_entry(app_uuid)
+        headers = {
+            **KeyHolder._MAUTH["auth"].signer.signed_headers(RequestSignable(method="GET", url=url, body="")),
+            **KeyHolder._conditional_headers(entry),
+        }
+        started = time.monotonic()
+        try:
+            response = await client.get(url, headers=headers)
+        except httpx.HTTPError as exc:
+            endpoints.record_failure(base_url)
+            raise KeyHolder._unable_to_fetch_error(app_uuid, base_url, exc) from exc
+
+        KeyHolder._record_response(endpoints, base_url, response.status_code, started)
+        return KeyHolder._parse_security_token_response(app_uuid, base_url, response, entry)
+
+    @classmethod
+    def _request_client(cls):
+        return cls._CLIENTS.get()
@@ -0,0 +1,290 @@
+# Storage tiers for public keys behind KeyHolder's in-process cache, so that fetched keys can be shared by
+# the workers of a host (FileKeyStore) or the nodes of a fleet (RedisKeyStore).
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+import cachetools
+from .config import Config
+from .http_session import LoopClients
+
+try:
+    import redis
+    import redis.asyncio
+except ImportError:
+    redis = None
+
+
+class KeyStore(ABC):
+    """
+    Public keys by app_uuid, each stored with a TTL.
+
+    The async variants call the synchronous methods by default, which suits stores without network I/O.
+    """
+
+    NAME = None
+
+    @abstractmethod
+    def get(self, app_uuid):
+        """
+        :param str app_uuid: app of the key
+        :return: (public_key, seconds until it expires), or None when the key is missing or expired
+        """
+
+    @abstractmethod
+    def set(self, app_uuid, public_key, ttl):
+        """
+        :param str app_uuid: app of the key
+        :param str public_key: the public key
+        :param float ttl: seconds until the key expires
+        """
+
+    @abstractmethod
+    def ttl(self, app_uuid):
+        """
+        :param str app_uuid: app of the key
+        :return: seconds until the key expires, or None when the key is missing or expired
+        """
+
+    @abstractmethod
+    def delete(self, app_uuid):
+        """
+        :param str app_uuid: app of the key
+        """
+
+    async def aget(self, app_uuid):
+        return self.get(app_uuid)
+
+    async def aset(self, app_uuid, public_key, ttl):
+        self.set(app_uuid, public_key, ttl)
+
+    async def attl(self, app_uuid):
+        return self.ttl(app_uuid)
+
+    async def adelete(self, app_uuid):
+        self.delete(app_uuid)
+
+
+class MemoryKeyStore(KeyStore):
+    """
+    Keys kept in the memory of the process
+    """
+
+    NAME = "memory"
+
+    def __init__(self, maxsize=None):
+        """
+        :param int maxsize: maximum number of keys, defaults to MAUTH_KEY_CACHE_SIZE
+        """
+        self._lock = threading.Lock()
+        self._cache = cachetools.TLRUCache(
+            maxsize=maxsize or Config.KEY_CACHE_SIZE, ttu=lambda _, item, __: item[1], timer=time.time
+        )
+
+    def get(self, app_uuid):
+        with self._lock:
+            item = self._cache.get(app_uuid)
+
+        return (item[0], item[1] - time.time()) if item else None
+
+    def set(self, app_uuid, public_key, ttl):
+        with self._lock:
+            self._cache[app_uuid] = (public_key, time.time() + ttl)
+
+    def ttl(self, app_uuid):
+        item = self.get(app_uuid)
+        return item[1] if item else None
+
+    def delete(self, app_uuid):
+        with self._lock:
+            self._cache.pop(app_uuid, None)
+
+
+class FileKeyStore(KeyStore):
+    """
+    Keys stored in a SQLite database, shared by the worker processes of a host.
+
+    Entries expire at a wall-clock time, so that every worker expires a key at the same moment. Rows are
+    kept for keep_seconds past their expiry before they are purged.
+    """
+
+    NAME = "file"
+
+    def __init__(self, path, keep_seconds=0, timeout=1.0):
+        """
+        :param str path: path of the database file, e.g. on /dev/shm
+        :param int keep_seconds: seconds to keep a row after its expiry
+        :param float timeout: seconds to wait for another process' write lock
+        """
+        self.path = path
+        self.keep_seconds = keep_seconds
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def get(self, app_uuid):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT public_key, expires_at FROM public_keys WHERE app_uuid = ?", (app_uuid,)
+            ).fetchone()
+
+        if not row:
+            return None
+
+        public_key, expires_at = row
+        ttl = expires_at - time.time()
+        return (public_key, ttl) if ttl > 0 else None
+
+    def set(self, app_uuid, public_key, ttl):
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO public_keys (app_uuid, public_key, expires_at) VALUES (?, ?, ?)",
+                    (app_uuid, public_key, now + ttl),
+                )
+                connection.execute("DELETE FROM public_keys WHERE expires_at < ?", (now - self.keep_seconds,))
+
+    def ttl(self, app_uuid):
+        item = self.get(app_uuid)
+        return item[1] if item else None
+
+    def delete(self, app_uuid):
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM public_keys WHERE app_uuid = ?", (app_uuid,))
+
+    def _connect(self):
+        # a connection must not be shared with a forked worker
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS public_keys "
+                    "(app_uuid TEXT PRIMARY KEY, public_key TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+            self._pid = os.getpid()
+
+        return self._connection
+
+    # SQLite waits up to the timeout for the write lock of another process, so it is not called on the event loop
+
+    async def aget(self, app_uuid):
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, app_uuid)
+
+    async def aset(self, app_uuid, public_key, ttl):
+        await asyncio.get_running_loop().run_in_executor(None, self.set, app_uuid, public_key, ttl)
+
+    async def attl(self, app_uuid):
+        return await asyncio.get_running_loop().run_in_executor(None, self.ttl, app_uuid)
+
+    async def adelete(self, app_uuid):
+        await asyncio.get_running_loop().run_in_executor(None, self.delete, app_uuid)
+
+
+class RedisKeyStore(KeyStore):
+    """
+    Keys stored in Redis, or any server speaking its protocol, shared by the nodes of a fleet.
+    Requires the redis package.
+    """
+
+    NAME = "redis"
+
+    def __init__(self, url, prefix="mauth:public_key:"):
+        """
+        :param str url: server URL, e.g. redis://cache.internal:6379/0
+        :param str prefix: prefix of the Redis keys
+        """
+        if not redis:
+            raise ValueError("The redis key store requires the redis package")
+
+        self.url = url
+        self.prefix = prefix
+        # RESP2 is spoken by every server compatible with Redis
+        self._client = redis.Redis.from_url(url, protocol=2)
+        self._async_clients = LoopClients(lambda: redis.asyncio.Redis.from_url(url, protocol=2), _close_async_client)
+
+    def get(self, app_uuid):
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.get(self._key(app_uuid)).pttl(self._key(app_uuid))
+        return self._parse_get(*pipeline.execute())
+
+    def set(self, app_uuid, public_key, ttl):
+        self._client.set(self._key(app_uuid), public_key, px=int(ttl * 1000))
+
+    def ttl(self, app_uuid):
+        return self._parse_ttl(self._client.pttl(self._key(app_uuid)))
+
+    def delete(self, app_uuid):
+        self._client.delete(self._key(app_uuid))
+
+    async def aget(self, app_uuid):
+        pipeline = self._get_async_client().pipeline(transaction=False)
+        pipeline.get(self._key(app_uuid)).pttl(self._key(app_uuid))
+        return self._parse_get(*await pipeline.execute())
+
+    async def aset(self, app_uuid, public_key, ttl):
+        await self._get_async_client().set(self._key(app_uuid), public_key, px=int(ttl * 1000))
+
+    async def attl(self, app_uuid):
+        return self._parse_ttl(await self._get_async_client().pttl(self._key(app_uuid)))
+
+    async def adelete(self, app_uuid):
+        await self._get_async_client().delete(self._key(app_uuid))
+
+    def _key(self, app_uuid):
+        return self.prefix + app_uuid
+
+    def _get_async_client(self):
+        return self._async_clients.get()
+
+    def _parse_get(self, public_key, pttl):
+        ttl = self._parse_ttl(pttl)
+        return (public_key.decode("utf-8"), ttl) if public_key is not None and ttl else None
+
+    @staticmethod
+    def _parse_ttl(pttl):
+        # PTTL is -2 for a missing key and -1 for a key without expiry, which KeyHolder never sets
+        return pttl / 1000 if pttl > 0 else None
+
+
+async def _close_async_client(client):
+    # Redis.close was renamed aclose in redis 5.0.1
+    await (client.aclose() if hasattr(client, "aclose") else client.close())
+
+
+KEY_STORES = {key_store.NAME: key_store for key_store in (MemoryKeyStore, FileKeyStore, RedisKeyStore)}
+
+
+def get_key_store(name=None):
+    """
+    Returns the configured key store, or None when keys are only cached in the process
+
+    :param str name: "memory", "file" or "redis", defaults to MAUTH_KEY_STORE, or "file" when only
+        MAUTH_KEY_CACHE_PATH is set
+    """
+    name = name or Config.KEY_STORE or (FileKeyStore.NAME if Config.KEY_CACHE_PATH else None)
+    if not name:
+        return None
+
+    if name not in KEY_STORES:
+        raise ValueError("MAUTH_KEY_STORE must be one of {}".format(", ".join(sorted(KEY_STORES))))
+
+    if name == FileKeyStore.NAME:
+        if not Config.KEY_CACHE_PATH:
+            raise ValueError("The file key store requires MAUTH_KEY_CACHE_PATH")
+        return FileKeyStore(Config.KEY_CACHE_PATH, keep_seconds=Config.KEY_STALE_SECONDS)
+
+    if name == RedisKeyStore.NAME:
+        if not Config.KEY_STORE_URL:
+            raise ValueError("The redis key store requires MAUTH_KEY_STORE_URL")
+        return RedisKeyStore(Config.KEY_STORE_URL)
+
+    return MemoryKeyStore()
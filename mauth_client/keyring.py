@@ -0,0 +1,89 @@
+import json
+import logging
+import os
+import threading
+import time
+from .exceptions import InauthenticError
+
+logger = logging.getLogger("mauth_keyring")
+
+PEM_EXTENSION = ".pem"
+
+
+class StaticKeyring:
+    """
+    Public keys loaded from files rather than the MAuth service, for batch jobs and environments without
+    access to it.
+
+    The path is either a directory of <app_uuid>.pem files, or a JSON file mapping app_uuids to PEM-encoded
+    keys. The files are reloaded when they change, which is checked at most every reload_interval seconds.
+    """
+
+    def __init__(self, path, reload_interval=1.0):
+        """
+        :param str path: directory of PEM files or JSON bundle
+        :param float reload_interval: minimum number of seconds between checks for changes
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._version = self._get_version()
+        self._keys = self._load()
+        self._next_check = time.monotonic() + reload_interval
+
+    def get_public_key(self, app_uuid):
+        self._reload_if_changed()
+        public_key = self._keys.get(app_uuid)
+        if not public_key:
+            raise InauthenticError("The public key for {} is not in the keyring {}".format(app_uuid, self.path))
+
+        return public_key
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+
+        with self._lock:
+            if now < self._next_check:
+                return
+
+            self._next_check = now + self.reload_interval
+            try:
+                version = self._get_version()
+                if version != self._version:
+                    self._keys = self._load()
+                    self._version = version
+            except (OSError, ValueError) as exc:
+                # keep the keys that were loaded, the files may be in the middle of an update
+                logger.warning("Failed to reload the keyring %s: %s", self.path, exc)
+
+    def _get_version(self):
+        if os.path.isdir(self.path):
+            return tuple(
+                sorted(
+                    (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                    for entry in os.scandir(self.path)
+                    if entry.name.endswith(PEM_EXTENSION)
+                )
+            )
+
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        if os.path.isdir(self.path):
+            keys = {}
+            for entry in os.scandir(self.path):
+                if entry.name.endswith(PEM_EXTENSION):
+                    with open(entry.path) as key_file:
+                        keys[entry.name[: -len(PEM_EXTENSION)]] = key_file.read()
+            return keys
+
+        with open(self.path) as bundle:
+            keys = json.load(bundle)
+
+        if not isinstance(keys, dict) or not all(isinstance(key, str) for key in keys.values()):
+            raise ValueError("The keyring {} must map app_uuids to public keys".format(self.path))
+
+        return keys
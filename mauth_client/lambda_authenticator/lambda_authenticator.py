@@ -1,19 +1,24 @@
 import logging
-from mauth_client.authenticator import LocalAuthenticator, RemoteAuthenticator
+from mauth_client.authenticator import AUTHENTICATORS, Authenticator, RemoteAuthenticator
 from mauth_client.config import Config
 from mauth_client.signable import RequestSignable
 from mauth_client.signed import Signed
 
+# shared by the invocations of a warm Lambda container
+_AUTHENTICATOR = Authenticator(logging.getLogger())
+
 
 class LambdaAuthenticator:
     def __init__(self, method, url, headers, body):
-        logger = logging.getLogger()
-        signable = RequestSignable(method=method, url=url, body=body)
-        authenticator = LocalAuthenticator if Config.MAUTH_MODE == "local" else RemoteAuthenticator
-        self._authenticator = authenticator(signable, Signed.from_headers(headers), logger)
+        self._signable = RequestSignable(method=method, url=url, body=body)
+        self._signed = Signed.from_headers(headers)
 
     def get_app_uuid(self):
-        return self._authenticator.signed.app_uuid
+        return self._signed.app_uuid
 
     def is_authentic(self):
-        return self._authenticator.is_authentic()
+        if Config.MAUTH_MODE == "local":
+            return _AUTHENTICATOR.authenticate(self._signable, self._signed)
+
+        authenticator = AUTHENTICATORS.get(Config.MAUTH_MODE, RemoteAuthenticator)
+        return authenticator(self._signable, self._signed, logging.getLogger()).is_authentic()
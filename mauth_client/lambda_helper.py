@@ -1,4 +1,5 @@
 from base64 import b64decode
+from functools import lru_cache
 from mauth_client.config import Config
 from mauth_client.requests_mauth import MAuth
 
@@ -13,11 +14,17 @@ def _get_private_key():
     private_key = Config.PRIVATE_KEY
     if RSA_PRIVATE_KEY not in private_key:
         try:
-            import boto3
-
-            kms_client = boto3.client("kms")
-            private_key = kms_client.decrypt(CiphertextBlob=b64decode(private_key))["Plaintext"].decode("ascii")
+            private_key = _decrypt_private_key(private_key)
         except ModuleNotFoundError:
             pass
 
     return private_key.replace("\\n", "\n").replace(" ", "\n").replace("\nRSA\nPRIVATE\nKEY", " RSA PRIVATE KEY")
+
+
+# KMS is called once per encrypted key in the process rather than for every MAuth instance
+@lru_cache(maxsize=8)
+def _decrypt_private_key(encrypted_private_key):
+    import boto3
+
+    kms_client = boto3.client("kms")
+    return kms_client.decrypt(CiphertextBlob=b64decode(encrypted_private_key))["Plaintext"].decode("ascii")
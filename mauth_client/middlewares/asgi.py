@@ -1,6 +1,7 @@
 import json
 import logging
 
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from asgiref.typing import (
     ASGI3Application,
     ASGIReceiveCallable,
@@ -10,13 +11,14 @@ from asgiref.typing import (
 )
 from typing import List, Tuple, Optional
 
-from mauth_client.authenticator import LocalAuthenticator
+from mauth_client.authenticator import ASYNC_AUTHENTICATORS, AsyncAuthenticator, AsyncRemoteAuthenticator
 from mauth_client.config import Config
 from mauth_client.consts import (
     ENV_APP_UUID,
     ENV_AUTHENTIC,
     ENV_PROTOCOL_VERSION,
 )
+from mauth_client.key_holder import AsyncKeyHolder, KeyHolder
 from mauth_client.signable import RequestSignable
 from mauth_client.signed import Signed
 from mauth_client.utils import decode
@@ -24,15 +26,25 @@ from mauth_client.utils import decode
 logger = logging.getLogger("mauth_asgi")
 
 
+EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+
 class MAuthASGIMiddleware:
-    def __init__(self, app: ASGI3Application, exempt: Optional[set] = None) -> None:
+    def __init__(
+        self, app: ASGI3Application, exempt: Optional[set] = None, executor: Optional[Executor] = None
+    ) -> None:
         self._validate_configs()
         self.app = app
         self.exempt = exempt.copy() if exempt else set()
+        self.executor = executor or self._create_executor()
+        self.authenticator = AsyncAuthenticator(logger)
 
     async def __call__(
         self, scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable
     ) -> None:
+        if scope["type"] == "lifespan":
+            return await self.app(scope, self._lifespan_receive(receive), send)
+
         if scope["type"] != "http":
             return await self.app(scope, receive, send)
 
@@ -52,8 +64,7 @@ class MAuthASGIMiddleware:
             body=body,
         )
         signed = Signed.from_headers(headers)
-        authenticator = LocalAuthenticator(signable, signed, logger)
-        is_authentic, status, message = authenticator.is_authentic()
+        is_authentic, status, message = await self._authenticate(signable, signed)
 
         if is_authentic:
             # asgi spec calls for passing a copy of the scope rather than mutating it
@@ -66,7 +77,17 @@ class MAuthASGIMiddleware:
         else:
             await self._send_response(send, status, message)
 
+    async def _authenticate(self, signable: RequestSignable, signed: Signed) -> Tuple[bool, int, str]:
+        if Config.MAUTH_MODE == "local":
+            return await self.authenticator.authenticate(signable, signed, self.executor)
+
+        authenticator_class = ASYNC_AUTHENTICATORS.get(Config.MAUTH_MODE, AsyncRemoteAuthenticator)
+        return await authenticator_class(signable, signed, logger).is_authentic(self.executor)
+
     def _validate_configs(self) -> None:
+        # Public keys are read from the keyring, the MAuth service is not called
+        if Config.KEYRING_PATH and Config.MAUTH_MODE == "local":
+            return
         # Validate the client settings (APP_UUID, PRIVATE_KEY)
         if not all([Config.APP_UUID, Config.PRIVATE_KEY]):
             raise TypeError("MAuthASGIMiddleware requires APP_UUID and PRIVATE_KEY")
@@ -74,6 +95,30 @@ class MAuthASGIMiddleware:
         if not all([Config.MAUTH_URL, Config.MAUTH_API_VERSION]):
             raise TypeError("MAuthASGIMiddleware requires MAUTH_URL and MAUTH_API_VERSION")
 
+    def _create_executor(self) -> Optional[Executor]:
+        # Signature verification is CPU bound, running it in an executor keeps it off the event loop
+        if not Config.ASGI_EXECUTOR:
+            return None
+
+        if Config.ASGI_EXECUTOR not in EXECUTORS:
+            raise TypeError("MAUTH_ASGI_EXECUTOR must be one of {}".format(", ".join(EXECUTORS)))
+
+        return EXECUTORS[Config.ASGI_EXECUTOR](max_workers=Config.ASGI_EXECUTOR_WORKERS)
+
+    def _lifespan_receive(self, original_receive: ASGIReceiveCallable) -> ASGIReceiveCallable:
+        """
+        Create a receive function that warms up the public key cache before the app
+        handles the startup event, and saves the snapshot of the cached apps on shutdown.
+        """
+        async def _receive() -> ASGIReceiveEvent:
+            event = await original_receive()
+            if event["type"] == "lifespan.startup":
+                await AsyncKeyHolder.prefetch()
+            elif event["type"] == "lifespan.shutdown":
+                KeyHolder.save_snapshot()
+            return event
+        return _receive
+
     async def _get_body(
         self, receive: ASGIReceiveCallable
     ) -> Tuple[List[ASGIReceiveEvent], bytes]:
@@ -1,17 +1,18 @@
+import atexit
 import io
 import json
 import logging
 
 from urllib.parse import quote
 
-from mauth_client.authenticator import LocalAuthenticator
+from mauth_client.authenticator import AUTHENTICATORS, Authenticator, RemoteAuthenticator
 from mauth_client.config import Config
 from mauth_client.consts import (
     ENV_APP_UUID,
     ENV_AUTHENTIC,
     ENV_PROTOCOL_VERSION,
 )
-
+from mauth_client.key_holder import KeyHolder
 from mauth_client.signable import RequestSignable
 from mauth_client.signed import Signed
 
@@ -23,6 +24,8 @@ class MAuthWSGIMiddleware:
         self._validate_configs()
         self.app = app
         self.exempt = exempt.copy() if exempt else set()
+        self.authenticator = Authenticator(logger)
+        self._warm_up()
 
     def __call__(self, environ, start_response):
         path = environ.get("PATH_INFO", "")
@@ -36,8 +39,7 @@ class MAuthWSGIMiddleware:
             body=self._read_body(environ),
         )
         signed = Signed.from_headers(self._extract_headers(environ))
-        authenticator = LocalAuthenticator(signable, signed, logger)
-        is_authentic, code, message = authenticator.is_authentic()
+        is_authentic, code, message = self._authenticate(signable, signed)
 
         if is_authentic:
             environ[ENV_APP_UUID] = signed.app_uuid
@@ -47,7 +49,17 @@ class MAuthWSGIMiddleware:
 
         return self._send_response(code, message, start_response)
 
+    def _authenticate(self, signable, signed):
+        if Config.MAUTH_MODE == "local":
+            return self.authenticator.authenticate(signable, signed)
+
+        authenticator_class = AUTHENTICATORS.get(Config.MAUTH_MODE, RemoteAuthenticator)
+        return authenticator_class(signable, signed, logger).is_authentic()
+
     def _validate_configs(self):
+        # Public keys are read from the keyring, the MAuth service is not called
+        if Config.KEYRING_PATH and Config.MAUTH_MODE == "local":
+            return
         # Validate the client settings (APP_UUID, PRIVATE_KEY)
         if not all([Config.APP_UUID, Config.PRIVATE_KEY]):
             raise TypeError("MAuthWSGIMiddleware requires APP_UUID and PRIVATE_KEY")
@@ -55,6 +67,13 @@ class MAuthWSGIMiddleware:
         if not all([Config.MAUTH_URL, Config.MAUTH_API_VERSION]):
             raise TypeError("MAuthWSGIMiddleware requires MAUTH_URL and MAUTH_API_VERSION")
 
+    def _warm_up(self):
+        # WSGI has no startup event, the keys are prefetched as the app is loaded
+        KeyHolder.prefetch()
+        if Config.KEY_SNAPSHOT_PATH:
+            atexit.unregister(KeyHolder.save_snapshot)
+            atexit.register(KeyHolder.save_snapshot)
+
     def _read_body(self, environ):
         try:
             size = int(environ.get("CONTENT_LENGTH", 0))
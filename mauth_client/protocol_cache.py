@@ -0,0 +1,64 @@
+import logging
+import threading
+import time
+import cachetools
+
+logger = logging.getLogger("mauth_protocol_cache")
+
+
+class ProtocolCache:
+    """
+    Bounded cache of the apps whose v2 signatures keep failing verification, typically legacy clients that
+    sign v2 incorrectly and v1 correctly.
+
+    Once the v2 signatures of an app failed threshold times in a row, the doomed v2 verification of its
+    requests is skipped. An app is forgotten when its v2 signature succeeds, or ttl seconds after its last
+    failed v2 signature.
+    """
+
+    def __init__(self, maxsize, ttl, threshold=3):
+        """
+        :param int maxsize: maximum number of apps to keep
+        :param int ttl: seconds an app is kept after its last failed v2 signature
+        :param int threshold: consecutive failed v2 signatures after which their verification is skipped
+        """
+        self.threshold = threshold
+        self.v1_first = 0
+        self._lock = threading.Lock()
+        self._failures = cachetools.TTLCache(maxsize=maxsize, ttl=ttl, timer=time.time)
+
+    def v2_keeps_failing(self, app_uuid):
+        """
+        :return: whether the last threshold v2 signatures of the app failed
+        :rtype: bool
+        """
+        with self._lock:
+            return self._failures.get(app_uuid, 0) >= self.threshold
+
+    def record_v2_failure(self, app_uuid):
+        with self._lock:
+            failures = self._failures[app_uuid] = self._failures.get(app_uuid, 0) + 1
+
+        if failures == self.threshold:
+            logger.warning("Skipping the v2 signatures of %s after %s consecutive failures", app_uuid, failures)
+
+    def record_v2_success(self, app_uuid):
+        with self._lock:
+            self._failures.pop(app_uuid, None)
+
+    def record_v1_first(self):
+        with self._lock:
+            self.v1_first += 1
+
+    def clear(self):
+        with self._lock:
+            self._failures.clear()
+            self.v1_first = 0
+
+    def stats(self):
+        """
+        :return: number of requests authenticated with v1 first, and of apps whose v2 signatures are tracked
+        :rtype: dict
+        """
+        with self._lock:
+            return {"v1_first": self.v1_first, "size": len(self._failures)}
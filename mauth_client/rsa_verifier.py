@@ -1,36 +1,54 @@
 import base64
-import rsa
-from .exceptions import UnableToAuthenticateError
+from functools import lru_cache
+from .config import Config
+from .crypto_backend import get_backend
 from .key_holder import KeyHolder
 from .utils import make_bytes, hexdigest
 
 
 class RSAVerifier:
     """
-    Wrapper of the rsa library for verifying
+    Wrapper of the crypto backend for verifying
     """
 
-    def __init__(self, app_uuid):
+    def __init__(self, app_uuid, backend=None, public_key_data=None):
         """
         :param app_uuid:
+        :param CryptoBackend backend: defaults to the backend returned by get_backend
+        :param str public_key_data: public key of the app, retrieved from KeyHolder when not given
         """
-        key_text = KeyHolder.get_public_key(app_uuid)
-        if "BEGIN PUBLIC KEY" in key_text:
-            # Load a PKCS#1 PEM-encoded public key
-            self.public_key = rsa.PublicKey.load_pkcs1_openssl_pem(keyfile=key_text)
+        self.backend = backend or get_backend()
+        public_key_data = public_key_data or KeyHolder.get_public_key(app_uuid)
+        self.public_key = self.load_public_key(self.backend, public_key_data)
 
-        elif "BEGIN RSA PUBLIC KEY" in key_text:
-            # Loads a PKCS#1.5 PEM-encoded public key
-            self.public_key = rsa.PublicKey.load_pkcs1(keyfile=key_text, format="PEM")
+    @staticmethod
+    @lru_cache(maxsize=Config.KEY_CACHE_SIZE)
+    def shared(backend, public_key_data):
+        """
+        Returns a verifier of the public key, memoized on the key text so that the requests signed with a key
+        share its verifier.
+
+        :param CryptoBackend backend: backend to verify with
+        :param str public_key_data: PEM-encoded public key
+        :rtype: RSAVerifier
+        """
+        return RSAVerifier(None, backend, public_key_data)
 
-        else:
-            # Unable to identify the key type
-            raise UnableToAuthenticateError("Unable to identify Public Key type from Signature.")
+    @staticmethod
+    @lru_cache(maxsize=Config.KEY_CACHE_SIZE)
+    def load_public_key(backend, public_key_data):
+        """
+        Parses the public key, memoized on the key text so that only a new or rotated key is parsed again.
+        KeyHolder remains the source of truth for which key is valid for an app.
+
+        :param CryptoBackend backend: backend to load the key with
+        :param str public_key_data: PEM-encoded public key
+        """
+        return backend.load_public_key(public_key_data)
 
     def verify_v1(self, expected, signature):
         try:
-            padded = self.public_decrypt(signature)
-            actual = self.unpad_message(padded)
+            actual = self.public_decrypt(signature)
 
             if hexdigest(expected) == actual.decode("utf-8"):
                 return True
@@ -41,12 +59,7 @@ class RSAVerifier:
             return False
 
     def verify_v2(self, expected, signature):
-        try:
-            rsa.verify(make_bytes(expected), base64.b64decode(signature), self.public_key)
-            return True
-
-        except rsa.VerificationError:
-            return False
+        return self.backend.verify_sha512(self.public_key, make_bytes(expected), base64.b64decode(signature))
 
     def public_decrypt(self, signature):
         """
@@ -54,22 +67,6 @@ class RSAVerifier:
 
         :param str signature: encrypted signature
         :return: signature hash
-        :rtype: str
-        """
-        # base64 decode
-        decoded = base64.b64decode(make_bytes(signature))
-        # transform the decoded signature to int
-        encrypted = rsa.transform.bytes2int(decoded)
-        payload = rsa.core.decrypt_int(encrypted, self.public_key.e, self.public_key.n)
-        padded = rsa.transform.int2bytes(payload, rsa.common.byte_size(self.public_key.n))
-        return padded
-
-    @staticmethod
-    def unpad_message(padded):
-        """
-        Removes the padding from the string
-
-        :param padded: padded string
-        :rtype: str
+        :rtype: bytes
         """
-        return padded[padded.index(b"\x00", 2) + 1 :]
+        return self.backend.public_decrypt(self.public_key, base64.b64decode(make_bytes(signature)))
@@ -0,0 +1,57 @@
+import threading
+import time
+import cachetools
+from .utils import hexdigest
+
+
+class SignatureCache:
+    """
+    Bounded LRU cache of successfully verified signatures.
+
+    An entry expires when the signature's timestamp leaves the allowed drift window, at which point the
+    request would fail time verification anyway.
+    """
+
+    def __init__(self, maxsize, allowed_drift_seconds):
+        """
+        :param int maxsize: maximum number of verified signatures to keep
+        :param int allowed_drift_seconds: how long after its timestamp a signature is accepted
+        """
+        self.allowed_drift_seconds = allowed_drift_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._cache = cachetools.TLRUCache(maxsize=maxsize, ttu=self._time_to_use, timer=time.time)
+
+    def __contains__(self, key):
+        with self._lock:
+            verified = self._cache.get(key, False)
+            if verified:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        return verified
+
+    def add(self, key):
+        with self._lock:
+            self._cache[key] = True
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+    @staticmethod
+    def key(protocol_version, app_uuid, signature, request_time, string_to_sign):
+        """
+        :param int protocol_version: protocol version the signature was verified with
+        :param str app_uuid: app that signed the request
+        :param str signature: the signature
+        :param str request_time: the signed time, seconds since epoch
+        :param bytes string_to_sign: the string the signature was verified against
+        """
+        return protocol_version, app_uuid, signature, request_time, hexdigest(string_to_sign)
+
+    def _time_to_use(self, key, value, now):
+        return float(key[3]) + self.allowed_drift_seconds
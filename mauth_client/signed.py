@@ -14,7 +14,12 @@ class Signed:
         self.x_mws_time = x_mws_time
         self.mcc_authentication = mcc_authentication
         self.mcc_time = mcc_time
+        self.reset_signature_info()
 
+    def reset_signature_info(self):
+        """
+        Restores the signature information of the highest protocol version present, e.g. after a fallback
+        """
         if self.mcc_authentication:
             self.build_signature_info(self.mcc_data())
         elif self.x_mws_authentication:
@@ -34,6 +39,17 @@ class Signed:
     def mcc_data(self):
         return MWSV2_AUTH_PATTERN.search(self.mcc_authentication)
 
+    def app_uuids(self):
+        """
+        :return: the apps of the signatures present, highest protocol version first
+        :rtype: list
+        """
+        match_data = (
+            self.mcc_data() if self.mcc_authentication else None,
+            self.x_mws_data() if self.x_mws_authentication else None,
+        )
+        return list(dict.fromkeys(data.group(2) for data in match_data if data))
+
     def protocol_version(self):
         if self.mcc_authentication:
             return 2
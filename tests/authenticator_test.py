@@ -1,21 +1,45 @@
 from datetime import datetime, timedelta
+import asyncio
+import json
 import unittest
 import copy
 import logging
-from unittest.mock import MagicMock
+import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from unittest.mock import AsyncMock, MagicMock, patch
 from io import StringIO
 import pytest
 import dateutil
 import requests_mock
-
-from mauth_client.authenticator import AbstractAuthenticator, LocalAuthenticator, RemoteAuthenticator
+import httpx
+from requests.exceptions import ConnectTimeout
+
+from mauth_client import authenticator
+from mauth_client.authenticator import (
+    AbstractAuthenticator,
+    AsyncAuthenticator,
+    AsyncHybridAuthenticator,
+    AsyncLocalAuthenticator,
+    AsyncRemoteAuthenticator,
+    Authenticator,
+    HybridAuthenticator,
+    LocalAuthenticator,
+    RemoteAuthenticator,
+)
+from mauth_client.circuit_breaker import AUTHENTICATION_TICKETS, SECURITY_TOKENS, get_circuit_breaker
 from mauth_client.config import Config
+from mauth_client.consts import MWS_TOKEN
 from mauth_client.signable import RequestSignable
 from mauth_client.signed import Signed
-from mauth_client.key_holder import KeyHolder
+from mauth_client.signer import Signer
+from mauth_client.key_holder import AsyncKeyHolder, KeyHolder
+from mauth_client.requests_mauth import MAuth
+from mauth_client.protocol_cache import ProtocolCache
+from mauth_client.signature_cache import SignatureCache
 from mauth_client.exceptions import InauthenticError, UnableToAuthenticateError, MAuthNotPresent
 
 from tests.common import load_key
+from tests.mauth_server_helper import MAuthStandIn
 
 AUTHENTICATOR_APP_UUID = "2f746447-c212-483c-9eec-d9b0216f7613"
 APP_UUID = "f5af50b2-bf7d-4c29-81db-76d086d4808a"
@@ -43,19 +67,42 @@ MWSV2_SIGNATURE = (
 MWSV2_AUTHENTICATION = "MWSV2 {}:{};".format(APP_UUID, MWSV2_SIGNATURE)
 MWSV2_HEADERS = {"MCC-Time": EPOCH, "MCC-Authentication": MWSV2_AUTHENTICATION}
 
+# a legacy client signing v1 correctly and v2 incorrectly
+FAILING_V2_HEADERS = {**X_MWS_HEADERS, **MWSV2_HEADERS, "MCC-Authentication": "MWSV2 {}:c2lnbmF0dXJl;".format(APP_UUID)}
+
+OTHER_APP_UUID = "5ff4257e-9c16-11e0-b048-0026bbfffe5e"
+# a failing v2 signature of APP_UUID, and a v1 signature of OTHER_APP_UUID made with the private key of APP_UUID
+IMPERSONATING_HEADERS = {
+    **FAILING_V2_HEADERS,
+    **Signer(OTHER_APP_UUID, load_key("priv"), "v1").signed_headers_v1(
+        RequestSignable(method="POST", url=URL, body=BODY), {"time": EPOCH}
+    ),
+}
+
 MAUTH_AUTHENTICATION_URL = "https://mauth.com/mauth/v1/security_tokens/authentication_tickets.json"
 
 
+# the public key retrieval of AsyncKeyHolder, patched out by most tests
+GET_PUBLIC_KEY = AsyncKeyHolder.get_public_key
+
+
+def get_public_key_of_app(app_uuid, *args):
+    if app_uuid != APP_UUID:
+        raise InauthenticError("Failed to fetch the public key for {}".format(app_uuid))
+
+    return load_key("rsapub")
+
+
 class MockAuthenticator(AbstractAuthenticator):
     def __init__(self, headers, v2_only_authenticate=False, method="POST"):
         Config.V2_ONLY_AUTHENTICATE = v2_only_authenticate
         signable = RequestSignable(method=method, url=URL, body=BODY)
         super().__init__(signable, Signed.from_headers(headers), logging.getLogger())
 
-    def _signature_valid_v1(self):
+    def _signature_valid_v1(self, signable, signed, public_keys=None):
         return True
 
-    def _signature_valid_v2(self):
+    def _signature_valid_v2(self, signable, signed, public_keys=None):
         return True
 
 
@@ -369,11 +416,327 @@ class TestLocalAuthenticator(unittest.TestCase):
             self.authenticator._authenticate()
         self.assertEqual(str(exc.exception), "Signature verification failed for request.")
 
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_v1_fallback_uses_the_public_key_of_its_app(self):
+        KeyHolder.get_public_key.side_effect = get_public_key_of_app
+        self.authenticator.signed = Signed.from_headers(IMPERSONATING_HEADERS)
+        with self.assertRaises(InauthenticError) as exc:
+            self.authenticator._authenticate()
+        self.assertEqual(str(exc.exception), "Failed to fetch the public key for {}".format(OTHER_APP_UUID))
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_signature_cache(self):
+        LocalAuthenticator.SIGNATURE_CACHE = SignatureCache(10, LocalAuthenticator.ALLOWED_DRIFT_SECONDS)
+        try:
+            for headers in (self.v1_headers, self.v2_headers, self.v1_headers, self.v2_headers):
+                authenticator = LocalAuthenticator(self.signable, Signed.from_headers(headers), self.logger)
+                self.assertTrue(authenticator._authenticate())
+
+            self.assertEqual(KeyHolder.get_public_key.call_count, 2)
+            self.assertEqual(LocalAuthenticator.SIGNATURE_CACHE.hits, 2)
+            self.assertEqual(LocalAuthenticator.SIGNATURE_CACHE.misses, 2)
+
+            self.authenticator.signable = RequestSignable(method="GET", url=URL, body=BODY)
+            with self.assertRaises(InauthenticError):
+                self.authenticator._authenticate()
+        finally:
+            LocalAuthenticator.SIGNATURE_CACHE = None
+
+
+class TestSharedAuthenticator(unittest.TestCase):
+    def setUp(self):
+        Config.V2_ONLY_AUTHENTICATE = False
+        self.logger = logging.getLogger()
+        self.authenticator = Authenticator(self.logger)
+        self.signable = RequestSignable(method="POST", url=URL, body=BODY)
+
+        get_public_key_patcher = patch.object(KeyHolder, "get_public_key", return_value=load_key("rsapub"))
+        self.get_public_key = get_public_key_patcher.start()
+        self.addCleanup(get_public_key_patcher.stop)
+
+    def test_authenticator_type(self):
+        self.assertEqual(self.authenticator.authenticator_type, "LOCAL")
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_authenticates_requests(self):
+        for headers in (X_MWS_HEADERS, MWSV2_HEADERS, {**X_MWS_HEADERS, **MWSV2_HEADERS}):
+            with self.subTest(headers=sorted(headers)):
+                signed = Signed.from_headers(headers)
+                self.assertEqual(self.authenticator.authenticate(self.signable, signed), (True, 200, ""))
+
+        false_signable = RequestSignable(method="GET", url=URL, body=BODY)
+        self.assertEqual(
+            self.authenticator.authenticate(false_signable, Signed.from_headers(MWSV2_HEADERS)),
+            (False, 401, "Signature verification failed for request."),
+        )
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_shares_the_verifier_of_a_public_key(self):
+        with patch.object(authenticator, "RSAVerifier", wraps=authenticator.RSAVerifier) as rsa_verifier:
+            for _ in range(3):
+                self.authenticator.authenticate(self.signable, Signed.from_headers(MWSV2_HEADERS))
+
+        rsa_verifier.assert_not_called()
+        self.assertEqual(self.get_public_key.call_count, 3)
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_given_public_key(self):
+        result = self.authenticator.authenticate(
+            self.signable, Signed.from_headers(MWSV2_HEADERS), {APP_UUID: load_key("pub")}
+        )
+        self.assertEqual(result, (True, 200, ""))
+        self.get_public_key.assert_not_called()
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_given_public_key_is_only_used_for_its_app(self):
+        self.get_public_key.side_effect = get_public_key_of_app
+        result = self.authenticator.authenticate(
+            self.signable, Signed.from_headers(IMPERSONATING_HEADERS), {APP_UUID: load_key("pub")}
+        )
+        self.assertEqual(result, (False, 401, "Failed to fetch the public key for {}".format(OTHER_APP_UUID)))
+        self.get_public_key.assert_called_once_with(OTHER_APP_UUID)
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_given_public_key_error(self):
+        error = UnableToAuthenticateError("The mAuth service responded with 503")
+        result = self.authenticator.authenticate(self.signable, Signed.from_headers(MWSV2_HEADERS), {APP_UUID: error})
+        self.assertEqual(result, (False, 500, "The mAuth service responded with 503"))
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME + timedelta(minutes=10))
+    def test_time_verification_before_public_key_error(self):
+        error = InauthenticError("Failed to fetch the public key")
+        authentic, status, message = self.authenticator.authenticate(
+            self.signable, Signed.from_headers(MWSV2_HEADERS), {APP_UUID: error}
+        )
+        self.assertEqual((authentic, status), (False, 401))
+        self.assertTrue(message.startswith("Time verification failed."))
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_concurrent_requests(self):
+        signable = RequestSignable(method="GET", url=URL, body=BODY)
+        requests = [(self.signable, MWSV2_HEADERS), (signable, MWSV2_HEADERS)] * 50
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(
+                    lambda request: self.authenticator.authenticate(request[0], Signed.from_headers(request[1]))[0],
+                    requests,
+                )
+            )
+
+        self.assertEqual(results, [True, False] * 50)
+
+
+class TestProtocolCacheAuthentication(unittest.TestCase):
+    def setUp(self):
+        Config.V2_ONLY_AUTHENTICATE = False
+        self.addCleanup(setattr, Config, "V2_ONLY_AUTHENTICATE", False)
+        self.authenticator = Authenticator(logging.getLogger())
+        self.signable = RequestSignable(method="POST", url=URL, body=BODY)
+
+        Authenticator.PROTOCOL_CACHE = ProtocolCache(10, 300, threshold=2)
+        self.addCleanup(setattr, Authenticator, "PROTOCOL_CACHE", None)
+
+        get_public_key_patcher = patch.object(KeyHolder, "get_public_key", return_value=load_key("rsapub"))
+        get_public_key_patcher.start()
+        self.addCleanup(get_public_key_patcher.stop)
+
+        authenticate_v2_patcher = patch.object(
+            Authenticator, "_authenticate_v2", autospec=True, side_effect=Authenticator._authenticate_v2
+        )
+        self.authenticate_v2 = authenticate_v2_patcher.start()
+        self.addCleanup(authenticate_v2_patcher.stop)
+
+    def authenticate(self, headers, signable=None):
+        return self.authenticator.authenticate(signable or self.signable, Signed.from_headers(headers))
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_skips_failing_v2_signatures(self):
+        for _ in range(4):
+            self.assertEqual(self.authenticate(FAILING_V2_HEADERS), (True, 200, ""))
+
+        self.assertEqual(self.authenticate_v2.call_count, 2)
+        self.assertEqual(Authenticator.PROTOCOL_CACHE.stats(), {"v1_first": 2, "size": 1})
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_verifies_v2_when_v1_fails(self):
+        for _ in range(2):
+            self.authenticate(FAILING_V2_HEADERS)
+
+        false_signable = RequestSignable(method="GET", url=URL, body=BODY)
+        self.assertEqual(
+            self.authenticate(FAILING_V2_HEADERS, false_signable),
+            (False, 401, "Signature verification failed for request."),
+        )
+        self.assertEqual(self.authenticate_v2.call_count, 3)
+
+        # a v2 signature from a request the v1 signature does not match
+        v2_signed = {**FAILING_V2_HEADERS, "MCC-Authentication": MWSV2_AUTHENTICATION}
+        self.assertEqual(self.authenticate(v2_signed, false_signable)[:2], (False, 401))
+        self.assertEqual(self.authenticate(v2_signed), (True, 200, ""))
+        self.assertEqual(Authenticator.PROTOCOL_CACHE.stats()["v1_first"], 1)
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_v2_success_forgets_the_app(self):
+        self.authenticate(FAILING_V2_HEADERS)
+        self.authenticate(MWSV2_HEADERS)
+        self.authenticate(FAILING_V2_HEADERS)
+        self.authenticate(FAILING_V2_HEADERS)
+
+        self.assertEqual(self.authenticate_v2.call_count, 4)
+        self.assertEqual(Authenticator.PROTOCOL_CACHE.stats()["v1_first"], 0)
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_always_verifies_v2_when_v2_only(self):
+        Config.V2_ONLY_AUTHENTICATE = True
+        for _ in range(3):
+            self.assertEqual(
+                self.authenticate(FAILING_V2_HEADERS), (False, 401, "Signature verification failed for request.")
+            )
+
+        # a correctly signed request of the app is authenticated
+        v2_signed = {**FAILING_V2_HEADERS, "MCC-Authentication": MWSV2_AUTHENTICATION}
+        self.assertEqual(self.authenticate(v2_signed), (True, 200, ""))
+        self.assertEqual(self.authenticate_v2.call_count, 4)
+        self.assertEqual(Authenticator.PROTOCOL_CACHE.stats(), {"v1_first": 0, "size": 0})
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_v2_only_ignores_the_apps_of_failing_v2_signatures(self):
+        for _ in range(2):
+            self.authenticate(FAILING_V2_HEADERS)
+
+        Config.V2_ONLY_AUTHENTICATE = True
+        v2_signed = {**FAILING_V2_HEADERS, "MCC-Authentication": MWSV2_AUTHENTICATION}
+        self.assertEqual(self.authenticate(v2_signed), (True, 200, ""))
+        self.assertEqual(self.authenticate_v2.call_count, 3)
+        self.assertEqual(Authenticator.PROTOCOL_CACHE.stats()["v1_first"], 0)
+
+
+class TestAsyncAuthenticator(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        Config.V2_ONLY_AUTHENTICATE = False
+        self.authenticator = AsyncAuthenticator(logging.getLogger())
+        self.signable = RequestSignable(method="POST", url=URL, body=BODY)
+
+        get_public_key_patcher = patch.object(AsyncKeyHolder, "get_public_key", new_callable=AsyncMock)
+        self.get_public_key = get_public_key_patcher.start()
+        self.get_public_key.return_value = load_key("rsapub")
+        self.addCleanup(get_public_key_patcher.stop)
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_authenticates_requests(self):
+        signed = Signed.from_headers(MWSV2_HEADERS)
+        self.assertEqual(await self.authenticator.authenticate(self.signable, signed), (True, 200, ""))
+        self.get_public_key.assert_awaited_once_with(APP_UUID)
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_authenticates_requests_in_executor(self):
+        signed = Signed.from_headers(MWSV2_HEADERS)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(await self.authenticator.authenticate(self.signable, signed, executor), (True, 200, ""))
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_fail_to_retrieve_public_key(self):
+        self.get_public_key.side_effect = InauthenticError("Failed to fetch the public key")
+        signed = Signed.from_headers(MWSV2_HEADERS)
+        self.assertEqual(
+            await self.authenticator.authenticate(self.signable, signed), (False, 401, "Failed to fetch the public key")
+        )
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_v1_fallback_uses_the_public_key_of_its_app(self):
+        self.get_public_key.side_effect = get_public_key_of_app
+        signed = Signed.from_headers(IMPERSONATING_HEADERS)
+        self.assertEqual(
+            await self.authenticator.authenticate(self.signable, signed),
+            (False, 401, "Failed to fetch the public key for {}".format(OTHER_APP_UUID)),
+        )
+        self.assertEqual(sorted(call.args[0] for call in self.get_public_key.await_args_list),
+                         sorted([APP_UUID, OTHER_APP_UUID]))
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_only_the_v2_app_public_key_is_retrieved_when_v2_only(self):
+        Config.V2_ONLY_AUTHENTICATE = True
+        self.addCleanup(setattr, Config, "V2_ONLY_AUTHENTICATE", False)
+        authentic, status, _ = await self.authenticator.authenticate(
+            self.signable, Signed.from_headers(IMPERSONATING_HEADERS)
+        )
+        self.assertEqual((authentic, status), (False, 401))
+        self.get_public_key.assert_awaited_once_with(APP_UUID)
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME + timedelta(minutes=10))
+    async def test_no_public_key_is_retrieved_for_an_expired_request(self):
+        authentic, status, message = await self.authenticator.authenticate(
+            self.signable, Signed.from_headers(MWSV2_HEADERS)
+        )
+        self.assertEqual((authentic, status), (False, 401))
+        self.assertTrue(message.startswith("Time verification failed."))
+        self.get_public_key.assert_not_awaited()
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_the_v1_app_public_key_is_only_retrieved_after_a_v2_failure(self):
+        signed = Signed.from_headers({**IMPERSONATING_HEADERS, "MCC-Authentication": MWSV2_AUTHENTICATION})
+        self.assertEqual(await self.authenticator.authenticate(self.signable, signed), (True, 200, ""))
+        self.get_public_key.assert_awaited_once_with(APP_UUID)
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_v1_fallback_in_executor(self):
+        signed = Signed.from_headers(FAILING_V2_HEADERS)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(await self.authenticator.authenticate(self.signable, signed, executor), (True, 200, ""))
+
+        # the signature information of the fallback is kept
+        self.assertEqual(signed.token, MWS_TOKEN)
+        self.get_public_key.assert_awaited_once_with(APP_UUID)
+
+
+class TestAsyncLocalAuthenticator(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        Config.V2_ONLY_AUTHENTICATE = False
+        self.logger = logging.getLogger()
+        self.signable = RequestSignable(method="POST", url=URL, body=BODY)
+
+        get_public_key_patcher = patch.object(AsyncKeyHolder, "get_public_key", new_callable=AsyncMock)
+        self.get_public_key = get_public_key_patcher.start()
+        self.get_public_key.return_value = load_key("rsapub")
+        self.addCleanup(get_public_key_patcher.stop)
+
+    def authenticator(self, headers):
+        return AsyncLocalAuthenticator(self.signable, Signed.from_headers(headers), self.logger)
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_authentication_v1_happy_path(self):
+        self.assertEqual(await self.authenticator(X_MWS_HEADERS).is_authentic(), (True, 200, ""))
+        self.get_public_key.assert_awaited_once_with(APP_UUID)
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_authentication_v2_happy_path(self):
+        self.assertEqual(await self.authenticator(MWSV2_HEADERS).is_authentic(), (True, 200, ""))
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_fail_to_retrieve_public_key(self):
+        self.get_public_key.side_effect = InauthenticError("Failed to fetch the public key")
+        self.assertEqual(
+            await self.authenticator(MWSV2_HEADERS).is_authentic(), (False, 401, "Failed to fetch the public key")
+        )
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME + timedelta(minutes=10))
+    async def test_time_verification_before_public_key_failure(self):
+        self.get_public_key.side_effect = InauthenticError("Failed to fetch the public key")
+        authentic, status, message = await self.authenticator(MWSV2_HEADERS).is_authentic()
+        self.assertEqual((authentic, status), (False, 401))
+        self.assertTrue(message.startswith("Time verification failed."))
+
+    async def test_mauth_not_present(self):
+        authentic, status, _ = await self.authenticator({}).is_authentic()
+        self.assertEqual((authentic, status), (False, 401))
+        self.get_public_key.assert_not_awaited()
+
 
 class TestRemoteAuthenticator(unittest.TestCase):
     def setUp(self):
         Config.V2_ONLY_AUTHENTICATE = False
         RemoteAuthenticator._MAUTH = {"auth": MagicMock(), "url": MAUTH_AUTHENTICATION_URL}
+        get_circuit_breaker(AUTHENTICATION_TICKETS).reset()
 
         self.logger = logging.getLogger()
 
@@ -387,6 +750,33 @@ class TestRemoteAuthenticator(unittest.TestCase):
     def test_authenticator_type(self):
         self.assertEqual(self.authenticator.authenticator_type, "REMOTE")
 
+    def test_signatures_are_only_verified_by_the_mauth_service(self):
+        for remote_class in (RemoteAuthenticator, AsyncRemoteAuthenticator):
+            with self.subTest(remote_class=remote_class.__name__):
+                self.assertFalse(issubclass(remote_class, Authenticator))
+                self.assertFalse(hasattr(remote_class, "SIGNATURE_CACHE"))
+                self.assertFalse(hasattr(remote_class, "PROTOCOL_CACHE"))
+
+    def test_signer_is_shared_by_the_instances(self):
+        RemoteAuthenticator._MAUTH = None
+        with patch.object(authenticator, "generate_mauth") as generate_mauth, patch.object(
+            Config, "MAUTH_URL", "https://mauth.com"
+        ):
+            for _ in range(3):
+                remote_authenticator = RemoteAuthenticator(self.signable, self.signed, self.logger)
+
+        generate_mauth.assert_called_once()
+        self.assertNotIn("_MAUTH", vars(remote_authenticator))
+        self.assertEqual(RemoteAuthenticator._MAUTH["auth"], generate_mauth.return_value)
+        self.assertEqual(RemoteAuthenticator._MAUTH["url"], "https://mauth.com/mauth/v1/authentication_tickets.json")
+
+    def test_signer_is_generated_once_by_concurrent_requests(self):
+        RemoteAuthenticator._MAUTH = None
+        with patch.object(authenticator, "generate_mauth") as generate_mauth, ThreadPoolExecutor(8) as executor:
+            list(executor.map(lambda _: RemoteAuthenticator(self.signable, self.signed, self.logger), range(32)))
+
+        generate_mauth.assert_called_once()
+
     @pytest.mark.freeze_time(EPOCH_DATETIME)
     def test_authentication_v1_happy_path(self):
         expected_ticket_v1 = {
@@ -480,3 +870,331 @@ class TestRemoteAuthenticator(unittest.TestCase):
             with self.assertRaises(UnableToAuthenticateError) as exc:
                 self.authenticator._authenticate()
             self.assertEqual(str(exc.exception), "The mAuth service responded with 500: ")
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_authentication_reuses_session(self):
+        with requests_mock.mock() as requests:
+            requests.post(MAUTH_AUTHENTICATION_URL, status_code=200)
+            for _ in range(2):
+                self.authenticator._authenticate()
+                self.assertEqual(
+                    requests.last_request.timeout, (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+                )
+
+        self.assertIs(RemoteAuthenticator._request_session(), RemoteAuthenticator._request_session())
+        adapter = RemoteAuthenticator._request_session().get_adapter(MAUTH_AUTHENTICATION_URL)
+        self.assertIn("POST", adapter.max_retries.allowed_methods)
+
+    def test_forked_worker_opens_its_own_session(self):
+        session = RemoteAuthenticator._request_session()
+        with patch.object(authenticator.os, "getpid", return_value=os.getpid() + 1):
+            forked_session = RemoteAuthenticator._request_session()
+            self.assertIsNot(forked_session, session)
+            self.assertIs(RemoteAuthenticator._request_session(), forked_session)
+
+    def test_existing_session_is_returned_without_the_lock(self):
+        session = RemoteAuthenticator._request_session()
+        with patch.object(RemoteAuthenticator, "_LOCK") as lock:
+            self.assertIs(RemoteAuthenticator._request_session(), session)
+        lock.__enter__.assert_not_called()
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_authentication_keeps_the_connection_alive(self):
+        server = MAuthStandIn(load_key("rsapub"))
+        server.start()
+        self.addCleanup(server.stop)
+        RemoteAuthenticator._MAUTH = {"auth": MagicMock(side_effect=lambda request: request), "url": server.url}
+        for _ in range(3):
+            self.assertTrue(self.authenticator._authenticate())
+
+        self.assertEqual(len(server.paths), 3)
+        self.assertEqual(server.connections, 1)
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_authentication_connection_error(self):
+        with requests_mock.mock() as requests:
+            requests.post(MAUTH_AUTHENTICATION_URL, exc=ConnectTimeout("timed out"))
+            with self.assertRaises(UnableToAuthenticateError) as exc:
+                self.authenticator._authenticate()
+            self.assertEqual(str(exc.exception), "Failed to call the mAuth service: timed out")
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_authentication_fails_fast_while_the_circuit_is_open(self):
+        breaker = get_circuit_breaker(AUTHENTICATION_TICKETS)
+        with patch.object(breaker, "failure_threshold", 2), requests_mock.mock() as requests:
+            requests.post(MAUTH_AUTHENTICATION_URL, status_code=503)
+            for _ in range(3):
+                with self.assertRaises(UnableToAuthenticateError) as exc:
+                    self.authenticator._authenticate()
+
+        self.assertEqual(requests.call_count, 2)
+        self.assertTrue(str(exc.exception).startswith("Not calling the MAuth service after 2 consecutive failures"))
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_failing_public_key_fetches_do_not_stop_authentication(self):
+        breaker = get_circuit_breaker(SECURITY_TOKENS)
+        self.addCleanup(breaker.reset)
+        with patch.object(breaker, "failure_threshold", 1):
+            with self.assertRaises(UnableToAuthenticateError), breaker.guard():
+                raise UnableToAuthenticateError("The mAuth service responded with 503")
+            self.assertFalse(breaker.allows_calls())
+
+            with requests_mock.mock() as requests:
+                requests.post(MAUTH_AUTHENTICATION_URL, status_code=200)
+                self.assertTrue(self.authenticator._authenticate())
+
+
+class TestAsyncRemoteAuthenticator(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        Config.V2_ONLY_AUTHENTICATE = False
+        RemoteAuthenticator._MAUTH = {
+            "auth": MAuth(AUTHENTICATOR_APP_UUID, load_key("priv")),
+            "url": MAUTH_AUTHENTICATION_URL,
+        }
+        get_circuit_breaker(AUTHENTICATION_TICKETS).reset()
+        self.logger = logging.getLogger()
+        self.signable = RequestSignable(method="POST", url=URL, body=BODY)
+
+        self.requests = []
+        self.responses = []
+        request_client_patcher = patch.object(
+            AsyncRemoteAuthenticator,
+            "_request_client",
+            side_effect=lambda: httpx.AsyncClient(transport=httpx.MockTransport(self.mauth_handler)),
+        )
+        request_client_patcher.start()
+        self.addCleanup(request_client_patcher.stop)
+
+    def tearDown(self):
+        RemoteAuthenticator._MAUTH = None
+
+    def mauth_handler(self, request):
+        self.requests.append(request)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def remote_authenticator(self, headers):
+        return AsyncRemoteAuthenticator(self.signable, Signed.from_headers(headers), self.logger)
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_authentication_v1_happy_path(self):
+        self.responses = [httpx.Response(200)]
+        self.assertEqual(await self.remote_authenticator(X_MWS_HEADERS).is_authentic(), (True, 200, ""))
+
+        ticket = json.loads(self.requests[0].content)["authentication_ticket"]
+        self.assertEqual((ticket["app_uuid"], ticket["client_signature"]), (APP_UUID, X_MWS_SIGNATURE))
+        self.assertEqual(self.requests[0].headers["Content-Type"], "application/json")
+        self.assertTrue(self.requests[0].headers["X-MWS-Authentication"].startswith("MWS " + AUTHENTICATOR_APP_UUID))
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_authentication_v2_happy_path(self):
+        self.responses = [httpx.Response(200)]
+        self.assertEqual(await self.remote_authenticator(MWSV2_HEADERS).is_authentic(), (True, 200, ""))
+
+        ticket = json.loads(self.requests[0].content)["authentication_ticket"]
+        self.assertEqual((ticket["client_signature"], ticket["token"]), (MWSV2_SIGNATURE, "MWSV2"))
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_authentication_does_not_authenticate_412(self):
+        self.responses = [httpx.Response(412)]
+        Config.V2_ONLY_AUTHENTICATE = True
+        self.assertEqual(
+            await self.remote_authenticator(MWSV2_HEADERS).is_authentic(),
+            (False, 401, "The mAuth service responded with 412: "),
+        )
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_authentication_does_not_authenticate_500(self):
+        self.responses = [httpx.Response(500)]
+        self.assertEqual(
+            await self.remote_authenticator(X_MWS_HEADERS).is_authentic(),
+            (False, 500, "The mAuth service responded with 500: "),
+        )
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_authentication_falls_back_to_v1(self):
+        self.responses = [httpx.Response(412), httpx.Response(200)]
+        headers = {**X_MWS_HEADERS, **MWSV2_HEADERS}
+        self.assertEqual(await self.remote_authenticator(headers).is_authentic(), (True, 200, ""))
+
+        tickets = [json.loads(request.content)["authentication_ticket"] for request in self.requests]
+        self.assertEqual([ticket["client_signature"] for ticket in tickets], [MWSV2_SIGNATURE, X_MWS_SIGNATURE])
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_authentication_connection_error(self):
+        self.responses = [httpx.ConnectTimeout("timed out")]
+        self.assertEqual(
+            await self.remote_authenticator(X_MWS_HEADERS).is_authentic(),
+            (False, 500, "Failed to call the mAuth service: timed out"),
+        )
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    @patch.object(authenticator, "httpx", None)
+    async def test_authentication_without_httpx(self):
+        with requests_mock.mock() as requests:
+            requests.post(MAUTH_AUTHENTICATION_URL, status_code=200)
+            self.assertEqual(await self.remote_authenticator(X_MWS_HEADERS).is_authentic(), (True, 200, ""))
+
+        self.assertEqual(requests.call_count, 1)
+        self.assertEqual(self.requests, [])
+
+
+class TestAsyncRemoteAuthenticatorClient(unittest.IsolatedAsyncioTestCase):
+    async def test_client_is_shared_in_the_event_loop(self):
+        client = AsyncRemoteAuthenticator._request_client()
+        self.assertIsInstance(client, httpx.AsyncClient)
+        self.assertIs(AsyncRemoteAuthenticator._request_client(), client)
+
+    def test_client_of_each_event_loop(self):
+        async def request_client():
+            return AsyncRemoteAuthenticator._request_client()
+
+        loop, other_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        self.addCleanup(other_loop.close)
+
+        client = loop.run_until_complete(request_client())
+        self.assertIs(loop.run_until_complete(request_client()), client)
+        self.assertIsNot(other_loop.run_until_complete(request_client()), client)
+
+
+class TestHybridAuthenticator(unittest.TestCase):
+    def setUp(self):
+        Config.V2_ONLY_AUTHENTICATE = False
+        RemoteAuthenticator._MAUTH = {"auth": MagicMock(), "url": MAUTH_AUTHENTICATION_URL}
+        self.logger = logging.getLogger()
+        self.signable = RequestSignable(method="POST", url=URL, body=BODY)
+        self.authenticator = HybridAuthenticator(self.signable, Signed.from_headers(MWSV2_HEADERS), self.logger)
+
+        get_public_key_patcher = patch.object(KeyHolder, "get_public_key", return_value=load_key("rsapub"))
+        self.get_public_key = get_public_key_patcher.start()
+        self.addCleanup(get_public_key_patcher.stop)
+
+        remote_patcher = patch.object(RemoteAuthenticator, "is_authentic", return_value=(True, 200, ""))
+        self.remote_is_authentic = remote_patcher.start()
+        self.addCleanup(remote_patcher.stop)
+
+    def tearDown(self):
+        RemoteAuthenticator._MAUTH = None
+
+    def test_authenticator_type(self):
+        self.assertEqual(self.authenticator.authenticator_type, "HYBRID")
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_authenticates_locally(self):
+        self.assertEqual(self.authenticator.is_authentic(), (True, 200, ""))
+        self.get_public_key.assert_called_once_with(APP_UUID, Config.HYBRID_KEY_TIMEOUT)
+        self.remote_is_authentic.assert_not_called()
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_slow_public_key_is_authenticated_remotely(self):
+        self.get_public_key.side_effect = FutureTimeoutError()
+        with self.assertLogs(level="WARNING") as logs:
+            self.assertEqual(self.authenticator.is_authentic(), (True, 200, ""))
+
+        self.remote_is_authentic.assert_called_once()
+        self.assertIn("its public key is unavailable: not retrieved within", logs.output[0])
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_unavailable_public_key_is_authenticated_remotely(self):
+        self.get_public_key.side_effect = UnableToAuthenticateError("The mAuth service responded with 503")
+        self.remote_is_authentic.return_value = (False, 401, "The mAuth service responded with 412: ")
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(self.authenticator.is_authentic(), (False, 401, "The mAuth service responded with 412: "))
+
+        self.remote_is_authentic.assert_called_once()
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    def test_unknown_app_is_not_authenticated_remotely(self):
+        self.get_public_key.side_effect = InauthenticError("Failed to fetch the public key")
+        self.assertEqual(self.authenticator.is_authentic(), (False, 401, "Failed to fetch the public key"))
+        self.remote_is_authentic.assert_not_called()
+
+
+class TestAsyncHybridAuthenticator(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        Config.V2_ONLY_AUTHENTICATE = False
+        RemoteAuthenticator._MAUTH = {"auth": MagicMock(), "url": MAUTH_AUTHENTICATION_URL}
+        self.logger = logging.getLogger()
+        self.signable = RequestSignable(method="POST", url=URL, body=BODY)
+        self.authenticator = AsyncHybridAuthenticator(self.signable, Signed.from_headers(MWSV2_HEADERS), self.logger)
+
+        get_public_key_patcher = patch.object(AsyncKeyHolder, "get_public_key", new_callable=AsyncMock)
+        self.get_public_key = get_public_key_patcher.start()
+        self.get_public_key.return_value = load_key("rsapub")
+        self.addCleanup(get_public_key_patcher.stop)
+
+        remote_patcher = patch.object(AsyncRemoteAuthenticator, "is_authentic", new_callable=AsyncMock)
+        self.remote_is_authentic = remote_patcher.start()
+        self.remote_is_authentic.return_value = (True, 200, "")
+        self.addCleanup(remote_patcher.stop)
+
+    def tearDown(self):
+        RemoteAuthenticator._MAUTH = None
+
+    def signed_now(self):
+        # the loop does not run with a frozen clock, the timeouts are not waited for
+        headers = Signer(APP_UUID, load_key("priv"), "v2").signed_headers(self.signable)
+        return AsyncHybridAuthenticator(self.signable, Signed.from_headers(headers), self.logger)
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_authenticates_locally(self):
+        self.assertEqual(await self.authenticator.is_authentic(), (True, 200, ""))
+        self.remote_is_authentic.assert_not_awaited()
+
+    async def test_cached_public_key_is_used_without_latency_budget(self):
+        KeyHolder._CACHE = None
+        self.addCleanup(setattr, KeyHolder, "_CACHE", None)
+        KeyHolder._cache_public_key(APP_UUID, load_key("rsapub"), None)
+        authenticator = self.signed_now()
+
+        with patch.object(AsyncKeyHolder, "get_public_key", GET_PUBLIC_KEY), patch.object(
+            Config, "HYBRID_KEY_TIMEOUT", 0
+        ):
+            self.assertEqual(await authenticator.is_authentic(), (True, 200, ""))
+        self.remote_is_authentic.assert_not_awaited()
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_authenticates_locally_in_executor(self):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(await self.authenticator.is_authentic(executor), (True, 200, ""))
+        self.remote_is_authentic.assert_not_awaited()
+
+    async def test_slow_public_key_is_authenticated_remotely(self):
+        fetched = asyncio.Event()
+
+        async def get_public_key(app_uuid):
+            await asyncio.sleep(0.05)
+            fetched.set()
+            return load_key("rsapub")
+
+        self.get_public_key.side_effect = get_public_key
+        with patch.object(Config, "HYBRID_KEY_TIMEOUT", 0.01), self.assertLogs(level="WARNING") as logs:
+            self.assertEqual(await self.signed_now().is_authentic(), (True, 200, ""))
+
+        self.remote_is_authentic.assert_awaited_once()
+        self.assertIn("its public key is unavailable: not retrieved within 0.01 seconds", logs.output[0])
+
+        # the key is still retrieved
+        await asyncio.wait_for(fetched.wait(), 5)
+
+    async def test_unavailable_public_key_is_authenticated_remotely(self):
+        self.get_public_key.side_effect = UnableToAuthenticateError("The mAuth service responded with 503")
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(await self.signed_now().is_authentic(), (True, 200, ""))
+        self.remote_is_authentic.assert_awaited_once()
+
+    @pytest.mark.freeze_time(EPOCH_DATETIME)
+    async def test_unknown_app_is_not_authenticated_remotely(self):
+        self.get_public_key.side_effect = InauthenticError("Failed to fetch the public key")
+        self.assertEqual(await self.authenticator.is_authentic(), (False, 401, "Failed to fetch the public key"))
+        self.remote_is_authentic.assert_not_awaited()
+
+    async def test_expired_request_is_not_authenticated_remotely(self):
+        authentic, status, message = await self.authenticator.is_authentic()
+        self.assertEqual((authentic, status), (False, 401))
+        self.assertTrue(message.startswith("Time verification failed."))
+        self.get_public_key.assert_not_awaited()
+        self.remote_is_authentic.assert_not_awaited()
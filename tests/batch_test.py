@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import patch
+from uuid import uuid4
+
+from mauth_client.batch import authenticate_many
+from mauth_client.exceptions import InauthenticError
+from mauth_client.key_holder import KeyHolder
+from mauth_client.signable import RequestSignable
+from mauth_client.signed import Signed
+from mauth_client.signer import Signer
+from .common import load_key
+
+APP_UUID = str(uuid4())
+UNKNOWN_APP_UUID = str(uuid4())
+URL = "https://api_gateway.com/sandbox/path"
+
+
+def get_public_key(app_uuid):
+    if app_uuid == UNKNOWN_APP_UUID:
+        raise InauthenticError("Failed to fetch the public key for {}".format(app_uuid))
+
+    return load_key("rsapub")
+
+
+def signed_request(app_uuid, body, sign_versions="v1,v2", tampered_body=None):
+    signable = RequestSignable(method="POST", url=URL, body=body)
+    headers = Signer(app_uuid, load_key("priv"), sign_versions).signed_headers(signable)
+    return RequestSignable(method="POST", url=URL, body=tampered_body or body), Signed.from_headers(headers)
+
+
+class TestAuthenticateMany(unittest.TestCase):
+    @patch.object(KeyHolder, "get_public_key", side_effect=get_public_key)
+    def test_authenticate_many(self, get_public_key_mock):
+        requests = [signed_request(APP_UUID, "body {}".format(i), "v{}".format(i % 2 + 1)) for i in range(20)]
+        requests[3] = signed_request(APP_UUID, "body", tampered_body="tampered")
+        requests[7] = signed_request(UNKNOWN_APP_UUID, "body")
+        requests[11] = (RequestSignable(method="POST", url=URL, body="body"), Signed.from_headers({}))
+        # a failing v2 signature, and a v1 signature of the unknown app made with the private key of the known one
+        signable = RequestSignable(method="POST", url=URL, body="body")
+        headers = Signer(UNKNOWN_APP_UUID, load_key("priv"), "v1").signed_headers(signable)
+        headers["MCC-Authentication"] = "MWSV2 {}:c2lnbmF0dXJl;".format(APP_UUID)
+        headers["MCC-Time"] = headers["X-MWS-Time"]
+        requests[13] = (signable, Signed.from_headers(headers))
+
+        results = authenticate_many(iter(requests), max_workers=2, chunksize=3)
+
+        self.assertEqual(len(results), 20)
+        for i, (authentic, status, message) in enumerate(results):
+            with self.subTest(request=i):
+                if i == 3:
+                    self.assertEqual((authentic, status), (False, 401))
+                    self.assertEqual(message, "Signature verification failed for request.")
+                elif i in (7, 13):
+                    self.assertEqual((authentic, status), (False, 401))
+                    self.assertEqual(message, "Failed to fetch the public key for {}".format(UNKNOWN_APP_UUID))
+                elif i == 11:
+                    self.assertEqual((authentic, status), (False, 401))
+                    self.assertTrue(message.startswith("Authentication Failed. No mAuth signature present"))
+                else:
+                    self.assertEqual(results[i], (True, 200, ""))
+
+        self.assertEqual(sorted(call.args[0] for call in get_public_key_mock.call_args_list),
+                         sorted([APP_UUID, UNKNOWN_APP_UUID]))
+
+    def test_authenticate_nothing(self):
+        self.assertEqual(authenticate_many([]), [])
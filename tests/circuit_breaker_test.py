@@ -0,0 +1,141 @@
+import unittest
+from unittest.mock import patch
+
+from freezegun import freeze_time
+
+from mauth_client import circuit_breaker
+from mauth_client.circuit_breaker import AUTHENTICATION_TICKETS, SECURITY_TOKENS, CircuitBreaker, get_circuit_breaker
+from mauth_client.config import Config
+from mauth_client.exceptions import InauthenticError, UnableToAuthenticateError
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, max_reset_timeout=30)
+        # no jitter, the open periods are the full timeouts
+        patcher = patch.object(circuit_breaker.random, "uniform", side_effect=lambda low, high: high)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fail_call(self):
+        with self.assertRaises(UnableToAuthenticateError), self.breaker.guard():
+            raise UnableToAuthenticateError("The mAuth service responded with 503")
+
+    def succeed_call(self):
+        with self.breaker.guard():
+            pass
+
+    def assertFailsFast(self):
+        with self.assertRaises(UnableToAuthenticateError) as exc, self.breaker.guard():
+            self.fail("the call should not be made")
+        self.assertIn("Not calling the MAuth service", str(exc.exception))
+
+    def test_opens_after_consecutive_failures(self):
+        with freeze_time("2017-07-24 00:00:00"), self.assertLogs("mauth_circuit_breaker", level="WARNING") as logs:
+            self.fail_call()
+            self.assertEqual(self.breaker.state, "closed")
+            self.fail_call()
+            self.assertEqual(self.breaker.state, "open")
+            self.assertFailsFast()
+
+        self.assertIn("Stopped calling the MAuth service for 10.0 seconds after 2 consecutive failures", logs.output[0])
+
+    def test_success_resets_the_failures(self):
+        self.fail_call()
+        self.succeed_call()
+        self.fail_call()
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_inauthentic_error_is_not_a_failure(self):
+        for _ in range(3):
+            with self.assertRaises(InauthenticError), self.breaker.guard():
+                raise InauthenticError("The mAuth service responded with 412")
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_half_open_probe_closes_the_circuit(self):
+        with freeze_time("2017-07-24 00:00:00") as frozen_time:
+            self.fail_call()
+            self.fail_call()
+            frozen_time.tick(10)
+            self.assertTrue(self.breaker.allows_calls())
+            with self.breaker.guard():
+                # only the probe is let through
+                self.assertEqual(self.breaker.state, "half_open")
+                self.assertFalse(self.breaker.allows_calls())
+                self.assertFailsFast()
+
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertTrue(self.breaker.allows_calls())
+
+    def test_failed_probe_backs_off_exponentially(self):
+        with freeze_time("2017-07-24 00:00:00") as frozen_time:
+            self.fail_call()
+            self.fail_call()
+            frozen_time.tick(10)
+            for timeout in (20, 30, 30):
+                self.fail_call()
+                self.assertEqual(self.breaker.state, "open")
+                frozen_time.tick(timeout - 1)
+                self.assertFailsFast()
+                frozen_time.tick(1)
+
+    def test_interrupted_probe_lets_another_one_through(self):
+        with freeze_time("2017-07-24 00:00:00") as frozen_time:
+            self.fail_call()
+            self.fail_call()
+            frozen_time.tick(10)
+            with self.assertRaises(KeyboardInterrupt), self.breaker.guard():
+                raise KeyboardInterrupt
+            self.succeed_call()
+
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_calls_started_before_the_circuit_opened_are_not_probes(self):
+        with freeze_time("2017-07-24 00:00:00") as frozen_time:
+            # a slow call, let through while the circuit is closed
+            slow_call = self.breaker.guard()
+            slow_call.__enter__()
+            self.fail_call()
+            self.fail_call()
+            frozen_time.tick(10)
+            probe = self.breaker.guard()
+            probe.__enter__()
+
+            # the slow call fails while the probe is running
+            error = UnableToAuthenticateError("Read timed out.")
+            self.assertFalse(slow_call.__exit__(UnableToAuthenticateError, error, None))
+            self.assertEqual(self.breaker.state, "half_open")
+            self.assertFailsFast()
+
+            probe.__exit__(None, None, None)
+
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_jitter(self):
+        with patch.object(circuit_breaker.random, "uniform", return_value=7) as uniform:
+            self.fail_call()
+            self.fail_call()
+        uniform.assert_called_once_with(5, 10)
+
+    def test_disabled(self):
+        self.breaker.failure_threshold = 0
+        for _ in range(3):
+            self.fail_call()
+        self.succeed_call()
+
+
+class TestGetCircuitBreaker(unittest.TestCase):
+    def test_shared_and_configured(self):
+        with patch.object(circuit_breaker, "_CIRCUIT_BREAKERS", {}), patch.object(
+            Config, "CIRCUIT_FAILURE_THRESHOLD", 3
+        ):
+            breaker = get_circuit_breaker()
+            self.assertIs(get_circuit_breaker(), breaker)
+            self.assertEqual(breaker.failure_threshold, 3)
+            self.assertEqual(breaker.reset_timeout, Config.CIRCUIT_RESET_TIMEOUT)
+            self.assertEqual(breaker.max_reset_timeout, Config.CIRCUIT_MAX_RESET_TIMEOUT)
+
+    def test_one_per_endpoint(self):
+        with patch.object(circuit_breaker, "_CIRCUIT_BREAKERS", {}):
+            self.assertIs(get_circuit_breaker(), get_circuit_breaker(SECURITY_TOKENS))
+            self.assertIsNot(get_circuit_breaker(AUTHENTICATION_TICKETS), get_circuit_breaker(SECURITY_TOKENS))
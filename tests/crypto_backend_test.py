@@ -0,0 +1,133 @@
+import base64
+import random
+import unittest
+from unittest.mock import patch
+
+import rsa
+
+from mauth_client import crypto_backend
+from mauth_client.config import Config
+from mauth_client.crypto_backend import CryptographyBackend, RSABackend, get_backend
+from mauth_client.exceptions import UnableToAuthenticateError
+from mauth_client.rsa_signer import RSASigner
+from mauth_client.rsa_verifier import RSAVerifier
+from mauth_client.utils import hexdigest
+from .common import load_key
+
+APP_UUID = "f5af50b2-bf7d-4c29-81db-76d086d4808a"
+STRING_TO_SIGN = "GET\n/studies/123/users\n\n{}\n1309891855".format(APP_UUID)
+HAS_CRYPTOGRAPHY = crypto_backend.serialization is not None
+PRIVATE_KEY = rsa.PrivateKey.load_pkcs1(load_key("priv"), "PEM")
+
+
+def reference_sign_v1(string_to_sign):
+    # the full-size modular exponentiation used before the CRT
+    keylength = rsa.common.byte_size(PRIVATE_KEY.n)
+    padded = RSABackend.pad_for_signing(hexdigest(string_to_sign).encode("US-ASCII"), keylength)
+    encrypted = rsa.core.encrypt_int(rsa.transform.bytes2int(padded), PRIVATE_KEY.d, PRIVATE_KEY.n)
+    return rsa.transform.int2bytes(encrypted, keylength)
+
+
+def reference_sign_v2(string_to_sign):
+    return rsa.sign(string_to_sign.encode("utf-8"), PRIVATE_KEY, "SHA-512")
+
+
+class TestGetBackend(unittest.TestCase):
+    def tearDown(self):
+        Config.CRYPTO_BACKEND = None
+
+    def test_by_name(self):
+        self.assertIsInstance(get_backend("rsa"), RSABackend)
+
+    def test_from_config(self):
+        Config.CRYPTO_BACKEND = "rsa"
+        self.assertIsInstance(get_backend(), RSABackend)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError) as exc:
+            get_backend("openssh")
+        self.assertEqual(str(exc.exception), "MAUTH_CRYPTO_BACKEND must be one of cryptography, rsa")
+
+    @patch.object(crypto_backend, "serialization", None)
+    def test_falls_back_to_rsa_without_cryptography(self):
+        self.assertIsInstance(get_backend(), RSABackend)
+
+    @patch.object(crypto_backend, "serialization", None)
+    def test_cryptography_backend_not_installed(self):
+        with self.assertRaises(ValueError):
+            get_backend("cryptography")
+
+    @unittest.skipUnless(HAS_CRYPTOGRAPHY, "cryptography is not installed")
+    def test_prefers_cryptography(self):
+        self.assertIsInstance(get_backend(), CryptographyBackend)
+
+
+class BackendTestMixin:
+    BACKEND = None
+
+    def setUp(self):
+        self.backend = self.BACKEND()
+        self.signer = RSASigner(load_key("priv"), self.backend)
+
+    def verifier(self, keytype="rsapub"):
+        with patch("mauth_client.rsa_verifier.KeyHolder.get_public_key", return_value=load_key(keytype)):
+            return RSAVerifier(APP_UUID, self.backend)
+
+    def test_sign_v1_matches_reference(self):
+        self.assertEqual(self.signer.sign_v1(STRING_TO_SIGN), reference_sign_v1(STRING_TO_SIGN))
+
+    def test_sign_v2_matches_reference(self):
+        self.assertEqual(self.signer.sign_v2(STRING_TO_SIGN), reference_sign_v2(STRING_TO_SIGN))
+
+    def test_verify_v1(self):
+        signature = base64.b64encode(reference_sign_v1(STRING_TO_SIGN))
+        for keytype in ("rsapub", "pub"):
+            with self.subTest(keytype=keytype):
+                verifier = self.verifier(keytype)
+                self.assertTrue(verifier.verify_v1(STRING_TO_SIGN, signature))
+                self.assertFalse(verifier.verify_v1(STRING_TO_SIGN + "!", signature))
+
+    def test_verify_v2(self):
+        signature = base64.b64encode(reference_sign_v2(STRING_TO_SIGN))
+        for keytype in ("rsapub", "pub"):
+            with self.subTest(keytype=keytype):
+                verifier = self.verifier(keytype)
+                self.assertTrue(verifier.verify_v2(STRING_TO_SIGN, signature))
+                self.assertFalse(verifier.verify_v2(STRING_TO_SIGN + "!", signature))
+
+    def test_verify_v1_bad_padding(self):
+        signature = base64.b64encode(reference_sign_v2(STRING_TO_SIGN))
+        self.assertFalse(self.verifier().verify_v1(STRING_TO_SIGN, signature))
+
+    def test_public_decrypt(self):
+        signature = base64.b64encode(reference_sign_v1(STRING_TO_SIGN))
+        self.assertEqual(self.verifier().public_decrypt(signature), hexdigest(STRING_TO_SIGN).encode("US-ASCII"))
+
+    def test_unknown_public_key_type(self):
+        with self.assertRaises(UnableToAuthenticateError) as exc:
+            self.backend.load_public_key("")
+        self.assertEqual(str(exc.exception), "Unable to identify Public Key type from Signature.")
+
+
+class TestRSABackend(BackendTestMixin, unittest.TestCase):
+    BACKEND = RSABackend
+
+    def test_private_operation_matches_full_exponentiation(self):
+        payloads = [0, 1, PRIVATE_KEY.n - 1] + [random.randrange(PRIVATE_KEY.n) for _ in range(20)]
+        for blinding in (True, False):
+            backend = RSABackend(blinding=blinding)
+            for payload in payloads:
+                with self.subTest(blinding=blinding, payload=payload):
+                    self.assertEqual(
+                        backend.private_operation(PRIVATE_KEY, payload),
+                        rsa.core.encrypt_int(payload, PRIVATE_KEY.d, PRIVATE_KEY.n),
+                    )
+
+    def test_sign_v1_without_blinding(self):
+        signer = RSASigner(load_key("priv"), RSABackend(blinding=False))
+        self.assertEqual(signer.sign_v1(STRING_TO_SIGN), reference_sign_v1(STRING_TO_SIGN))
+
+
+@unittest.skipUnless(HAS_CRYPTOGRAPHY, "cryptography is not installed")
+class TestCryptographyBackend(BackendTestMixin, unittest.TestCase):
+    BACKEND = CryptographyBackend
@@ -0,0 +1,47 @@
+import unittest
+
+from freezegun import freeze_time
+
+from mauth_client.endpoints import Endpoints
+
+FIRST_URL = "https://mauth-1.com"
+SECOND_URL = "https://mauth-2.com"
+
+
+class TestEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.endpoints = Endpoints([FIRST_URL, SECOND_URL], failure_cooldown=30)
+
+    def test_ranked_in_order_until_measured(self):
+        self.assertEqual(self.endpoints.ranked(), [FIRST_URL, SECOND_URL])
+
+    def test_ranked_by_latency(self):
+        self.endpoints.record_success(FIRST_URL, 0.5)
+        self.endpoints.record_success(SECOND_URL, 0.1)
+        self.assertEqual(self.endpoints.ranked(), [SECOND_URL, FIRST_URL])
+
+        # the ranking follows the recent responses
+        for _ in range(3):
+            self.endpoints.record_success(SECOND_URL, 0.5)
+        self.assertEqual(self.endpoints.ranked(), [FIRST_URL, SECOND_URL])
+
+    def test_failed_endpoint_is_ranked_last_until_the_cooldown_is_over(self):
+        with freeze_time("2017-07-24 00:00:00") as frozen_time:
+            self.endpoints.record_success(SECOND_URL, 0.5)
+            self.endpoints.record_failure(FIRST_URL)
+            self.assertEqual(self.endpoints.ranked(), [SECOND_URL, FIRST_URL])
+
+            frozen_time.tick(30)
+            self.assertEqual(self.endpoints.ranked(), [FIRST_URL, SECOND_URL])
+
+    def test_abandoned_request_raises_the_latency(self):
+        self.endpoints.record_success(SECOND_URL, 0.1)
+        self.endpoints.record_abandoned(FIRST_URL, 0.2)
+        self.assertEqual(self.endpoints.ranked(), [SECOND_URL, FIRST_URL])
+
+    def test_hedge_delay(self):
+        self.assertEqual(self.endpoints.hedge_delay(0.1), 0.1)
+
+        for latency in range(1, 101):
+            self.endpoints.record_success(FIRST_URL, latency / 1000)
+        self.assertEqual(self.endpoints.hedge_delay(0.1), 0.095)
@@ -0,0 +1,109 @@
+import asyncio
+import unittest
+
+import httpx
+
+from mauth_client.config import Config
+from mauth_client.http_session import (
+    RETRY_STATUSES,
+    LoopClients,
+    create_async_client,
+    create_session,
+    request_timeout,
+)
+from .common import load_key
+from .mauth_server_helper import MAuthStandIn
+
+
+class TestCreateSession(unittest.TestCase):
+    def setUp(self):
+        self.config = {
+            name: getattr(Config, name)
+            for name in ("HTTP_POOL_SIZE", "HTTP_CONNECT_TIMEOUT", "HTTP_READ_TIMEOUT", "HTTP_MAX_RETRIES")
+        }
+
+    def tearDown(self):
+        for name, value in self.config.items():
+            setattr(Config, name, value)
+
+    def test_pooled_adapter(self):
+        Config.HTTP_POOL_SIZE = 25
+        Config.HTTP_MAX_RETRIES = 5
+        adapter = create_session().get_adapter("https://mauth.com")
+        self.assertEqual(adapter._pool_maxsize, 25)
+        self.assertEqual(adapter.max_retries.total, 5)
+        self.assertEqual(adapter.max_retries.status_forcelist, RETRY_STATUSES)
+        self.assertFalse(adapter.max_retries.raise_on_status)
+        self.assertNotIn("POST", adapter.max_retries.allowed_methods)
+
+    def test_retry_methods(self):
+        adapter = create_session(retry_methods={"GET", "POST"}).get_adapter("https://mauth.com")
+        self.assertEqual(adapter.max_retries.allowed_methods, {"GET", "POST"})
+
+    def test_request_timeout(self):
+        Config.HTTP_CONNECT_TIMEOUT = 1.5
+        Config.HTTP_READ_TIMEOUT = 4
+        self.assertEqual(request_timeout(), (1.5, 4))
+
+
+class TestCreateAsyncClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.config = {
+            name: getattr(Config, name)
+            for name in ("HTTP_POOL_SIZE", "HTTP_CONNECT_TIMEOUT", "HTTP_READ_TIMEOUT", "HTTP_MAX_RETRIES")
+        }
+
+    def tearDown(self):
+        for name, value in self.config.items():
+            setattr(Config, name, value)
+
+    async def test_pooled_client(self):
+        Config.HTTP_POOL_SIZE = 25
+        Config.HTTP_MAX_RETRIES = 5
+        Config.HTTP_CONNECT_TIMEOUT = 1.5
+        Config.HTTP_READ_TIMEOUT = 4
+        async with create_async_client() as client:
+            pool = client._transport._pool
+            self.assertEqual(pool._max_keepalive_connections, 25)
+            self.assertEqual(pool._retries, 5)
+            self.assertEqual(client.timeout, httpx.Timeout(4, connect=1.5))
+
+
+class TestLoopClients(unittest.TestCase):
+    def setUp(self):
+        self.clients = LoopClients(object)
+
+    async def get_twice(self):
+        return self.clients.get(), self.clients.get()
+
+    def test_one_client_per_loop(self):
+        client, same_client = asyncio.run(self.get_twice())
+        self.assertIs(same_client, client)
+
+        other_client, _ = asyncio.run(self.get_twice())
+        self.assertIsNot(other_client, client)
+
+    def test_client_is_closed_with_its_loop(self):
+        server = MAuthStandIn(load_key("pub"))
+        server.start()
+        self.addCleanup(server.stop)
+        clients = LoopClients(create_async_client, lambda client: client.aclose())
+
+        async def get_security_token():
+            client = clients.get()
+            response = await client.get(server.url + "/mauth/v1/security_tokens/app.json")
+            self.assertEqual(response.status_code, 200)
+            return client
+
+        client = asyncio.run(get_security_token())
+        self.assertTrue(client.is_closed)
+        self.assertEqual(len(clients._clients), 0)
+
+    def test_client_of_a_loop_closed_without_shutdown_is_dropped(self):
+        loop = asyncio.new_event_loop()
+        client, _ = loop.run_until_complete(self.get_twice())
+        loop.close()
+
+        other_client, _ = asyncio.run(self.get_twice())
+        self.assertIsNot(other_client, client)
+        self.assertEqual(len(self.clients._clients), 0)
@@ -1,14 +1,31 @@
+import asyncio
 import json
+import os
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from io import StringIO
 
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
+import httpx
+import requests
 import requests_mock
-from mauth_client.key_holder import KeyHolder
-from mauth_client.exceptions import InauthenticError
+from mauth_client import key_holder, key_store
+from mauth_client.circuit_breaker import get_circuit_breaker
+from mauth_client.config import Config
+from mauth_client.consts import MCC_AUTH
+from mauth_client.http_session import LoopClients
+from mauth_client.key_holder import AsyncKeyHolder, KeyHolder, PublicKeyEntry
+from mauth_client.exceptions import InauthenticError, UnableToAuthenticateError
+from mauth_client.requests_mauth import MAuth
+from mauth_client.key_store import FileKeyStore, MemoryKeyStore, RedisKeyStore
 from .common import load_key
+from .mauth_server_helper import MAuthStandIn
+from .redis_server_helper import RedisStandIn
 
 APP_UUID = "f5af50b2-bf7d-4c29-81db-76d086d4808a"
 MAUTH_URL = "https://mauth.com"
@@ -28,9 +45,19 @@ MAUTH_RESPONSE = {
 CACHE_CONTROL = "max-age=60, private"
 
 
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
 class TestKeyHolder(unittest.TestCase):
     def setUp(self):
         KeyHolder._MAUTH = {"auth": MagicMock(), "url": MAUTH_URL, "api_version": MAUTH_API_VERSION}
+        get_circuit_breaker().reset()
+        KeyHolder._NEGATIVE_CACHE = None
+        KeyHolder.set_key_store(None)
+        KeyHolder._STATS.clear()
 
         # redirect the output of stdout to self.captor
         self.captor = StringIO()
@@ -46,23 +73,58 @@ class TestKeyHolder(unittest.TestCase):
             requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE))
             self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
             self.assertEqual(KeyHolder._CACHE.maxsize, 128)
-            self.assertEqual(KeyHolder._CACHE.ttl, 300)
+            self.assertAlmostEqual(KeyHolder._CACHE[APP_UUID].expires_at, KeyHolder._CACHE.timer() + 300, delta=1)
 
     def test_get_request_respect_cache_header(self):
         KeyHolder._CACHE = None
         with requests_mock.mock() as requests:
             requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE), headers={"Cache-Control": CACHE_CONTROL})
             self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
-            self.assertEqual(KeyHolder._CACHE.ttl, 60)
+            self.assertAlmostEqual(KeyHolder._CACHE[APP_UUID].expires_at, KeyHolder._CACHE.timer() + 60, delta=1)
 
     def test_get_request_cache_expiration(self):
         KeyHolder._CACHE = None
         with requests_mock.mock() as requests:
             requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE), headers={"Cache-Control": CACHE_CONTROL})
             self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
-            KeyHolder._CACHE.expire(KeyHolder._CACHE.timer() + 60)
+            KeyHolder._CACHE.expire(KeyHolder._CACHE.timer() + 60 + Config.KEY_STALE_SECONDS)
             self.assertEqual(KeyHolder._CACHE.get(APP_UUID), None)
 
+    def test_get_request_max_age_per_entry(self):
+        KeyHolder._CACHE = None
+        other_app_uuid = "b0603e5c-c344-4e81-a9f4-0e79b0ea6ee2"
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE), headers={"Cache-Control": CACHE_CONTROL})
+            requests.get(
+                "{}/mauth/v1/security_tokens/{}.json".format(MAUTH_URL, other_app_uuid),
+                text=json.dumps(MAUTH_RESPONSE),
+                headers={"Cache-Control": "max-age=3600"},
+            )
+            KeyHolder.get_public_key(APP_UUID)
+            KeyHolder.get_public_key(other_app_uuid)
+
+        KeyHolder._CACHE.expire(KeyHolder._CACHE.timer() + 60 + Config.KEY_STALE_SECONDS)
+        self.assertNotIn(APP_UUID, KeyHolder._CACHE)
+        self.assertIn(other_app_uuid, KeyHolder._CACHE)
+
+    @patch.object(Config, "KEY_CACHE_TTL", 900)
+    def test_get_request_default_ttl(self):
+        KeyHolder._CACHE = None
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE))
+            KeyHolder.get_public_key(APP_UUID)
+        self.assertAlmostEqual(KeyHolder._CACHE[APP_UUID].expires_at, KeyHolder._CACHE.timer() + 900, delta=1)
+
+    @patch.object(Config, "KEY_CACHE_SIZE", 2)
+    def test_cache_evictions(self):
+        KeyHolder._CACHE = None
+        for app_uuid in ("app-1", "app-2", "app-3", "app-4"):
+            KeyHolder._cache_public_key(app_uuid, PUBLIC_KEY, CACHE_CONTROL)
+
+        self.assertEqual(list(KeyHolder._CACHE), ["app-3", "app-4"])
+        stats = KeyHolder.stats()
+        self.assertEqual((stats["cache_size"], stats["cache_maxsize"], stats["cache_evictions"]), (2, 2, 2))
+
     def test_get_request_404_error(self):
         KeyHolder._CACHE = None
         with requests_mock.mock() as requests:
@@ -72,3 +134,742 @@ class TestKeyHolder(unittest.TestCase):
             self.assertEqual(
                 str(exc.exception), "Failed to fetch the public key for {} from {}".format(APP_UUID, MAUTH_URL)
             )
+
+    def test_get_request_500_error(self):
+        KeyHolder._CACHE = None
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, status_code=503)
+            with self.assertRaises(UnableToAuthenticateError):
+                KeyHolder.get_public_key(APP_UUID)
+
+    def test_get_request_errors_other_than_unknown_app(self):
+        for status_code in (401, 403, 408, 429):
+            with self.subTest(status_code=status_code), requests_mock.mock() as requests:
+                KeyHolder._CACHE = None
+                requests.get(MAUTH_PATH, status_code=status_code)
+                with self.assertRaises(UnableToAuthenticateError):
+                    KeyHolder.get_public_key(APP_UUID)
+
+    def cache_old_key(self, expires_in):
+        KeyHolder._CACHE = None
+        KeyHolder._cache_public_key(APP_UUID, "old key", CACHE_CONTROL)
+        KeyHolder._CACHE[APP_UUID] = PublicKeyEntry("old key", KeyHolder._CACHE.timer() + expires_in)
+
+    def test_fresh_key_is_not_refreshed(self):
+        self.cache_old_key(expires_in=Config.KEY_REFRESH_AHEAD_SECONDS + 10)
+        with patch.object(KeyHolder, "_get_public_key_and_cache_control_from_mauth") as fetch:
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), "old key")
+        fetch.assert_not_called()
+
+    def test_refresh_ahead(self):
+        self.cache_old_key(expires_in=Config.KEY_REFRESH_AHEAD_SECONDS - 10)
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE), headers={"Cache-Control": CACHE_CONTROL})
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), "old key")
+            wait_for(lambda: KeyHolder._CACHE[APP_UUID].public_key == PUBLIC_KEY)
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+            self.assertEqual(requests.call_count, 1)
+
+    def test_stale_while_revalidate(self):
+        self.cache_old_key(expires_in=-10)
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE), headers={"Cache-Control": CACHE_CONTROL})
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), "old key")
+            wait_for(lambda: KeyHolder._CACHE[APP_UUID].public_key == PUBLIC_KEY)
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+
+    def test_stale_if_error(self):
+        self.cache_old_key(expires_in=-10)
+        with requests_mock.mock() as requests, self.assertLogs("mauth_key_holder", level="WARNING") as logs:
+            requests.get(MAUTH_PATH, status_code=503)
+            for _ in range(3):
+                self.assertEqual(KeyHolder.get_public_key(APP_UUID), "old key")
+                wait_for(lambda: not KeyHolder._IN_FLIGHT)
+        self.assertEqual(requests.call_count, 3)
+        self.assertIn("Failed to refresh the public key for {}".format(APP_UUID), logs.output[0])
+
+    def test_stale_if_rate_limited(self):
+        self.cache_old_key(expires_in=-10)
+        with requests_mock.mock() as requests, self.assertLogs("mauth_key_holder", level="WARNING") as logs:
+            requests.get(MAUTH_PATH, status_code=429)
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), "old key")
+            wait_for(lambda: not KeyHolder._IN_FLIGHT)
+        self.assertEqual(KeyHolder._CACHE[APP_UUID].public_key, "old key")
+        self.assertIn("Failed to refresh the public key for {}".format(APP_UUID), logs.output[0])
+
+    def test_refresh_evicts_unknown_app(self):
+        self.cache_old_key(expires_in=-10)
+        with requests_mock.mock() as requests, self.assertLogs("mauth_key_holder", level="WARNING"):
+            requests.get(MAUTH_PATH, status_code=404)
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), "old key")
+            wait_for(lambda: APP_UUID not in KeyHolder._CACHE)
+        self.assertNotIn(APP_UUID, KeyHolder._CACHE)
+
+    def test_get_request_keeps_validators(self):
+        KeyHolder._CACHE = None
+        with requests_mock.mock() as requests:
+            requests.get(
+                MAUTH_PATH,
+                text=json.dumps(MAUTH_RESPONSE),
+                headers={"ETag": '"v1"', "Last-Modified": "Mon, 24 Jul 2017 00:00:00 GMT"},
+            )
+            KeyHolder.get_public_key(APP_UUID)
+            self.assertNotIn("If-None-Match", requests.last_request.headers)
+
+        entry = KeyHolder._CACHE[APP_UUID]
+        self.assertEqual((entry.etag, entry.last_modified), ('"v1"', "Mon, 24 Jul 2017 00:00:00 GMT"))
+
+    def test_revalidation_not_modified(self):
+        self.cache_old_key(expires_in=-10)
+        KeyHolder._CACHE[APP_UUID] = KeyHolder._CACHE[APP_UUID]._replace(
+            etag='"v1"', last_modified="Mon, 24 Jul 2017 00:00:00 GMT"
+        )
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, status_code=304, headers={"Cache-Control": "max-age=600"})
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), "old key")
+            wait_for(lambda: KeyHolder._CACHE[APP_UUID].expires_at > KeyHolder._CACHE.timer())
+
+        self.assertEqual(requests.last_request.headers["If-None-Match"], '"v1"')
+        self.assertEqual(requests.last_request.headers["If-Modified-Since"], "Mon, 24 Jul 2017 00:00:00 GMT")
+        entry = KeyHolder._CACHE[APP_UUID]
+        self.assertEqual((entry.public_key, entry.etag), ("old key", '"v1"'))
+        self.assertAlmostEqual(entry.expires_at, KeyHolder._CACHE.timer() + 600, delta=1)
+        self.assertEqual(KeyHolder.stats()["revalidations"], 1)
+
+    def test_revalidation_modified(self):
+        self.cache_old_key(expires_in=-10)
+        KeyHolder._CACHE[APP_UUID] = KeyHolder._CACHE[APP_UUID]._replace(etag='"v1"')
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE), headers={"ETag": '"v2"'})
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), "old key")
+            wait_for(lambda: KeyHolder._CACHE[APP_UUID].public_key == PUBLIC_KEY)
+
+        self.assertEqual(requests.last_request.headers["If-None-Match"], '"v1"')
+        self.assertEqual(KeyHolder._CACHE[APP_UUID].etag, '"v2"')
+        self.assertNotIn("revalidations", KeyHolder.stats())
+
+    def test_fails_fast_while_the_circuit_is_open(self):
+        KeyHolder._CACHE = None
+        with patch.object(get_circuit_breaker(), "failure_threshold", 2), requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, status_code=503)
+            for _ in range(3):
+                with self.assertRaises(UnableToAuthenticateError) as exc:
+                    KeyHolder.get_public_key(APP_UUID)
+
+        self.assertEqual(requests.call_count, 2)
+        self.assertTrue(str(exc.exception).startswith("Not calling the MAuth service after 2 consecutive failures"))
+
+    def test_stale_key_is_not_refreshed_while_the_circuit_is_open(self):
+        self.cache_old_key(expires_in=-10)
+        with patch.object(get_circuit_breaker(), "failure_threshold", 1), requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, status_code=503)
+            with self.assertLogs("mauth_key_holder", level="WARNING"):
+                self.assertEqual(KeyHolder.get_public_key(APP_UUID), "old key")
+                wait_for(lambda: not KeyHolder._IN_FLIGHT)
+
+            for _ in range(3):
+                self.assertEqual(KeyHolder.get_public_key(APP_UUID), "old key")
+            self.assertFalse(KeyHolder._IN_FLIGHT)
+
+        self.assertEqual(requests.call_count, 1)
+
+    def test_get_request_reuses_session(self):
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE))
+            for _ in range(2):
+                KeyHolder._CACHE = None
+                self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+                self.assertEqual(
+                    requests.last_request.timeout, (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+                )
+        self.assertIs(KeyHolder._request_session(), KeyHolder._request_session())
+
+    def test_get_request_timeout(self):
+        KeyHolder._CACHE = None
+        with requests_mock.mock() as mock:
+            mock.get(MAUTH_PATH, exc=requests.exceptions.ReadTimeout("Read timed out."))
+            with self.assertRaises(UnableToAuthenticateError) as exc:
+                KeyHolder.get_public_key(APP_UUID)
+            self.assertEqual(
+                str(exc.exception),
+                "Failed to fetch the public key for {} from {}: Read timed out.".format(APP_UUID, MAUTH_URL),
+            )
+
+    def test_concurrent_misses_fetch_once(self):
+        KeyHolder._CACHE = None
+        fetches = []
+
+        def fetch(app_uuid):
+            fetches.append(app_uuid)
+            time.sleep(0.05)
+            return PUBLIC_KEY, CACHE_CONTROL
+
+        with patch.object(KeyHolder, "_get_public_key_and_cache_control_from_mauth", side_effect=fetch):
+            with ThreadPoolExecutor(max_workers=32) as executor:
+                public_keys = list(executor.map(KeyHolder.get_public_key, [APP_UUID] * 32))
+
+        self.assertEqual(public_keys, [PUBLIC_KEY] * 32)
+        self.assertEqual(fetches, [APP_UUID])
+        self.assertEqual(KeyHolder._IN_FLIGHT, {})
+
+    def test_concurrent_misses_share_errors(self):
+        KeyHolder._CACHE = None
+        started = threading.Event()
+        release = threading.Event()
+        fetches = []
+
+        def fetch(app_uuid):
+            fetches.append(app_uuid)
+            started.set()
+            release.wait(5)
+            raise UnableToAuthenticateError("Failed to fetch the public key for {} from {}".format(app_uuid, MAUTH_URL))
+
+        def get_public_key():
+            try:
+                return KeyHolder.get_public_key(APP_UUID)
+            except UnableToAuthenticateError as exc:
+                return exc
+
+        with patch.object(KeyHolder, "_get_public_key_and_cache_control_from_mauth", side_effect=fetch):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                leader = executor.submit(get_public_key)
+                started.wait(5)
+                followers = [executor.submit(get_public_key) for _ in range(7)]
+                time.sleep(0.05)
+                release.set()
+                results = [leader.result()] + [follower.result() for follower in followers]
+
+        self.assertEqual(fetches, [APP_UUID])
+        self.assertTrue(all(isinstance(result, UnableToAuthenticateError) for result in results))
+        self.assertEqual(KeyHolder._IN_FLIGHT, {})
+
+        # the service failure is not cached, the next call fetches again
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE))
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+
+    def test_get_public_key_within_timeout(self):
+        KeyHolder._CACHE = None
+        release = threading.Event()
+
+        def fetch(app_uuid):
+            release.wait(5)
+            return PUBLIC_KEY, CACHE_CONTROL
+
+        with patch.object(KeyHolder, "_get_public_key_and_cache_control_from_mauth", side_effect=fetch):
+            with self.assertRaises(FutureTimeoutError):
+                KeyHolder.get_public_key(APP_UUID, timeout=0.01)
+
+            # the fetch carries on in the background and caches the key
+            release.set()
+            wait_for(lambda: not KeyHolder._IN_FLIGHT)
+
+        self.assertEqual(KeyHolder.get_public_key(APP_UUID, timeout=0), PUBLIC_KEY)
+
+    def test_get_public_key_within_timeout_error(self):
+        KeyHolder._CACHE = None
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, status_code=404)
+            with self.assertRaises(InauthenticError):
+                KeyHolder.get_public_key(APP_UUID, timeout=5)
+
+        self.assertEqual(KeyHolder._IN_FLIGHT, {})
+
+    def test_negative_cache(self):
+        KeyHolder._CACHE = None
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, status_code=404)
+            for _ in range(3):
+                with self.assertRaises(InauthenticError) as exc:
+                    KeyHolder.get_public_key(APP_UUID)
+                self.assertEqual(
+                    str(exc.exception), "Failed to fetch the public key for {} from {}".format(APP_UUID, MAUTH_URL)
+                )
+        self.assertEqual(requests.call_count, 1)
+        self.assertEqual(KeyHolder.stats()["negative_cache_hits"], 2)
+        self.assertEqual(KeyHolder.stats()["negative_cache_size"], 1)
+
+    def test_negative_cache_expiration(self):
+        KeyHolder._CACHE = None
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, status_code=404)
+            with self.assertRaises(InauthenticError):
+                KeyHolder.get_public_key(APP_UUID)
+
+            KeyHolder._NEGATIVE_CACHE.expire(KeyHolder._NEGATIVE_CACHE.timer() + Config.KEY_NEGATIVE_CACHE_TTL)
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE))
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+
+    def test_only_unknown_apps_are_negatively_cached(self):
+        for status_code in (401, 429):
+            with self.subTest(status_code=status_code), requests_mock.mock() as requests:
+                KeyHolder._CACHE = None
+                requests.get(MAUTH_PATH, status_code=status_code)
+                for _ in range(2):
+                    with self.assertRaises(UnableToAuthenticateError):
+                        KeyHolder.get_public_key(APP_UUID)
+                self.assertEqual(requests.call_count, 2)
+
+        self.assertEqual(KeyHolder.stats()["negative_cache_size"], 0)
+
+    def test_negative_cache_disabled(self):
+        KeyHolder._CACHE = None
+        with patch.object(Config, "KEY_NEGATIVE_CACHE_TTL", 0), requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, status_code=404)
+            for _ in range(2):
+                with self.assertRaises(InauthenticError):
+                    KeyHolder.get_public_key(APP_UUID)
+        self.assertEqual(requests.call_count, 2)
+        self.assertEqual(KeyHolder.stats()["negative_cache_size"], 0)
+
+
+class TestKeyHolderPrefetch(unittest.TestCase):
+    def setUp(self):
+        KeyHolder._MAUTH = {"auth": MagicMock(), "url": MAUTH_URL, "api_version": MAUTH_API_VERSION}
+        get_circuit_breaker().reset()
+        KeyHolder._CACHE = None
+        KeyHolder._NEGATIVE_CACHE = None
+        KeyHolder.set_key_store(None)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.snapshot_path = os.path.join(directory.name, "snapshot.json")
+        for name, value in (("PREFETCH_APP_UUIDS", None), ("KEY_SNAPSHOT_PATH", self.snapshot_path)):
+            patcher = patch.object(Config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.fetched = []
+        self.barrier = None
+
+        def fetch(app_uuid):
+            self.fetched.append(app_uuid)
+            if self.barrier:
+                self.barrier.wait()
+            if app_uuid == "unknown-app":
+                raise InauthenticError("Failed to fetch the public key for {} from {}".format(app_uuid, MAUTH_URL))
+            return PUBLIC_KEY, CACHE_CONTROL
+
+        fetch_patcher = patch.object(KeyHolder, "_get_public_key_and_cache_control_from_mauth", side_effect=fetch)
+        fetch_patcher.start()
+        self.addCleanup(fetch_patcher.stop)
+
+    def test_prefetch_concurrently(self):
+        app_uuids = ["app-1", "app-2", "app-3"]
+        # every fetch waits for the others, which only completes if they run concurrently
+        self.barrier = threading.Barrier(len(app_uuids), timeout=5)
+        self.assertEqual(KeyHolder.prefetch(app_uuids), [])
+        self.assertEqual(sorted(self.fetched), app_uuids)
+        self.assertEqual(sorted(KeyHolder._CACHE), app_uuids)
+
+    def test_prefetch_failures(self):
+        with self.assertLogs("mauth_key_holder", level="WARNING") as logs:
+            self.assertEqual(KeyHolder.prefetch(["app-1", "unknown-app"]), ["unknown-app"])
+        self.assertIn("Failed to prefetch the public key for unknown-app", logs.output[0])
+
+    def test_prefetch_from_config_and_snapshot(self):
+        Config.PREFETCH_APP_UUIDS = "app-1, app-2,"
+        with open(self.snapshot_path, "w") as snapshot:
+            json.dump(["app-2", "app-3"], snapshot)
+
+        KeyHolder.prefetch()
+        self.assertEqual(sorted(self.fetched), ["app-1", "app-2", "app-3"])
+
+    def test_prefetch_nothing(self):
+        self.assertEqual(KeyHolder.prefetch(), [])
+        self.assertEqual(self.fetched, [])
+
+    def test_prefetch_corrupt_snapshot(self):
+        with open(self.snapshot_path, "w") as snapshot:
+            snapshot.write("{")
+
+        with self.assertLogs("mauth_key_holder", level="WARNING"):
+            self.assertEqual(KeyHolder.prefetch(), [])
+
+    def test_save_snapshot(self):
+        KeyHolder.prefetch(["app-1", "app-2"])
+        KeyHolder.save_snapshot()
+        with open(self.snapshot_path) as snapshot:
+            self.assertEqual(sorted(json.load(snapshot)), ["app-1", "app-2"])
+
+        KeyHolder._CACHE = None
+        self.fetched.clear()
+        KeyHolder.prefetch()
+        self.assertEqual(sorted(self.fetched), ["app-1", "app-2"])
+
+
+class TestKeyHolderKeyring(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with open(os.path.join(directory.name, "{}.pem".format(APP_UUID)), "w") as key_file:
+            key_file.write(PUBLIC_KEY)
+
+        config_patcher = patch.object(Config, "KEYRING_PATH", directory.name)
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
+        self.addCleanup(setattr, KeyHolder, "_KEYRING", None)
+
+        fetch_patcher = patch.object(KeyHolder, "_get_public_key_and_cache_control_from_mauth")
+        self.fetch = fetch_patcher.start()
+        self.addCleanup(fetch_patcher.stop)
+
+    def test_get_public_key(self):
+        self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        with self.assertRaises(InauthenticError):
+            KeyHolder.get_public_key("unknown-app")
+        self.fetch.assert_not_called()
+
+    def test_async_get_public_key(self):
+        self.assertEqual(asyncio.run(AsyncKeyHolder.get_public_key(APP_UUID)), PUBLIC_KEY)
+        self.fetch.assert_not_called()
+
+
+class TestKeyHolderKeyStore(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "keys.sqlite")
+        config_patcher = patch.object(Config, "KEY_CACHE_PATH", path)
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
+
+        KeyHolder._MAUTH = {"auth": MagicMock(), "url": MAUTH_URL, "api_version": MAUTH_API_VERSION}
+        get_circuit_breaker().reset()
+        KeyHolder._CACHE = None
+        KeyHolder._STATS.clear()
+        # the key store is created from the configuration
+        KeyHolder._KEY_STORE_CONFIGURED = False
+        self.addCleanup(KeyHolder.set_key_store, None)
+        self.key_store = FileKeyStore(path)
+
+    def test_fetch_fills_key_store(self):
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE), headers={"Cache-Control": CACHE_CONTROL})
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+
+        public_key, ttl = self.key_store.get(APP_UUID)
+        self.assertEqual(public_key, PUBLIC_KEY)
+        self.assertAlmostEqual(ttl, 60, delta=1)
+
+    def test_miss_reads_key_store(self):
+        self.key_store.set(APP_UUID, PUBLIC_KEY, 120)
+        with patch.object(KeyHolder, "_get_public_key_and_cache_control_from_mauth") as fetch:
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        fetch.assert_not_called()
+
+        # the key expires in this worker when it expires in the key store
+        self.assertAlmostEqual(KeyHolder._CACHE[APP_UUID].expires_at, KeyHolder._CACHE.timer() + 120, delta=1)
+        self.assertEqual(KeyHolder.stats()["key_store_hits"], 1)
+
+    def test_key_about_to_expire_is_fetched(self):
+        self.key_store.set(APP_UUID, "old key", Config.KEY_REFRESH_AHEAD_SECONDS - 1)
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE), headers={"Cache-Control": CACHE_CONTROL})
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        self.assertEqual(self.key_store.get(APP_UUID)[0], PUBLIC_KEY)
+
+    def test_unavailable_key_store(self):
+        Config.KEY_CACHE_PATH = os.path.join(Config.KEY_CACHE_PATH, "missing", "keys.sqlite")
+        with requests_mock.mock() as requests, self.assertLogs("mauth_key_holder", level="WARNING"):
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE))
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+
+    def test_misconfigured_key_store(self):
+        with patch.object(Config, "KEY_STORE", "unknown"), requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE))
+            with self.assertLogs("mauth_key_holder", level="ERROR") as logs:
+                self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+                KeyHolder._CACHE = None
+                self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+
+        # the keys are cached in the process only, the error is logged once
+        self.assertEqual(len(logs.output), 1)
+        self.assertIsNone(KeyHolder._key_store())
+
+    @unittest.skipUnless(key_store.redis, "redis is not installed")
+    def test_redis_key_store_shared_between_nodes(self):
+        server = RedisStandIn()
+        server.start()
+        self.addCleanup(server.stop)
+        KeyHolder.set_key_store(RedisKeyStore(server.url))
+
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE), headers={"Cache-Control": CACHE_CONTROL})
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+
+            # another node, with an empty cache
+            KeyHolder._CACHE = None
+            self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+            self.assertEqual(requests.call_count, 1)
+
+
+class TestAsyncKeyHolder(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        KeyHolder._CACHE = None
+        KeyHolder._NEGATIVE_CACHE = None
+        KeyHolder.set_key_store(None)
+        KeyHolder._MAUTH = {
+            "auth": MAuth(APP_UUID, load_key("priv"), "v2"),
+            "url": MAUTH_URL,
+            "api_version": MAUTH_API_VERSION,
+        }
+        get_circuit_breaker().reset()
+        self.requests = []
+        self.response = httpx.Response(200, json=MAUTH_RESPONSE, headers={"Cache-Control": CACHE_CONTROL})
+
+        def mauth_handler(request):
+            self.requests.append(request)
+            return self.response
+
+        self.create_client = MagicMock(
+            side_effect=lambda: httpx.AsyncClient(transport=httpx.MockTransport(mauth_handler))
+        )
+        clients_patcher = patch.object(AsyncKeyHolder, "_CLIENTS", LoopClients(self.create_client))
+        clients_patcher.start()
+        self.addCleanup(clients_patcher.stop)
+
+    async def test_get_request(self):
+        self.assertEqual(await AsyncKeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        self.assertEqual(await AsyncKeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        self.assertAlmostEqual(KeyHolder._CACHE[APP_UUID].expires_at, KeyHolder._CACHE.timer() + 60, delta=1)
+
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(str(self.requests[0].url), MAUTH_PATH)
+        self.assertIn(MCC_AUTH, self.requests[0].headers)
+
+    async def test_reuses_the_client_of_the_loop(self):
+        KeyHolder._CACHE = None
+        await AsyncKeyHolder.get_public_key(APP_UUID)
+        KeyHolder._CACHE = None
+        await AsyncKeyHolder.get_public_key(APP_UUID)
+
+        self.assertEqual(len(self.requests), 2)
+        self.create_client.assert_called_once_with()
+
+    async def test_get_request_404_error(self):
+        self.response = httpx.Response(404)
+        with self.assertRaises(InauthenticError) as exc:
+            await AsyncKeyHolder.get_public_key(APP_UUID)
+        self.assertEqual(
+            str(exc.exception), "Failed to fetch the public key for {} from {}".format(APP_UUID, MAUTH_URL)
+        )
+        self.assertEqual(AsyncKeyHolder._IN_FLIGHT, {})
+
+        with self.assertRaises(InauthenticError):
+            await AsyncKeyHolder.get_public_key(APP_UUID)
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_rate_limited_app_is_not_negatively_cached(self):
+        self.response = httpx.Response(429)
+        for _ in range(2):
+            with self.assertRaises(UnableToAuthenticateError):
+                await AsyncKeyHolder.get_public_key(APP_UUID)
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(KeyHolder.stats()["negative_cache_size"], 0)
+
+    async def test_get_request_timeout(self):
+        def timeout(request):
+            raise httpx.ReadTimeout("Read timed out.", request=request)
+
+        with patch.object(
+            AsyncKeyHolder,
+            "_request_client",
+            side_effect=lambda: httpx.AsyncClient(transport=httpx.MockTransport(timeout)),
+        ):
+            with self.assertRaises(UnableToAuthenticateError) as exc:
+                await AsyncKeyHolder.get_public_key(APP_UUID)
+        self.assertEqual(
+            str(exc.exception),
+            "Failed to fetch the public key for {} from {}: Read timed out.".format(APP_UUID, MAUTH_URL),
+        )
+
+    async def test_fails_fast_while_the_circuit_is_open(self):
+        KeyHolder._CACHE = None
+        self.response = httpx.Response(503)
+        with patch.object(get_circuit_breaker(), "failure_threshold", 2):
+            for _ in range(3):
+                with self.assertRaises(UnableToAuthenticateError) as exc:
+                    await AsyncKeyHolder.get_public_key(APP_UUID)
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertTrue(str(exc.exception).startswith("Not calling the MAuth service after 2 consecutive failures"))
+
+    async def test_get_request_with_key_store(self):
+        memory_key_store = MemoryKeyStore()
+        KeyHolder.set_key_store(memory_key_store)
+        self.addCleanup(KeyHolder.set_key_store, None)
+
+        self.assertEqual(await AsyncKeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        self.assertEqual(memory_key_store.get(APP_UUID)[0], PUBLIC_KEY)
+
+        KeyHolder._CACHE = None
+        self.assertEqual(await AsyncKeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_prefetch(self):
+        self.assertEqual(await AsyncKeyHolder.prefetch([APP_UUID, APP_UUID]), [])
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+
+    async def test_prefetch_failures(self):
+        self.response = httpx.Response(404)
+        with self.assertLogs("mauth_key_holder", level="WARNING"):
+            self.assertEqual(await AsyncKeyHolder.prefetch([APP_UUID]), [APP_UUID])
+
+    def test_concurrent_fetches_in_two_event_loops(self):
+        fetching = threading.Barrier(2, timeout=5)
+
+        async def slow_fetch(app_uuid):
+            await asyncio.get_running_loop().run_in_executor(None, fetching.wait)
+            return PUBLIC_KEY
+
+        def get_public_key():
+            return asyncio.run(AsyncKeyHolder.get_public_key(APP_UUID))
+
+        with patch.object(AsyncKeyHolder, "_set_public_key", side_effect=slow_fetch) as set_public_key, \
+                ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(lambda _: get_public_key(), range(2)))
+
+        self.assertEqual(results, [PUBLIC_KEY, PUBLIC_KEY])
+        self.assertEqual(set_public_key.call_count, 2)
+        self.assertEqual(AsyncKeyHolder._IN_FLIGHT, {})
+
+    @patch.object(key_holder, "httpx", None)
+    async def test_get_request_without_httpx(self):
+        with requests_mock.mock() as requests:
+            requests.get(MAUTH_PATH, text=json.dumps(MAUTH_RESPONSE))
+            self.assertEqual(await AsyncKeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        self.assertEqual(self.requests, [])
+
+
+class TestKeyHolderEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.slow = MAuthStandIn(PUBLIC_KEY, delay=1)
+        self.fast = MAuthStandIn(PUBLIC_KEY)
+        for server in (self.slow, self.fast):
+            server.start()
+            self.addCleanup(server.stop)
+
+        self.__mauth__ = KeyHolder._MAUTH
+        KeyHolder._MAUTH = {
+            "auth": MAuth(APP_UUID, load_key("priv")),
+            "url": self.slow.url,
+            "urls": [self.slow.url, self.fast.url],
+            "api_version": MAUTH_API_VERSION,
+        }
+        KeyHolder._ENDPOINTS = None
+        KeyHolder._CACHE = None
+        KeyHolder._NEGATIVE_CACHE = None
+        KeyHolder._SESSION = None
+        KeyHolder.set_key_store(None)
+        get_circuit_breaker().reset()
+
+        patcher = patch.multiple(Config, HEDGE_REQUESTS=False, HEDGE_DELAY=0.1, HTTP_MAX_RETRIES=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        KeyHolder._MAUTH = self.__mauth__
+        KeyHolder._ENDPOINTS = None
+        KeyHolder._CACHE = None
+        KeyHolder._SESSION = None
+
+    @patch.object(key_holder, "generate_mauth")
+    def test_endpoints_from_config(self, _):
+        KeyHolder._MAUTH = None
+        with patch.multiple(Config, MAUTH_URL=self.slow.url, MAUTH_URLS="{}, {}".format(self.fast.url, self.slow.url)):
+            self.assertEqual(KeyHolder._endpoints().urls, [self.fast.url, self.slow.url])
+
+        KeyHolder._MAUTH = None
+        with patch.multiple(Config, MAUTH_URL=self.slow.url, MAUTH_URLS=None):
+            self.assertEqual(KeyHolder._endpoints().urls, [self.slow.url])
+
+    def test_forked_worker_opens_its_own_connections(self):
+        self.slow.delay = 0
+        KeyHolder.get_public_key("app-1")
+        session, executor = KeyHolder._request_session(), KeyHolder._hedge_executor()
+        connections = self.slow.connections + self.fast.connections
+
+        # e.g. gunicorn --preload prefetches the keys in the master process, then forks the workers
+        with patch.object(key_holder.os, "getpid", return_value=os.getpid() + 1):
+            KeyHolder.get_public_key("app-2")
+            self.assertIsNot(KeyHolder._request_session(), session)
+            self.assertIsNot(KeyHolder._hedge_executor(), executor)
+
+        self.assertEqual(self.slow.connections + self.fast.connections, connections + 1)
+
+    def test_failover(self):
+        self.slow.status = 503
+        self.slow.delay = 0
+        self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        self.assertEqual(len(self.slow.paths), 1)
+        self.assertEqual(len(self.fast.paths), 1)
+
+        # the failed endpoint is tried last until its cooldown is over
+        self.assertEqual(KeyHolder._ENDPOINTS.ranked(), [self.fast.url, self.slow.url])
+
+    def test_all_endpoints_failing(self):
+        self.slow.status = self.fast.status = 503
+        self.slow.delay = 0
+        with self.assertRaises(UnableToAuthenticateError) as exc:
+            KeyHolder.get_public_key(APP_UUID)
+        self.assertEqual(len(self.slow.paths) + len(self.fast.paths), 2)
+        self.assertIn("Failed to fetch the public key for {}".format(APP_UUID), str(exc.exception))
+
+    def test_unknown_app_is_not_failed_over(self):
+        self.slow.status = 404
+        self.slow.delay = 0
+        with self.assertRaises(InauthenticError):
+            KeyHolder.get_public_key(APP_UUID)
+        self.assertEqual(self.fast.paths, [])
+
+    def test_latency_aware_selection(self):
+        self.slow.delay = 0.2
+        for app_uuid in ("app-1", "app-2", "app-3"):
+            KeyHolder.get_public_key(app_uuid)
+
+        # the slow endpoint is no longer called once the fast one has been measured
+        self.assertEqual(KeyHolder._ENDPOINTS.ranked(), [self.fast.url, self.slow.url])
+        self.assertEqual(len(self.slow.paths), 1)
+
+    def test_hedged_request(self):
+        Config.HEDGE_REQUESTS = True
+        started = time.monotonic()
+        self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(len(self.slow.paths), 1)
+        self.assertEqual(len(self.fast.paths), 1)
+
+    def test_hedged_request_is_not_sent_within_the_delay(self):
+        Config.HEDGE_REQUESTS = True
+        self.slow.delay = 0
+        self.assertEqual(KeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        self.assertEqual(self.fast.paths, [])
+
+
+class TestAsyncKeyHolderEndpoints(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        TestKeyHolderEndpoints.setUp(self)
+
+    def tearDown(self):
+        TestKeyHolderEndpoints.tearDown(self)
+
+    async def test_failover(self):
+        self.slow.status = 503
+        self.slow.delay = 0
+        self.assertEqual(await AsyncKeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        self.assertEqual(KeyHolder._ENDPOINTS.ranked(), [self.fast.url, self.slow.url])
+
+    async def test_hedged_request(self):
+        Config.HEDGE_REQUESTS = True
+        started = time.monotonic()
+        self.assertEqual(await AsyncKeyHolder.get_public_key(APP_UUID), PUBLIC_KEY)
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(len(self.fast.paths), 1)
+
+        # the slow request was abandoned, which makes its endpoint rank last
+        wait_for(lambda: self.slow.paths)
+        self.assertEqual(KeyHolder._ENDPOINTS.ranked(), [self.fast.url, self.slow.url])
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
+from freezegun import freeze_time
+
+from mauth_client import key_store
+from mauth_client.config import Config
+from mauth_client.key_store import FileKeyStore, MemoryKeyStore, RedisKeyStore, get_key_store
+from .common import load_key
+from .redis_server_helper import RedisStandIn
+
+APP_UUID = "f5af50b2-bf7d-4c29-81db-76d086d4808a"
+PUBLIC_KEY = load_key("rsapub")
+HAS_REDIS = key_store.redis is not None
+
+
+def set_public_key(path):
+    FileKeyStore(path).set(APP_UUID, PUBLIC_KEY, 60)
+    return os.getpid()
+
+
+class KeyStoreTestMixin:
+    def test_get_missing(self):
+        self.assertIsNone(self.key_store.get(APP_UUID))
+        self.assertIsNone(self.key_store.ttl(APP_UUID))
+
+    def test_set_and_get(self):
+        self.key_store.set(APP_UUID, PUBLIC_KEY, 60)
+        public_key, ttl = self.key_store.get(APP_UUID)
+        self.assertEqual(public_key, PUBLIC_KEY)
+        self.assertAlmostEqual(ttl, 60, delta=1)
+        self.assertAlmostEqual(self.key_store.ttl(APP_UUID), 60, delta=1)
+
+    def test_delete(self):
+        self.key_store.set(APP_UUID, PUBLIC_KEY, 60)
+        self.key_store.delete(APP_UUID)
+        self.assertIsNone(self.key_store.get(APP_UUID))
+
+    def test_async_variants(self):
+        async def use_key_store():
+            await self.key_store.aset(APP_UUID, PUBLIC_KEY, 60)
+            public_key, ttl = await self.key_store.aget(APP_UUID)
+            self.assertEqual(public_key, PUBLIC_KEY)
+            self.assertAlmostEqual(await self.key_store.attl(APP_UUID), 60, delta=1)
+            await self.key_store.adelete(APP_UUID)
+            self.assertIsNone(await self.key_store.aget(APP_UUID))
+
+        asyncio.run(use_key_store())
+
+
+class TestMemoryKeyStore(KeyStoreTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.key_store = MemoryKeyStore(maxsize=2)
+
+    def test_expiration(self):
+        with freeze_time("2017-07-24 00:00:00"):
+            self.key_store.set(APP_UUID, PUBLIC_KEY, 60)
+
+        with freeze_time("2017-07-24 00:01:00"):
+            self.assertIsNone(self.key_store.get(APP_UUID))
+
+    def test_maxsize(self):
+        for app_uuid in ("app-1", "app-2", "app-3"):
+            self.key_store.set(app_uuid, PUBLIC_KEY, 60)
+        self.assertIsNone(self.key_store.get("app-1"))
+
+
+class TestFileKeyStore(KeyStoreTestMixin, unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "keys.sqlite")
+        self.key_store = FileKeyStore(self.path, keep_seconds=300)
+
+    def test_expiration(self):
+        with freeze_time("2017-07-24 00:00:00"):
+            self.key_store.set(APP_UUID, PUBLIC_KEY, 60)
+
+        with freeze_time("2017-07-24 00:00:30"):
+            self.assertEqual(self.key_store.get(APP_UUID), (PUBLIC_KEY, 30))
+
+        with freeze_time("2017-07-24 00:01:00"):
+            self.assertIsNone(self.key_store.get(APP_UUID))
+
+    def test_purges_rows_past_keep_seconds(self):
+        with freeze_time("2017-07-24 00:00:00"):
+            self.key_store.set(APP_UUID, PUBLIC_KEY, 60)
+
+        with freeze_time("2017-07-24 00:10:00"):
+            self.key_store.set("other-app", PUBLIC_KEY, 60)
+
+        rows = self.key_store._connect().execute("SELECT app_uuid FROM public_keys").fetchall()
+        self.assertEqual(rows, [("other-app",)])
+
+    def test_shared_between_processes(self):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            pid = executor.submit(set_public_key, self.path).result()
+
+        self.assertNotEqual(pid, os.getpid())
+        public_key, ttl = self.key_store.get(APP_UUID)
+        self.assertEqual(public_key, PUBLIC_KEY)
+        self.assertAlmostEqual(ttl, 60, delta=5)
+
+    def test_async_variants_run_in_an_executor(self):
+        async def get_from_threads():
+            with patch.object(FileKeyStore, "get", side_effect=lambda app_uuid: threading.get_ident()) as get:
+                thread = await self.key_store.aget(APP_UUID)
+            get.assert_called_once_with(APP_UUID)
+            return thread
+
+        self.assertNotEqual(asyncio.run(get_from_threads()), threading.get_ident())
+
+
+@unittest.skipUnless(HAS_REDIS, "redis is not installed")
+class TestRedisKeyStore(KeyStoreTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.server = RedisStandIn()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.key_store = RedisKeyStore(self.server.url)
+
+    def test_keys_are_prefixed(self):
+        self.key_store.set(APP_UUID, PUBLIC_KEY, 60)
+        self.assertEqual(list(self.server.data), ["mauth:public_key:{}".format(APP_UUID).encode("utf-8")])
+
+    def test_expiration(self):
+        self.key_store.set(APP_UUID, PUBLIC_KEY, 0.05)
+        time.sleep(0.1)
+        self.assertIsNone(self.key_store.get(APP_UUID))
+
+    def test_get_is_one_round_trip(self):
+        self.key_store.set(APP_UUID, PUBLIC_KEY, 60)
+        self.server.commands.clear()
+        self.key_store.get(APP_UUID)
+        self.assertEqual(self.server.commands, ["GET", "PTTL"])
+
+    def test_async_client_of_each_event_loop(self):
+        async def async_client():
+            return self.key_store._get_async_client()
+
+        loop, other_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        self.addCleanup(other_loop.close)
+
+        client = loop.run_until_complete(async_client())
+        self.assertIs(loop.run_until_complete(async_client()), client)
+        self.assertIsNot(other_loop.run_until_complete(async_client()), client)
+
+
+class TestGetKeyStore(unittest.TestCase):
+    def setUp(self):
+        for name in ("KEY_STORE", "KEY_STORE_URL", "KEY_CACHE_PATH"):
+            patcher = patch.object(Config, name, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_none_by_default(self):
+        self.assertIsNone(get_key_store())
+
+    def test_by_name(self):
+        self.assertIsInstance(get_key_store("memory"), MemoryKeyStore)
+
+    def test_file_from_cache_path(self):
+        Config.KEY_CACHE_PATH = "/dev/shm/mauth-keys.sqlite"
+        key_store = get_key_store()
+        self.assertIsInstance(key_store, FileKeyStore)
+        self.assertEqual(key_store.path, "/dev/shm/mauth-keys.sqlite")
+
+    @unittest.skipUnless(HAS_REDIS, "redis is not installed")
+    def test_redis_from_config(self):
+        Config.KEY_STORE = "redis"
+        Config.KEY_STORE_URL = "redis://localhost:6379/0"
+        self.assertIsInstance(get_key_store(), RedisKeyStore)
+
+    def test_unknown_key_store(self):
+        with self.assertRaises(ValueError) as exc:
+            get_key_store("memcached")
+        self.assertEqual(str(exc.exception), "MAUTH_KEY_STORE must be one of file, memory, redis")
+
+    def test_missing_settings(self):
+        for name in ("file", "redis"):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                get_key_store(name)
+
+    @patch.object(key_store, "redis", None)
+    def test_redis_not_installed(self):
+        with self.assertRaises(ValueError) as exc:
+            RedisKeyStore("redis://localhost:6379/0")
+        self.assertEqual(str(exc.exception), "The redis key store requires the redis package")
@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import unittest
+
+from mauth_client.exceptions import InauthenticError
+from mauth_client.keyring import StaticKeyring
+from .common import load_key
+
+APP_UUID = "f5af50b2-bf7d-4c29-81db-76d086d4808a"
+OTHER_APP_UUID = "b0603e5c-c344-4e81-a9f4-0e79b0ea6ee2"
+PUBLIC_KEY = load_key("rsapub")
+
+
+class TestStaticKeyring(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as key_file:
+            key_file.write(content)
+        # make the change visible even on file systems with a coarse mtime
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+        return path
+
+    def test_directory(self):
+        self.write("{}.pem".format(APP_UUID), PUBLIC_KEY)
+        self.write("README.txt", "not a key")
+        keyring = StaticKeyring(self.directory)
+        self.assertEqual(keyring.get_public_key(APP_UUID), PUBLIC_KEY)
+        self.assertEqual(keyring._keys.keys(), {APP_UUID})
+
+    def test_json_bundle(self):
+        path = self.write("keys.json", json.dumps({APP_UUID: PUBLIC_KEY}))
+        self.assertEqual(StaticKeyring(path).get_public_key(APP_UUID), PUBLIC_KEY)
+
+    def test_missing_key(self):
+        keyring = StaticKeyring(self.directory)
+        with self.assertRaises(InauthenticError) as exc:
+            keyring.get_public_key(APP_UUID)
+        self.assertEqual(
+            str(exc.exception), "The public key for {} is not in the keyring {}".format(APP_UUID, self.directory)
+        )
+
+    def test_invalid_json_bundle(self):
+        path = self.write("keys.json", json.dumps([PUBLIC_KEY]))
+        with self.assertRaises(ValueError):
+            StaticKeyring(path)
+
+    def test_reloads_directory(self):
+        keyring = StaticKeyring(self.directory, reload_interval=0)
+        self.write("{}.pem".format(OTHER_APP_UUID), PUBLIC_KEY)
+        self.assertEqual(keyring.get_public_key(OTHER_APP_UUID), PUBLIC_KEY)
+
+        os.remove(os.path.join(self.directory, "{}.pem".format(OTHER_APP_UUID)))
+        with self.assertRaises(InauthenticError):
+            keyring.get_public_key(OTHER_APP_UUID)
+
+    def test_reloads_json_bundle(self):
+        path = self.write("keys.json", json.dumps({APP_UUID: PUBLIC_KEY}))
+        keyring = StaticKeyring(path, reload_interval=0)
+        self.write("keys.json", json.dumps({APP_UUID: PUBLIC_KEY, OTHER_APP_UUID: PUBLIC_KEY}))
+        self.assertEqual(keyring.get_public_key(OTHER_APP_UUID), PUBLIC_KEY)
+
+    def test_keeps_keys_when_reload_fails(self):
+        path = self.write("keys.json", json.dumps({APP_UUID: PUBLIC_KEY}))
+        keyring = StaticKeyring(path, reload_interval=0)
+        self.write("keys.json", "{")
+        with self.assertLogs("mauth_keyring", level="WARNING"):
+            self.assertEqual(keyring.get_public_key(APP_UUID), PUBLIC_KEY)
+
+    def test_reload_interval(self):
+        keyring = StaticKeyring(self.directory, reload_interval=3600)
+        self.write("{}.pem".format(APP_UUID), PUBLIC_KEY)
+        with self.assertRaises(InauthenticError):
+            keyring.get_public_key(APP_UUID)
@@ -1,8 +1,9 @@
 import sys
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import patch
 from io import StringIO
 import logging
+from mauth_client.authenticator import Authenticator, HybridAuthenticator
 from mauth_client.config import Config
 from mauth_client.lambda_authenticator import LambdaAuthenticator
 
@@ -40,13 +41,19 @@ class TestLambdaAuthenticator(unittest.TestCase):
         sys.stdout = sys.__stdout__
         self.logger.handlers = self.logger_handlers
 
+    @patch.object(Config, "MAUTH_MODE", "hybrid")
+    @patch.object(HybridAuthenticator, "is_authentic", return_value=(True, 200, ""))
+    def test_authenticator_by_mode(self, is_authentic_mock):
+        self.assertEqual(self.lambda_authenticator.is_authentic(), (True, 200, ""))
+        is_authentic_mock.assert_called_once()
+
     def test_get_app_uuid(self):
         self.assertEqual(self.lambda_authenticator.get_app_uuid(), CLIENT_APP_UUID)
 
     def test_is_authentic(self):
         self.logger.setLevel(logging.INFO)
-        self.lambda_authenticator._authenticator._authenticate = MagicMock(return_value=True)
-        authentic, status, message = self.lambda_authenticator.is_authentic()
+        with patch.object(Authenticator, "_authenticate_request", return_value=True):
+            authentic, status, message = self.lambda_authenticator.is_authentic()
 
         self.assertTrue(authentic)
         self.assertEqual(status, 200)
@@ -0,0 +1,44 @@
+import unittest
+from base64 import b64encode
+from unittest.mock import patch
+
+from mauth_client import lambda_helper
+from mauth_client.config import Config
+from mauth_client.lambda_helper import generate_mauth
+from tests.common import load_key
+
+APP_UUID = "f5af50b2-bf7d-4c29-81db-76d086d4808a"
+PRIVATE_KEY = load_key("priv")
+ENCRYPTED_PRIVATE_KEY = b64encode(b"encrypted").decode("ascii")
+
+
+class TestLambdaHelper(unittest.TestCase):
+    def setUp(self):
+        lambda_helper._decrypt_private_key.cache_clear()
+        self.addCleanup(lambda_helper._decrypt_private_key.cache_clear)
+        patcher = patch.multiple(Config, APP_UUID=APP_UUID, PRIVATE_KEY=PRIVATE_KEY)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_generate_mauth(self):
+        mauth = generate_mauth()
+        self.assertEqual(mauth.signer.app_uuid, APP_UUID)
+
+    @patch("boto3.client")
+    def test_generate_mauth_with_kms(self, client):
+        Config.PRIVATE_KEY = ENCRYPTED_PRIVATE_KEY
+        client.return_value.decrypt.return_value = {"Plaintext": PRIVATE_KEY.encode("ascii")}
+        for _ in range(3):
+            self.assertEqual(generate_mauth().signer.app_uuid, APP_UUID)
+
+        client.assert_called_once_with("kms")
+        client.return_value.decrypt.assert_called_once_with(CiphertextBlob=b"encrypted")
+
+    @patch("boto3.client")
+    def test_kms_is_called_again_for_another_key(self, client):
+        client.return_value.decrypt.return_value = {"Plaintext": PRIVATE_KEY.encode("ascii")}
+        for encrypted_private_key in (ENCRYPTED_PRIVATE_KEY, b64encode(b"rotated").decode("ascii")):
+            Config.PRIVATE_KEY = encrypted_private_key
+            generate_mauth()
+
+        self.assertEqual(client.return_value.decrypt.call_count, 2)
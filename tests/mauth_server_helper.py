@@ -0,0 +1,69 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MAuthStandIn:
+    """
+    Local stand-in for the MAuth service, answering security token and authentication ticket requests
+    after the given delay
+    """
+
+    def __init__(self, public_key, delay=0, status=200):
+        self.public_key = public_key
+        self.delay = delay
+        self.status = status
+        self.paths = []
+        self.connections = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), MAuthStandInHandler)
+        self._server.daemon_threads = True
+        self._server.stand_in = self
+        self.url = "http://127.0.0.1:{}".format(self._server.server_address[1])
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, path):
+        self.paths.append(path)
+        time.sleep(self.delay)
+        app_uuid = path.rsplit("/", 1)[-1][: -len(".json")]
+        body = {"security_token": {"app_uuid": app_uuid, "public_key_str": self.public_key}}
+        return self.status, json.dumps(body).encode("utf-8")
+
+    def respond_to_ticket(self, path):
+        self.paths.append(path)
+        time.sleep(self.delay)
+        return self.status, b"{}"
+
+
+class MAuthStandInHandler(BaseHTTPRequestHandler):
+    # keeps connections alive, and sends the headers and body of a response without waiting for acks
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.stand_in.connections += 1
+
+    def do_GET(self):
+        self.send(*self.server.stand_in.respond(self.path))
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send(*self.server.stand_in.respond_to_ticket(self.path))
+
+    def send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Cache-Control", "max-age=60, private")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
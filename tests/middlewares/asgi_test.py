@@ -1,4 +1,9 @@
+import asyncio
+import httpx
+import logging
 import unittest
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from fastapi import FastAPI, Request
 from fastapi.testclient import TestClient
 from fastapi.websockets import WebSocket
@@ -6,7 +11,13 @@ from unittest.mock import AsyncMock
 from unittest.mock import patch
 from uuid import uuid4
 
-from mauth_client.authenticator import LocalAuthenticator
+from mauth_client.authenticator import (
+    AsyncAuthenticator,
+    AsyncHybridAuthenticator,
+    AsyncLocalAuthenticator,
+    AsyncRemoteAuthenticator,
+)
+from mauth_client.circuit_breaker import get_circuit_breaker
 from mauth_client.config import Config
 from mauth_client.consts import (
     AUTH_HEADER_DELIMITER,
@@ -18,7 +29,13 @@ from mauth_client.consts import (
     ENV_AUTHENTIC,
     ENV_PROTOCOL_VERSION,
 )
+from mauth_client.key_holder import AsyncKeyHolder, KeyHolder
 from mauth_client.middlewares import MAuthASGIMiddleware
+from mauth_client.requests_mauth import MAuth
+from mauth_client.signable import RequestSignable
+from mauth_client.signed import Signed
+from mauth_client.signer import Signer
+from tests.common import load_key
 
 
 class TestMAuthASGIMiddlewareInitialization(unittest.TestCase):
@@ -36,6 +53,21 @@ class TestMAuthASGIMiddlewareInitialization(unittest.TestCase):
         except TypeError:
             self.fail("Shouldn't raise exception")
 
+    def test_app_configuration_with_keyring(self):
+        Config.MAUTH_URL = None
+        Config.PRIVATE_KEY = None
+        with patch.object(Config, "KEYRING_PATH", "/etc/mauth/keys"):
+            self.app.add_middleware(MAuthASGIMiddleware)
+            self.app.build_middleware_stack()
+
+    def test_app_configuration_with_keyring_in_remote_mode(self):
+        Config.MAUTH_URL = None
+        with patch.multiple(Config, KEYRING_PATH="/etc/mauth/keys", MAUTH_MODE="remote"):
+            with self.assertRaises(TypeError) as exc:
+                self.app.add_middleware(MAuthASGIMiddleware)
+                self.app.build_middleware_stack()
+        self.assertEqual(str(exc.exception), "MAuthASGIMiddleware requires MAUTH_URL and MAUTH_API_VERSION")
+
     def test_app_configuration_missing_uuid(self):
         Config.APP_UUID = None
         with self.assertRaises(TypeError) as exc:
@@ -118,7 +150,7 @@ class TestMAuthASGIMiddlewareFunctionality(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"msg": "open"})
 
-    @patch.object(LocalAuthenticator, "is_authentic")
+    @patch.object(AsyncAuthenticator, "authenticate")
     def test_ok_when_authenticated(self, is_authentic_mock):
         is_authentic_mock.return_value = (True, 200, "")
 
@@ -127,7 +159,30 @@ class TestMAuthASGIMiddlewareFunctionality(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"msg": "authenticated"})
 
-    @patch.object(LocalAuthenticator, "is_authentic")
+    @patch.object(Config, "MAUTH_MODE", "remote")
+    @patch.object(AsyncAuthenticator, "authenticate")
+    @patch.object(AsyncRemoteAuthenticator, "is_authentic")
+    def test_remote_mode(self, remote_is_authentic_mock, local_authenticate_mock):
+        remote_is_authentic_mock.return_value = (True, 200, "")
+
+        with patch.object(AsyncRemoteAuthenticator, "_MAUTH", {"auth": None, "url": "https://mauth.com"}):
+            response = self.client.get("/")
+
+        self.assertEqual(response.status_code, 200)
+        remote_is_authentic_mock.assert_called_once()
+        local_authenticate_mock.assert_not_called()
+
+    @patch.object(Config, "MAUTH_MODE", "hybrid")
+    @patch.object(AsyncHybridAuthenticator, "is_authentic")
+    def test_hybrid_mode(self, is_authentic_mock):
+        is_authentic_mock.return_value = (True, 200, "")
+
+        response = self.client.get("/")
+
+        self.assertEqual(response.status_code, 200)
+        is_authentic_mock.assert_called_once()
+
+    @patch.object(AsyncAuthenticator, "authenticate")
     def test_adds_values_to_context_v1(self, is_authentic_mock):
         is_authentic_mock.return_value = (True, 200, "")
 
@@ -144,7 +199,7 @@ class TestMAuthASGIMiddlewareFunctionality(unittest.TestCase):
 
         self.client.get("/v1_test", headers=headers_v1)
 
-    @patch.object(LocalAuthenticator, "is_authentic")
+    @patch.object(AsyncAuthenticator, "authenticate")
     def test_adds_values_to_context_v2(self, is_authentic_mock):
         is_authentic_mock.return_value = (True, 200, "")
 
@@ -161,7 +216,7 @@ class TestMAuthASGIMiddlewareFunctionality(unittest.TestCase):
 
         self.client.get("/v2_test", headers=headers_v2)
 
-    @patch.object(LocalAuthenticator, "is_authentic")
+    @patch.object(AsyncAuthenticator, "authenticate")
     def test_downstream_can_receive_body(self, is_authentic_mock):
         is_authentic_mock.return_value = (True, 200, "")
         expected_body = {"msg": "test"}
@@ -206,16 +261,16 @@ class TestMAuthASGIMiddlewareInSubApplication(unittest.TestCase):
 
         self.client = TestClient(self.app)
 
-    @patch.object(LocalAuthenticator, "is_authentic", autospec=True)
-    def test_includes_base_application_path_in_signature_verification(self, is_authentic_mock):
+    @patch.object(AsyncAuthenticator, "authenticate", autospec=True)
+    def test_includes_base_application_path_in_signature_verification(self, authenticate_mock):
         request_url = None
 
-        def is_authentic_effect(self):
+        def authenticate_effect(self, signable, signed, executor=None):
             nonlocal request_url
-            request_url = self.signable.attributes_for_signing["request_url"]
+            request_url = signable.attributes_for_signing["request_url"]
             return True, 200, ""
 
-        is_authentic_mock.side_effect = is_authentic_effect
+        authenticate_mock.side_effect = authenticate_effect
 
         self.client.get("/sub_app/path")
 
@@ -230,7 +285,7 @@ class TestMAuthASGIMiddlewareInLongLivedConnections(unittest.IsolatedAsyncioTest
         Config.MAUTH_API_VERSION = "v1"
         Config.PRIVATE_KEY = "key"
 
-    @patch.object(LocalAuthenticator, "is_authentic")
+    @patch.object(AsyncAuthenticator, "authenticate")
     async def test_fake_receive_delegates_to_original_after_body_consumed(self, is_authentic_mock):
         """Test that after body events are consumed, _fake_receive delegates to original receive"""
         is_authentic_mock.return_value = (True, 200, "")
@@ -278,3 +333,159 @@ class TestMAuthASGIMiddlewareInLongLivedConnections(unittest.IsolatedAsyncioTest
         self.assertEqual(call_order[0], ("body", "http.request"))
         self.assertEqual(call_order[1], ("disconnect", "http.disconnect"))
         self.assertEqual(receive_calls, 2)  # Called once for auth, once from app
+
+
+class TestMAuthASGIMiddlewareKeyFetch(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app_uuid = str(uuid4())
+        self.cached_app_uuid = str(uuid4())
+        Config.APP_UUID = str(uuid4())
+        Config.MAUTH_URL = "https://mauth.com"
+        Config.MAUTH_API_VERSION = "v1"
+        Config.PRIVATE_KEY = "key"
+
+        self.__mauth__ = KeyHolder._MAUTH
+        KeyHolder._MAUTH = {"auth": MAuth(Config.APP_UUID, load_key("priv")), "url": "https://mauth.com",
+                            "api_version": "v1"}
+        KeyHolder._CACHE = None
+        get_circuit_breaker().reset()
+        KeyHolder._cache_public_key(self.cached_app_uuid, load_key("rsapub"), None)
+
+        self.fetches = 0
+        self.fetch_started = asyncio.Event()
+        self.release_fetch = asyncio.Event()
+
+        async def mauth_handler(request):
+            self.fetches += 1
+            self.fetch_started.set()
+            await self.release_fetch.wait()
+            return httpx.Response(200, json={"security_token": {"public_key_str": load_key("rsapub")}})
+
+        client_patcher = patch.object(
+            AsyncKeyHolder,
+            "_request_client",
+            side_effect=lambda: httpx.AsyncClient(transport=httpx.MockTransport(mauth_handler)),
+        )
+        client_patcher.start()
+        self.addCleanup(client_patcher.stop)
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        self.middleware = MAuthASGIMiddleware(app)
+
+    def tearDown(self):
+        KeyHolder._MAUTH = self.__mauth__
+        KeyHolder._CACHE = None
+
+    async def request(self, app_uuid):
+        signer = Signer(app_uuid, load_key("priv"), "v2")
+        headers = signer.signed_headers(RequestSignable(method="GET", url="/", body=b""))
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "query_string": b"",
+            "headers": [(k.lower().encode("utf-8"), v.encode("utf-8")) for k, v in headers.items()],
+        }
+        responses = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(event):
+            responses.append(event)
+
+        await self.middleware(scope, receive, send)
+        return responses[0]["status"]
+
+    async def test_serves_requests_while_key_fetch_in_flight(self):
+        first = asyncio.ensure_future(self.request(self.app_uuid))
+        second = asyncio.ensure_future(self.request(self.app_uuid))
+        await asyncio.wait_for(self.fetch_started.wait(), 1)
+
+        self.assertEqual(await asyncio.wait_for(self.request(self.cached_app_uuid), 1), 200)
+        self.assertFalse(first.done())
+        self.assertFalse(second.done())
+
+        self.release_fetch.set()
+        self.assertEqual(await first, 200)
+        self.assertEqual(await second, 200)
+        self.assertEqual(self.fetches, 1)
+
+    async def test_verifies_signatures_in_executor(self):
+        self.release_fetch.set()
+        for executor_class in (ThreadPoolExecutor, ProcessPoolExecutor):
+            with self.subTest(executor=executor_class.__name__), executor_class(max_workers=2) as executor:
+                self.middleware.executor = executor
+                self.assertEqual(await self.request(self.cached_app_uuid), 200)
+                self.assertEqual(await self.request(self.app_uuid), 200)
+
+                signable = RequestSignable(method="GET", url="/", body=b"")
+                authenticator = AsyncLocalAuthenticator(signable, Signed.from_headers({}), logging.getLogger())
+                self.assertEqual((await authenticator.is_authentic(executor))[:2], (False, 401))
+
+
+class TestMAuthASGIMiddlewareExecutor(unittest.TestCase):
+    def setUp(self):
+        Config.APP_UUID = str(uuid4())
+        Config.MAUTH_URL = "https://mauth.com"
+        Config.MAUTH_API_VERSION = "v1"
+        Config.PRIVATE_KEY = "key"
+
+    def tearDown(self):
+        Config.ASGI_EXECUTOR = None
+        Config.ASGI_EXECUTOR_WORKERS = None
+
+    def test_no_executor_by_default(self):
+        self.assertIsNone(MAuthASGIMiddleware(FastAPI()).executor)
+
+    def test_executor_from_config(self):
+        Config.ASGI_EXECUTOR = "thread"
+        Config.ASGI_EXECUTOR_WORKERS = 3
+        executor = MAuthASGIMiddleware(FastAPI()).executor
+        self.assertIsInstance(executor, ThreadPoolExecutor)
+        self.assertEqual(executor._max_workers, 3)
+        executor.shutdown()
+
+    def test_executor_argument(self):
+        Config.ASGI_EXECUTOR = "process"
+        with ThreadPoolExecutor() as executor:
+            self.assertIs(MAuthASGIMiddleware(FastAPI(), executor=executor).executor, executor)
+
+    def test_unknown_executor(self):
+        Config.ASGI_EXECUTOR = "fiber"
+        with self.assertRaises(TypeError) as exc:
+            MAuthASGIMiddleware(FastAPI())
+        self.assertEqual(str(exc.exception), "MAUTH_ASGI_EXECUTOR must be one of thread, process")
+
+
+class TestMAuthASGIMiddlewareLifespan(unittest.TestCase):
+    def setUp(self):
+        Config.APP_UUID = str(uuid4())
+        Config.MAUTH_URL = "https://mauth.com"
+        Config.MAUTH_API_VERSION = "v1"
+        Config.PRIVATE_KEY = "key"
+
+        self.events = []
+
+        @asynccontextmanager
+        async def lifespan(app):
+            self.events.append("startup")
+            yield
+            self.events.append("shutdown")
+
+        self.app = FastAPI(lifespan=lifespan)
+        self.app.add_middleware(MAuthASGIMiddleware)
+
+    @patch.object(KeyHolder, "save_snapshot")
+    @patch.object(AsyncKeyHolder, "prefetch", new_callable=AsyncMock)
+    def test_prefetches_keys_on_startup(self, prefetch, save_snapshot):
+        prefetch.side_effect = lambda: self.events.append("prefetch")
+        save_snapshot.side_effect = lambda: self.events.append("save_snapshot")
+
+        with TestClient(self.app):
+            self.assertEqual(self.events, ["prefetch", "startup"])
+
+        self.assertEqual(self.events, ["prefetch", "startup", "save_snapshot", "shutdown"])
@@ -5,7 +5,7 @@ from unittest.mock import patch
 from flask import Flask, request, jsonify
 from uuid import uuid4
 
-from mauth_client.authenticator import LocalAuthenticator
+from mauth_client.authenticator import Authenticator, HybridAuthenticator
 from mauth_client.config import Config
 from mauth_client.consts import (
     AUTH_HEADER_DELIMITER,
@@ -17,6 +17,7 @@ from mauth_client.consts import (
     ENV_AUTHENTIC,
     ENV_PROTOCOL_VERSION,
 )
+from mauth_client.key_holder import KeyHolder
 from mauth_client.middlewares import MAuthWSGIMiddleware
 
 
@@ -34,6 +35,12 @@ class TestMAuthWSGIMiddlewareInitialization(unittest.TestCase):
         except TypeError:
             self.fail("Shouldn't raise exception")
 
+    def test_app_configuration_with_keyring(self):
+        Config.MAUTH_URL = None
+        Config.PRIVATE_KEY = None
+        with patch.object(Config, "KEYRING_PATH", "/etc/mauth/keys"):
+            self.app.wsgi_app = MAuthWSGIMiddleware(self.app)
+
     def test_app_configuration_missing_uuid(self):
         Config.APP_UUID = None
         with self.assertRaises(TypeError) as exc:
@@ -70,6 +77,18 @@ class TestMAuthWSGIMiddlewareInitialization(unittest.TestCase):
             "MAuthWSGIMiddleware requires MAUTH_URL and MAUTH_API_VERSION"
         )
 
+    @patch.object(KeyHolder, "prefetch")
+    def test_app_configuration_prefetches_keys(self, prefetch):
+        self.app.wsgi_app = MAuthWSGIMiddleware(self.app)
+        prefetch.assert_called_once_with()
+
+    @patch("mauth_client.middlewares.wsgi.atexit")
+    @patch.object(KeyHolder, "prefetch")
+    def test_app_configuration_saves_snapshot_at_exit(self, prefetch, atexit):
+        with patch.object(Config, "KEY_SNAPSHOT_PATH", "/tmp/mauth-keys.json"):
+            self.app.wsgi_app = MAuthWSGIMiddleware(self.app)
+        atexit.register.assert_called_once_with(KeyHolder.save_snapshot)
+
 
 class TestMAuthWSGIMiddlewareFunctionality(unittest.TestCase):
     def setUp(self):
@@ -116,7 +135,7 @@ class TestMAuthWSGIMiddlewareFunctionality(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.get_data(as_text=True), "open")
 
-    @patch.object(LocalAuthenticator, "is_authentic")
+    @patch.object(Authenticator, "authenticate")
     def test_ok_when_authenticated(self, is_authentic_mock):
         is_authentic_mock.return_value = (True, 200, "")
 
@@ -125,7 +144,17 @@ class TestMAuthWSGIMiddlewareFunctionality(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.get_data(as_text=True), "authenticated!")
 
-    @patch.object(LocalAuthenticator, "is_authentic")
+    @patch.object(Config, "MAUTH_MODE", "hybrid")
+    @patch.object(HybridAuthenticator, "is_authentic")
+    def test_hybrid_mode(self, is_authentic_mock):
+        is_authentic_mock.return_value = (True, 200, "")
+
+        response = self.client.get("/")
+
+        self.assertEqual(response.status_code, 200)
+        is_authentic_mock.assert_called_once()
+
+    @patch.object(Authenticator, "authenticate")
     def test_adds_values_to_context_v1(self, is_authentic_mock):
         is_authentic_mock.return_value = (True, 200, "")
 
@@ -150,7 +179,7 @@ class TestMAuthWSGIMiddlewareFunctionality(unittest.TestCase):
             "protocol": 1,
         })
 
-    @patch.object(LocalAuthenticator, "is_authentic")
+    @patch.object(Authenticator, "authenticate")
     def test_adds_values_to_context_v2(self, is_authentic_mock):
         is_authentic_mock.return_value = (True, 200, "")
 
@@ -175,7 +204,7 @@ class TestMAuthWSGIMiddlewareFunctionality(unittest.TestCase):
             "protocol": 2,
         })
 
-    @patch.object(LocalAuthenticator, "is_authentic")
+    @patch.object(Authenticator, "authenticate")
     def test_downstream_can_receive_body(self, is_authentic_mock):
         is_authentic_mock.return_value = (True, 200, "")
         body = {"msg": "helloes"}
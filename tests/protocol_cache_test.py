@@ -0,0 +1,51 @@
+import unittest
+from freezegun import freeze_time
+
+from mauth_client.protocol_cache import ProtocolCache
+
+APP_UUID = "f5af50b2-bf7d-4c29-81db-76d086d4808a"
+OTHER_APP_UUID = "2f746447-c212-483c-9eec-d9b0216f7613"
+
+
+class TestProtocolCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ProtocolCache(10, 300, threshold=2)
+
+    def test_v2_keeps_failing_after_consecutive_failures(self):
+        self.cache.record_v2_failure(APP_UUID)
+        self.assertFalse(self.cache.v2_keeps_failing(APP_UUID))
+        self.cache.record_v2_failure(APP_UUID)
+        self.assertTrue(self.cache.v2_keeps_failing(APP_UUID))
+        self.assertFalse(self.cache.v2_keeps_failing(OTHER_APP_UUID))
+
+    def test_v2_success_forgets_the_app(self):
+        self.cache.record_v2_failure(APP_UUID)
+        self.cache.record_v2_success(APP_UUID)
+        self.cache.record_v2_failure(APP_UUID)
+        self.assertFalse(self.cache.v2_keeps_failing(APP_UUID))
+
+    def test_expires_after_the_last_failure(self):
+        with freeze_time("2017-07-24 00:00:00") as frozen_time:
+            cache = ProtocolCache(10, 300, threshold=2)
+            cache.record_v2_failure(APP_UUID)
+            frozen_time.tick(200)
+            cache.record_v2_failure(APP_UUID)
+            frozen_time.tick(299)
+            self.assertTrue(cache.v2_keeps_failing(APP_UUID))
+            frozen_time.tick(1)
+            self.assertFalse(cache.v2_keeps_failing(APP_UUID))
+
+    def test_bounded(self):
+        cache = ProtocolCache(1, 300, threshold=1)
+        cache.record_v2_failure(APP_UUID)
+        cache.record_v2_failure(OTHER_APP_UUID)
+        self.assertFalse(cache.v2_keeps_failing(APP_UUID))
+        self.assertTrue(cache.v2_keeps_failing(OTHER_APP_UUID))
+
+    def test_stats_and_clear(self):
+        self.cache.record_v2_failure(APP_UUID)
+        self.cache.record_v1_first()
+        self.assertEqual(self.cache.stats(), {"v1_first": 1, "size": 1})
+
+        self.cache.clear()
+        self.assertEqual(self.cache.stats(), {"v1_first": 0, "size": 0})
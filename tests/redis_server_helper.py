@@ -0,0 +1,83 @@
+import socketserver
+import threading
+import time
+
+
+class RedisStandIn:
+    """
+    Local stand-in for a Redis server, speaking the protocol for the commands used by RedisKeyStore
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), RedisStandInHandler)
+        self._server.daemon_threads = True
+        self._server.stand_in = self
+        self.url = "redis://127.0.0.1:{}/0".format(self._server.server_address[1])
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def execute(self, command, *args):
+        with self._lock:
+            self.commands.append(command)
+            if command == "PING":
+                return b"+PONG\r\n"
+
+            if command in ("CLIENT", "SELECT"):
+                return b"+OK\r\n"
+
+            if command == "GET":
+                value = self._get(args[0])
+                return b"$-1\r\n" if value is None else self._bulk(value[0])
+
+            if command == "SET":
+                expires_at = None
+                if len(args) == 4 and args[2].upper() == b"PX":
+                    expires_at = time.monotonic() + int(args[3]) / 1000
+                self.data[args[0]] = (args[1], expires_at)
+                return b"+OK\r\n"
+
+            if command == "PTTL":
+                value = self._get(args[0])
+                if value is None:
+                    return b":-2\r\n"
+                return b":-1\r\n" if value[1] is None else b":%d\r\n" % int((value[1] - time.monotonic()) * 1000)
+
+            if command == "DEL":
+                return b":%d\r\n" % sum(self.data.pop(key, None) is not None for key in args)
+
+            return b"-ERR unknown command '" + command.encode("utf-8") + b"'\r\n"
+
+    def _get(self, key):
+        value = self.data.get(key)
+        if value and value[1] is not None and value[1] <= time.monotonic():
+            del self.data[key]
+            return None
+
+        return value
+
+    @staticmethod
+    def _bulk(value):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class RedisStandInHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+
+            self.wfile.write(self.server.stand_in.execute(args[0].decode("utf-8").upper(), *args[1:]))
@@ -0,0 +1,41 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from mauth_client.crypto_backend import RSABackend
+from mauth_client.rsa_verifier import RSAVerifier
+from .common import load_key
+
+APP_UUID = "f5af50b2-bf7d-4c29-81db-76d086d4808a"
+
+
+class TestRSAVerifier(unittest.TestCase):
+    def setUp(self):
+        RSAVerifier.load_public_key.cache_clear()
+        RSAVerifier.shared.cache_clear()
+        self.backend = RSABackend()
+        self.backend.load_public_key = MagicMock(wraps=self.backend.load_public_key)
+
+    def verifier(self, public_key):
+        with patch("mauth_client.rsa_verifier.KeyHolder.get_public_key", return_value=public_key):
+            return RSAVerifier(APP_UUID, self.backend)
+
+    def test_parses_public_key_once(self):
+        first = self.verifier(load_key("rsapub"))
+        second = self.verifier(load_key("rsapub"))
+
+        self.assertIs(first.public_key, second.public_key)
+        self.backend.load_public_key.assert_called_once_with(load_key("rsapub"))
+
+    def test_parses_rotated_public_key(self):
+        first = self.verifier(load_key("rsapub"))
+        second = self.verifier(load_key("pub"))
+
+        self.assertEqual(first.public_key, second.public_key)
+        self.assertEqual(self.backend.load_public_key.call_count, 2)
+
+    def test_shared_verifier(self):
+        verifier = RSAVerifier.shared(self.backend, load_key("rsapub"))
+
+        self.assertIs(RSAVerifier.shared(self.backend, load_key("rsapub")), verifier)
+        self.assertIsNot(RSAVerifier.shared(self.backend, load_key("pub")), verifier)
+        self.assertIs(verifier.backend, self.backend)
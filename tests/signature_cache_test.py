@@ -0,0 +1,48 @@
+import unittest
+from freezegun import freeze_time
+
+from mauth_client.signature_cache import SignatureCache
+
+APP_UUID = "f5af50b2-bf7d-4c29-81db-76d086d4808a"
+EPOCH = "1500854400"  # 2017-07-24 00:00:00 UTC
+
+
+class TestSignatureCache(unittest.TestCase):
+    def setUp(self):
+        self.key = SignatureCache.key(2, APP_UUID, "signature", EPOCH, b"string to sign")
+
+    @freeze_time("2017-07-24 00:00:00")
+    def test_hit_and_miss(self):
+        cache = SignatureCache(10, 300)
+        self.assertNotIn(self.key, cache)
+        cache.add(self.key)
+        self.assertIn(self.key, cache)
+        self.assertNotIn(SignatureCache.key(2, APP_UUID, "signature", EPOCH, b"another string"), cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_expires_when_signature_leaves_drift_window(self):
+        with freeze_time("2017-07-24 00:00:00") as frozen_time:
+            cache = SignatureCache(10, 300)
+            cache.add(self.key)
+            frozen_time.tick(299)
+            self.assertIn(self.key, cache)
+            frozen_time.tick(1)
+            self.assertNotIn(self.key, cache)
+
+    @freeze_time("2017-07-24 00:00:00")
+    def test_bounded(self):
+        cache = SignatureCache(1, 300)
+        other_key = SignatureCache.key(1, APP_UUID, "signature", EPOCH, b"string to sign")
+        cache.add(self.key)
+        cache.add(other_key)
+        self.assertNotIn(self.key, cache)
+        self.assertIn(other_key, cache)
+
+    @freeze_time("2017-07-24 00:00:00")
+    def test_clear(self):
+        cache = SignatureCache(10, 300)
+        cache.add(self.key)
+        self.assertIn(self.key, cache)
+        cache.clear()
+        self.assertNotIn(self.key, cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
@@ -62,3 +62,11 @@ class TestSigned(unittest.TestCase):
         self.assertEqual(signed.token, "")
         self.assertEqual(signed.app_uuid, "")
         self.assertEqual(signed.signature, "")
+
+    def test_app_uuids(self):
+        other_app_uuid = "5ff4257e-9c16-11e0-b048-0026bbfffe5e"
+        both = {**X_MWS_HEADERS, **MWSV2_HEADERS, "X-MWS-Authentication": "MWS {}:c2ln".format(other_app_uuid)}
+        self.assertEqual(Signed.from_headers(both).app_uuids(), [APP_UUID, other_app_uuid])
+        self.assertEqual(Signed.from_headers({**X_MWS_HEADERS, **MWSV2_HEADERS}).app_uuids(), [APP_UUID])
+        self.assertEqual(Signed.from_headers(X_MWS_HEADERS).app_uuids(), [APP_UUID])
+        self.assertEqual(Signed.from_headers({}).app_uuids(), [])